@@ -0,0 +1 @@
+"""Fixed workloads timed under the SDL dummy drivers, see `python -m benchmarks --help`"""
@@ -0,0 +1,98 @@
+import argparse
+import fnmatch
+import sys
+
+from . import harness
+
+DEFAULT_OUTPUT = "benchmarks/results.json"
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="SquareWars benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="time the workloads and save the results as JSON")
+    run_parser.add_argument("patterns", nargs="*", default=["*"], help="glob patterns of benchmarks to run")
+    run_parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    run_parser.add_argument("-r", "--repeat", type=int, default=5)
+    run_parser.add_argument("-w", "--warmup", type=int, default=1)
+    run_parser.add_argument("--list", action="store_true", help="only list the matching benchmarks")
+
+    allocs_parser = commands.add_parser(
+        "allocs", help="trace per frame allocations of the workloads and check them against their budgets"
+    )
+    allocs_parser.add_argument("patterns", nargs="*", default=["*"], help="glob patterns of benchmarks to run")
+    allocs_parser.add_argument("--top", type=int, default=5, help="how many of the worst call sites to list")
+    allocs_parser.add_argument(
+        "--self-check", action="store_true", help="also check that a hot path allocating every frame fails its budget"
+    )
+
+    pathfind_parser = commands.add_parser(
+        "pathfind", help="latency of AI pathfinding and neighbour lookups on generated maps of growing size"
+    )
+    pathfind_parser.add_argument("--sizes", type=int, nargs="+", default=[8, 16, 32, 64, 128])
+    pathfind_parser.add_argument("--rock", type=float, default=0.2, help="share of rock tiles")
+    pathfind_parser.add_argument("--gravel", type=float, default=0.1, help="share of gravel tiles")
+    pathfind_parser.add_argument("--fill", type=float, default=0.9, help="share of the board the AI already owns")
+    pathfind_parser.add_argument("--samples", type=int, default=200)
+    pathfind_parser.add_argument("--seed", type=int, default=harness.SEED)
+    pathfind_parser.add_argument("-o", "--output", help="also save the results as JSON")
+
+    compare_parser = commands.add_parser("compare", help="flag regressions against a stored baseline")
+    compare_parser.add_argument("current", nargs="?", default=DEFAULT_OUTPUT)
+    compare_parser.add_argument("-b", "--baseline", default=DEFAULT_BASELINE)
+    compare_parser.add_argument("-t", "--threshold", type=float, default=0.1, help="allowed slowdown, 0.1 = 10%%")
+    # the fastest run is the one least disturbed by whatever else the machine was doing
+    compare_parser.add_argument("--stat", choices=("min_ms", "median_ms"), default="min_ms")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        regressions = harness.compare(harness.load(args.baseline), harness.load(args.current), args.threshold, args.stat)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+        return 0
+
+    harness.init_pygame()
+    if args.command == "pathfind":
+        from . import pathfinding
+
+        results = pathfinding.run(args.sizes, args.rock, args.gravel, args.fill, args.samples, args.seed)
+        if args.output:
+            harness.save(results, args.output)
+        return 0
+
+    from . import workloads  # noqa: F401, registers the benchmarks
+
+    names = [name for name in harness.BENCHMARKS if any(fnmatch.fnmatch(name, pattern) for pattern in args.patterns)]
+    if not names:
+        print("no benchmarks matched")
+        return 1
+    if args.command == "allocs":
+        return allocs(names, args.top, args.self_check)
+    if args.list:
+        print("\n".join(names))
+        return 0
+    harness.save(harness.run(names, args.repeat, args.warmup), args.output)
+    print(f"saved to {args.output}")
+    return 0
+
+
+def allocs(names: list[str], top: int, self_check: bool) -> int:
+    from . import workloads
+
+    over_budget = []
+    for name in names:
+        over_budget += harness.run_allocations(name, top)
+    if over_budget:
+        print(f"{len(over_budget)} over the allocation budget: {', '.join(over_budget)}")
+        return 1
+    if self_check and not harness.self_check(workloads.SELF_CHECK_WORKLOAD, workloads.hot_path_regression):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
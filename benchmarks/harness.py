@@ -0,0 +1,176 @@
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# a workload is a setup function returning the callable that actually gets timed, so loading and building state
+# doesn't count towards the result
+Workload = Callable[[], Callable[[], None]]
+
+BENCHMARKS: dict[str, tuple[Workload, int]] = {}
+# per frame allocation budgets, keyword arguments of `AllocationTracker.assert_budget`
+BUDGETS: dict[str, dict] = {}
+
+SEED = 1234
+
+
+def benchmark(name: str, ticks: int, **budget):
+    """Registers a workload under `name`, `ticks` is how many frames one run of it covers
+
+    Any keyword arguments are the workload's per frame allocation budget (`created=`, `blocks=`, `size=`, `peak=`),
+    checked by the `allocs` command
+    """
+
+    def register(setup: Workload) -> Workload:
+        BENCHMARKS[name] = (setup, ticks)
+        if budget:
+            BUDGETS[name] = budget
+        return setup
+
+    return register
+
+
+def init_pygame():
+    """Sets up everything `main.run` would, minus a real window, audio device and music"""
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    # the asset paths are relative to the project root
+    os.chdir(ROOT)
+    if str(ROOT / "src") not in sys.path:
+        sys.path.insert(0, str(ROOT / "src"))
+
+    import pygame
+
+    from square_wars import assets, common, settings
+
+    pygame.init()
+    # streaming music isn't part of any workload, and the dummy driver has nothing to play it on
+    pygame.mixer.music.load = lambda *args, **kwargs: None
+    pygame.mixer.music.play = lambda *args, **kwargs: None
+    common.screen = pygame.display.set_mode(settings.LOGICAL_SIZE)
+    common.window = pygame.Window.from_display_module()
+    common.clock = pygame.Clock()
+    common.dt = 1 / settings.FPS
+    common.events = []
+    assets.load_assets()
+
+
+def run_one(name: str, repeat: int, warmup: int) -> dict:
+    setup, ticks = BENCHMARKS[name]
+    runs = []
+    for idx in range(warmup + repeat):
+        # every run starts from the same state, so they all do the same work
+        random.seed(SEED)
+        workload = setup()
+        start = time.perf_counter()
+        workload()
+        elapsed = time.perf_counter() - start
+        if idx >= warmup:
+            runs.append(elapsed * 1000)
+    return {
+        "ticks": ticks,
+        "min_ms": min(runs),
+        "median_ms": statistics.median(runs),
+        "runs_ms": runs,
+    }
+
+
+def run(names: list[str], repeat: int, warmup: int, log=print) -> dict:
+    import pygame
+
+    results = {}
+    for name in names:
+        results[name] = run_one(name, repeat, warmup)
+        log(f"{name:<32} {results[name]['median_ms']:9.2f} ms  (min {results[name]['min_ms']:.2f})")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "sdl": ".".join(map(str, pygame.get_sdl_version())),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "repeat": repeat,
+            "warmup": warmup,
+        },
+        "results": results,
+    }
+
+
+def run_allocations(name: str, top: int, log=print) -> list[str]:
+    """Runs a workload once with every frame's allocations traced, returns how it went over its budget (if at all)"""
+    from square_wars import allocations, common
+
+    setup, _ = BENCHMARKS[name]
+    random.seed(SEED)
+    workload = setup()
+    tracker = common.profiler.start_allocations()
+    try:
+        workload()
+    finally:
+        common.profiler.stop_allocations()
+    mean = tracker.mean()
+    log(
+        f"{name:<32} {mean.created:9.1f} created {mean.blocks:9.1f} blocks {mean.size:10.0f} B per frame, "
+        f"peak {mean.peak} B"
+    )
+    for site, created, blocks, size in tracker.top_sites(top):
+        log(f"    {site:<36} {created:9.1f} created {blocks:9.1f} blocks {size:10.0f} B")
+    try:
+        tracker.assert_budget(**BUDGETS.get(name, {}))
+    except allocations.AllocationBudgetError as error:
+        log(f"    {error}")
+        return [name]
+    return []
+
+
+def self_check(name: str, regression, log=print) -> bool:
+    """Runs a workload with `regression` (a context manager) in effect, returns whether its budget caught it"""
+    log(f"{name} with an injected regression, should go over its budget:")
+    with regression():
+        caught = run_allocations(name, 0, log=lambda line: log(f"    {line}"))
+    if not caught:
+        log("    the allocation budget didn't catch it")
+    return bool(caught)
+
+
+def save(data: dict, path) -> None:
+    Path(path).write_text(json.dumps(data, indent=2) + "\n")
+
+
+def load(path) -> dict:
+    return json.loads(Path(path).read_text())
+
+
+def compare(baseline: dict, current: dict, threshold: float, stat: str = "min_ms", log=print) -> list[str]:
+    """Prints every shared benchmark's change against the baseline and returns the ones that got slower than
+    `threshold` (a fraction, 0.1 meaning 10%) allows"""
+    regressions = []
+    base_results = baseline["results"]
+    for name, result in current["results"].items():
+        if name not in base_results:
+            log(f"{name:<32} {result[stat]:9.2f} ms  (new)")
+            continue
+        before = base_results[name][stat]
+        after = result[stat]
+        change = (after - before) / before if before else 0
+        if change > threshold:
+            verdict = "REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            verdict = "faster"
+        else:
+            verdict = ""
+        log(f"{name:<32} {before:9.2f} -> {after:9.2f} ms  {change:+7.1%}  {verdict}")
+    missing = base_results.keys() - current["results"].keys()
+    if missing:
+        log(f"{len(missing)} baseline benchmark(s) not in the current results")
+    if baseline.get("meta", {}).get("platform") != current.get("meta", {}).get("platform"):
+        log("note: the results come from different platforms, timings might not be comparable")
+    return regressions
@@ -0,0 +1,105 @@
+"""Latency of the AI's pathfinding and the grid's neighbour lookups on generated maps of growing size"""
+
+import queue
+import random
+import statistics
+import time
+
+from square_wars import command, common, settings, states
+
+from . import stress_maps
+
+PERCENTILES = (50, 90, 99)
+
+
+def distribution(samples: list[float]) -> dict:
+    """Percentiles and extremes of the samples, in microseconds"""
+    ordered = sorted(sample * 1_000_000 for sample in samples)
+    result = {f"p{percent}": ordered[min(len(ordered) - 1, len(ordered) * percent // 100)] for percent in PERCENTILES}
+    result["mean"] = statistics.fmean(ordered)
+    result["max"] = ordered[-1]
+    return result
+
+
+def make_game(stress_level) -> states.Gameplay:
+    # reset looks at the previous state
+    common.current_state = states.MainMenu()
+    gameplay = states.Gameplay((stress_level,))
+    common.current_state = gameplay
+    return gameplay
+
+
+def measure(size: int, rock_density: float, gravel_density: float, fill: float, samples: int, seed: int) -> dict:
+    """Times `samples` calls of both from random clear cells of a `size`x`size` map, and as many squares changing hands
+
+    `fill` is the share of the board already taken by the AI, the further the AI has to go for a square it can take,
+    the more of the map its search covers. A square changing hands updates the teams' distance fields
+    """
+    gameplay = make_game(stress_maps.generate(size, size, rock_density, gravel_density, seed=seed))
+    rng = random.Random(seed)
+    squares = gameplay.squares
+    clear = sorted(squares.compiled.clear)
+    ai = next(player for player in gameplay.players if player.team == settings.TEAM_2)
+    controller: command.DumbAIController = ai.controller
+    for x, y in rng.sample(clear, int(len(clear) * fill)):
+        squares.get_sprite_by_coordinate(x, y).set_team(ai.team)
+
+    neighbor_times = []
+    pathfind_times = []
+    capture_times = []
+    found = 0
+    for _ in range(samples):
+        x, y = rng.choice(clear)
+        start = time.perf_counter()
+        for _ in squares.get_neighbors((x, y)):
+            pass
+        neighbor_times.append(time.perf_counter() - start)
+
+        ai.rect.topleft = (x * 8, y * 8)
+        controller.pathfind_queue = queue.Queue()
+        start = time.perf_counter()
+        found += controller.pathfind()
+        pathfind_times.append(time.perf_counter() - start)
+
+        square = squares.get_sprite_by_coordinate(*rng.choice(clear))
+        if square.team != settings.TEAM_GRAVEL:
+            start = time.perf_counter()
+            square.set_team(settings.TEAM_NONE if square.team == ai.team else ai.team)
+            capture_times.append(time.perf_counter() - start)
+    return {
+        "size": size,
+        "clear_cells": len(clear),
+        "found": found / samples,
+        "get_neighbors_us": distribution(neighbor_times),
+        "pathfind_us": distribution(pathfind_times),
+        "capture_us": distribution(capture_times),
+    }
+
+
+def run(sizes, rock_density: float, gravel_density: float, fill: float, samples: int, seed: int, log=print) -> dict:
+    results = []
+    log(
+        f"{'size':>5} {'cells':>7}  {'get_neighbors p50/p99 us':>26}  {'pathfind p50/p90/p99/max us':>36}  "
+        f"{'capture p50/p99 us':>20}"
+    )
+    for size in sizes:
+        result = measure(size, rock_density, gravel_density, fill, samples, seed)
+        results.append(result)
+        neighbors = result["get_neighbors_us"]
+        pathfind = result["pathfind_us"]
+        capture = result["capture_us"]
+        log(
+            f"{size:>5} {result['clear_cells']:>7}  {neighbors['p50']:>12.2f} {neighbors['p99']:>12.2f}  "
+            f"{pathfind['p50']:>8.0f} {pathfind['p90']:>8.0f} {pathfind['p99']:>8.0f} {pathfind['max']:>9.0f}  "
+            f"{capture['p50']:>9.0f} {capture['p99']:>10.0f}"
+        )
+    return {
+        "params": {
+            "rock_density": rock_density,
+            "gravel_density": gravel_density,
+            "fill": fill,
+            "samples": samples,
+            "seed": seed,
+        },
+        "results": results,
+    }
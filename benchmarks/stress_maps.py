@@ -0,0 +1,102 @@
+"""Random worlds of any size for seeing how the grid and AI code scale, way past the 8x8 levels of the game"""
+
+import random
+
+from square_wars import level
+
+STRESS_POWERUPS = (level.POWERUP_SPEEDUP, level.POWERUP_GUN, level.POWERUP_GASCAN, level.POWERUP_BARBWIRE)
+
+
+class UnionFind:
+    def __init__(self):
+        self.parents: dict = {}
+
+    def find(self, item):
+        self.parents.setdefault(item, item)
+        root = item
+        while self.parents[root] != root:
+            root = self.parents[root]
+        # path compression, so long chains only get walked once
+        while self.parents[item] != root:
+            self.parents[item], item = root, self.parents[item]
+        return root
+
+    def union(self, first, second) -> None:
+        self.parents[self.find(first)] = self.find(second)
+
+    def connected(self, first, second) -> bool:
+        return self.find(first) == self.find(second)
+
+
+def spawns_connected(rows: list[list[str]], spawns: list[tuple[int, int]]) -> bool:
+    """Whether every spawn can walk to every other one, rocks being the only thing in the way"""
+    sets = UnionFind()
+    for y, row in enumerate(rows):
+        for x, char in enumerate(row):
+            if char == level.CHAR_ROCK:
+                continue
+            sets.find((x, y))
+            # every cell only has to be joined with the ones to its left and above
+            if x and row[x - 1] != level.CHAR_ROCK:
+                sets.union((x, y), (x - 1, y))
+            if y and rows[y - 1][x] != level.CHAR_ROCK:
+                sets.union((x, y), (x, y - 1))
+    return all(sets.connected(spawns[0], spawn) for spawn in spawns[1:])
+
+
+def carve(rows: list[list[str]], start: tuple[int, int], end: tuple[int, int]) -> None:
+    """Turns the rocks on an L shaped path from `start` to `end` into gravel"""
+    (x, y), (end_x, end_y) = start, end
+    while (x, y) != (end_x, end_y):
+        if x != end_x:
+            x += 1 if end_x > x else -1
+        else:
+            y += 1 if end_y > y else -1
+        if rows[y][x] == level.CHAR_ROCK:
+            rows[y][x] = level.CHAR_GRAVEL
+
+
+def generate(
+    width: int,
+    height: int,
+    rock_density: float = 0.2,
+    gravel_density: float = 0.1,
+    opponents: int = 1,
+    seed: int = 0,
+    attempts: int = 10,
+) -> level.Level:
+    """A world with the given share of rocks and gravel and every spawn reachable from every other one
+
+    Maps get redrawn with the same seeded generator up to `attempts` times, if the spawns still end up walled off from
+    each other the last one gets paths carved between them
+    """
+    if width * height < opponents + 1:
+        raise ValueError(f"a {width}x{height} world can't fit {opponents + 1} players")
+    rng = random.Random(seed)
+    for attempt in range(attempts):
+        rows = [
+            [
+                rng.choices(
+                    (level.CHAR_ROCK, level.CHAR_GRAVEL, level.CHAR_BLANK),
+                    (rock_density, gravel_density, max(1 - rock_density - gravel_density, 0)),
+                )[0]
+                for _ in range(width)
+            ]
+            for _ in range(height)
+        ]
+        # player one in a corner, the opponents spread over the rest of the map
+        cells = [(x, y) for y in range(height) for x in range(width) if (x, y) != (0, 0)]
+        spawns = [(0, 0)] + rng.sample(cells, opponents)
+        for idx, (x, y) in enumerate(spawns):
+            rows[y][x] = level.CHAR_T1 if not idx else level.CHAR_T2
+        if spawns_connected(rows, spawns):
+            break
+        if attempt == attempts - 1:
+            for spawn in spawns[1:]:
+                carve(rows, spawns[0], spawn)
+    return level.Level(
+        remark=f"{width}x{height}\nseed {seed}",
+        powerups=STRESS_POWERUPS,
+        ai_dumbness=0,
+        world="\n".join("".join(row) for row in rows),
+    )
@@ -0,0 +1,184 @@
+"""The workloads themselves, importing this needs `harness.init_pygame` to have been called already"""
+
+import contextlib
+import string
+
+import pygame
+
+from square_wars import chunky, command, common, level, pixelfont, settings, states
+from square_wars.states import main_menu
+
+from .harness import benchmark
+
+GAMEPLAY_TICKS = 600
+MENU_TICKS = 600
+TRANSITION_TICKS = 300
+CHUNKY_REBUILDS = 200
+PIXELFONT_RENDERS = 2000
+
+# allocation budgets are objects created per frame (temporaries included) and blocks per frame that are still alive
+# at the end of it, with some headroom over what the workloads currently take, `python -m benchmarks allocs` lists
+# where they come from
+# the workload `allocs --self-check` runs with `hot_path_regression` to make sure the budgets would catch it
+SELF_CHECK_WORKLOAD = "gameplay/level_03"
+
+SCOREBOARD_TEXT = "~=04pts\n 04@-00$\n`=10pts\n 12#-02%\n "
+
+
+def frames(count: int, events=None):
+    """Runs `count` frames of whatever `common.current_state` is, the way the main loop would"""
+    events = events or {}
+    for idx in range(count):
+        common.profiler.begin_frame()
+        common.events = events.get(idx, [])
+        common.bus.publish(common.events)
+        common.bus.dispatch()
+        common.screen.fill("black")
+        common.current_state.update()
+        common.current_state.draw()
+        common.profiler.end_frame()
+
+
+def make_gameplay(level_index: int) -> states.Gameplay:
+    # reset looks at the previous state
+    common.current_state = states.MainMenu()
+    gameplay = states.Gameplay()
+    gameplay.level_index = level_index
+    gameplay.reset()
+    for player in gameplay.players:
+        if player.team == settings.TEAM_1:
+            player.controller = command.DumbAIController()
+            player.controller.register_sprite(player)
+    # straight into the game, the intro text and countdown aren't what's being measured here
+    gameplay.scoreboard.kill()
+    gameplay.state = gameplay.STATE_GAMEPLAY
+    common.current_state = gameplay
+    return gameplay
+
+
+def gameplay_workload(level_index: int):
+    def setup():
+        make_gameplay(level_index)
+        return lambda: frames(GAMEPLAY_TICKS)
+
+    return setup
+
+
+for _level_index in range(len(level.LEVELS)):
+    benchmark(f"gameplay/level_{_level_index:02d}", GAMEPLAY_TICKS, created=300, blocks=200)(
+        gameplay_workload(_level_index)
+    )
+
+
+@contextlib.contextmanager
+def hot_path_regression(temporaries: int = 200):
+    """Every player update throws away `temporaries` vectors and rects, the kind of garbage the budgets are there for"""
+    update = states.gameplay.Player.update
+
+    def wasteful_update(player):
+        for _ in range(temporaries):
+            pygame.Vector2(player.moving)
+            pygame.Rect(player.rect)
+        update(player)
+
+    states.gameplay.Player.update = wasteful_update
+    try:
+        yield
+    finally:
+        states.gameplay.Player.update = update
+
+
+def mouse_path(count: int, button_held=False) -> dict[int, list[pygame.Event]]:
+    """Mouse motion sweeping back and forth over the screen every few frames"""
+    events = {}
+    buttons = (1, 0, 0) if button_held else (0, 0, 0)
+    for idx in range(0, count, 4):
+        x = idx // 4 % settings.LOGICAL_WIDTH
+        events[idx] = [pygame.Event(pygame.MOUSEMOTION, pos=(x, 22), rel=(1, 0), buttons=buttons)]
+    return events
+
+
+@benchmark("menu/main_menu", MENU_TICKS, created=24, blocks=16)
+def main_menu_workload():
+    common.current_state = states.MainMenu()
+    events = mouse_path(MENU_TICKS)
+    return lambda: frames(MENU_TICKS, events)
+
+
+@benchmark("menu/settings_menu", MENU_TICKS, created=36, blocks=4)
+def settings_menu_workload():
+    common.current_state = main_menu.SettingsMenu()
+    # grabs the music slider and drags it around for the whole run
+    events = mouse_path(MENU_TICKS, button_held=True)
+    events[0] = [pygame.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=(settings.LOGICAL_WIDTH // 2, 22))]
+    return lambda: frames(MENU_TICKS, events)
+
+
+@benchmark("transition/menu_to_gameplay", TRANSITION_TICKS, created=80, blocks=40)
+def transition_workload():
+    menu = states.MainMenu()
+    common.current_state = menu
+    gameplay = states.Gameplay()
+    common.current_state = states.Transition(menu, gameplay)
+    return lambda: frames(TRANSITION_TICKS)
+
+
+@benchmark("chunky/rebuild", CHUNKY_REBUILDS, created=130, blocks=150)
+def chunky_rebuild_workload():
+    renderer = chunky.ChunkRenderer(chunky.parse_chunky_text(SCOREBOARD_TEXT), settings.LOGICAL_WIDTH - 8)
+
+    def workload():
+        for _ in range(CHUNKY_REBUILDS):
+            common.profiler.begin_frame()
+            renderer.rechunk(chunky.parse_chunky_text(SCOREBOARD_TEXT))
+            common.profiler.end_frame()
+
+    return workload
+
+
+@benchmark("chunky/update", CHUNKY_REBUILDS, created=3, blocks=1)
+def chunky_update_workload():
+    renderer = chunky.ChunkRenderer(chunky.parse_chunky_text(SCOREBOARD_TEXT), settings.LOGICAL_WIDTH - 8)
+
+    def workload():
+        for _ in range(CHUNKY_REBUILDS):
+            common.profiler.begin_frame()
+            renderer.update()
+            common.profiler.end_frame()
+
+    return workload
+
+
+def make_pixelfont() -> pixelfont.PixelFont:
+    # the game doesn't ship a bitmap font, so the glyphs come from the regular one
+    font = pygame.font.Font(chunky.assets.ASSETS_DIR / "silkfont.ttf", settings.FONT_SIZE)
+    return pixelfont.PixelFont({ord(char): font.render(char, False, "white") for char in string.printable})
+
+
+@benchmark("pixelfont/render_cached", PIXELFONT_RENDERS, created=2, blocks=1)
+def pixelfont_cached_workload():
+    font = make_pixelfont()
+    texts = [f"TIME: {idx:02d}" for idx in range(64)]
+
+    def workload():
+        for idx in range(PIXELFONT_RENDERS):
+            common.profiler.begin_frame()
+            font.render(texts[idx % len(texts)])
+            common.profiler.end_frame()
+
+    return workload
+
+
+@benchmark("pixelfont/render_uncached", PIXELFONT_RENDERS, created=24, blocks=4)
+def pixelfont_uncached_workload():
+    font = make_pixelfont()
+    # more distinct strings than the layout cache holds, so every render lays its text out again
+    texts = [f"score {idx} and some more words to wrap" for idx in range(font.layout.cache_info().maxsize * 2)]
+
+    def workload():
+        for idx in range(PIXELFONT_RENDERS):
+            common.profiler.begin_frame()
+            font.render(texts[idx % len(texts)], 60)
+            common.profiler.end_frame()
+
+    return workload
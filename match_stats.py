@@ -0,0 +1,212 @@
+"""Folds telemetry streams (see `square_wars.telemetry`) of any number of matches into per level statistics
+
+    python match_stats.py telemetry.bin more.bin
+    python replays.py simulate --level 2 --count 1000 --telemetry - | python match_stats.py - --npz stats.npz
+
+Every match is added to its level's running totals and then dropped, so memory use doesn't grow with the number of
+matches. What comes out, per level:
+- captures: how often every square gets taken, by either team
+- contested: how often every square gets taken straight from the other team
+- first capture: how long into a match a square gets taken for the first time
+- occupancy: how much of the time players spend on every square
+- powerups: how often each one gets picked up, the KOs it's behind and how many squares a team takes in the
+  `WINDOW_S` seconds after picking one up compared to what it takes in as long on average (above 1 means it helps)
+"""
+
+import argparse
+import os
+import sys
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, "src")
+
+try:
+    import numpy
+except ImportError:
+    raise SystemExit("match_stats.py needs numpy") from None
+
+from square_wars import level, settings, telemetry  # noqa: E402
+
+TEAMS = (settings.TEAM_1, settings.TEAM_2)
+# how long after a pickup the captures get credited to the powerup
+WINDOW_S = 5
+POWERUP_KINDS = 256
+UNCAPTURABLE = (settings.TEAM_ROCK, settings.TEAM_GRAVEL, settings.TEAM_1_SPAWN, settings.TEAM_2_SPAWN)
+
+
+class LevelStats:
+    """Running totals of every match played on one level"""
+
+    def __init__(self, match: telemetry.Match):
+        self.key = match.level_key
+        self.width = match.width
+        self.height = match.height
+        size = match.width * match.height
+        start = numpy.frombuffer(match.start, dtype=numpy.int8)
+        self.capturable = ~numpy.isin(start, UNCAPTURABLE)
+        self.matches = 0
+        self.seconds = 0.0
+        self.wins = numpy.zeros(len(TEAMS), dtype=numpy.int64)
+        self.draws = 0
+        self.kos = numpy.zeros(len(TEAMS), dtype=numpy.int64)
+        self.captures = numpy.zeros((len(TEAMS), size), dtype=numpy.int64)
+        self.contested = numpy.zeros(size, dtype=numpy.int64)
+        self.first_capture_seconds = numpy.zeros(size)
+        self.first_captures = numpy.zeros(size, dtype=numpy.int64)
+        self.occupancy = numpy.zeros((len(TEAMS), size))
+        self.pickups = numpy.zeros(POWERUP_KINDS, dtype=numpy.int64)
+        self.kos_by = numpy.zeros(POWERUP_KINDS, dtype=numpy.int64)
+        self.captures_after = numpy.zeros(POWERUP_KINDS)
+        self.expected_after = numpy.zeros(POWERUP_KINDS)
+
+    def add(self, match: telemetry.Match) -> None:
+        size = self.width * self.height
+        teams = numpy.array(match.teams, dtype=numpy.int8)
+        dts = numpy.frombuffer(match.dts, dtype=numpy.float32).astype(float)
+        if not len(dts):
+            return
+        # the time at the end of every tick, records are counted as happening then
+        times = numpy.cumsum(dts)
+        duration = times[-1]
+        self.matches += 1
+        self.seconds += duration
+        if match.winner in TEAMS:
+            self.wins[TEAMS.index(match.winner)] += 1
+        else:
+            self.draws += 1
+
+        cells = numpy.frombuffer(match.cells, dtype=numpy.uint16).reshape(len(dts), len(teams))
+        for slot, team in enumerate(TEAMS):
+            team_cells = cells[:, teams == team]
+            weights = numpy.repeat(dts, team_cells.shape[1])
+            self.occupancy[slot] += numpy.bincount(team_cells.ravel(), weights=weights, minlength=size)
+
+        capture_times = times[numpy.minimum(numpy.frombuffer(match.capture_ticks, dtype=numpy.uint32), len(dts) - 1)]
+        capture_cells = numpy.frombuffer(match.capture_cells, dtype=numpy.uint16)
+        capture_teams = numpy.frombuffer(match.capture_teams, dtype=numpy.int8)
+        # who had every square before it changed hands: whoever took it last, or whoever it started out with
+        order = numpy.argsort(capture_cells, kind="stable")
+        cells_in_order = capture_cells[order]
+        teams_in_order = capture_teams[order]
+        before = numpy.empty_like(teams_in_order)
+        before[1:] = teams_in_order[:-1]
+        first_of_cell = numpy.ones(len(order), dtype=bool)
+        first_of_cell[1:] = cells_in_order[1:] != cells_in_order[:-1]
+        before[first_of_cell] = numpy.frombuffer(match.start, dtype=numpy.int8)[cells_in_order[first_of_cell]]
+        taken = numpy.isin(teams_in_order, TEAMS)
+        flipped = taken & numpy.isin(before, TEAMS) & (before != teams_in_order)
+        self.contested += numpy.bincount(cells_in_order[flipped], minlength=size)
+        for slot, team in enumerate(TEAMS):
+            self.captures[slot] += numpy.bincount(capture_cells[capture_teams == team], minlength=size)
+        # captures are in the order they happened, so the first index of every square is its first capture
+        taken_cells, first = numpy.unique(capture_cells[numpy.isin(capture_teams, TEAMS)], return_index=True)
+        self.first_capture_seconds[taken_cells] += capture_times[numpy.isin(capture_teams, TEAMS)][first]
+        self.first_captures[taken_cells] += 1
+
+        ko_players = numpy.frombuffer(match.ko_players, dtype=numpy.uint8)
+        for slot, team in enumerate(TEAMS):
+            self.kos[slot] += numpy.count_nonzero(teams[ko_players] == team)
+        self.kos_by += numpy.bincount(numpy.frombuffer(match.ko_causes, dtype=numpy.uint8), minlength=POWERUP_KINDS)
+
+        powerups = numpy.frombuffer(match.pickup_powerups, dtype=numpy.uint8)
+        pickup_times = times[numpy.minimum(numpy.frombuffer(match.pickup_ticks, dtype=numpy.uint32), len(dts) - 1)]
+        pickup_teams = teams[numpy.frombuffer(match.pickup_players, dtype=numpy.uint8)]
+        self.pickups += numpy.bincount(powerups, minlength=POWERUP_KINDS)
+        for team in TEAMS:
+            picked = pickup_teams == team
+            team_captures = capture_times[capture_teams == team]
+            after = numpy.searchsorted(team_captures, pickup_times[picked] + WINDOW_S, side="right")
+            after -= numpy.searchsorted(team_captures, pickup_times[picked], side="left")
+            numpy.add.at(self.captures_after, powerups[picked], after)
+            # what the team would have taken in that time anyway, going by the whole match
+            window = numpy.minimum(WINDOW_S, duration - pickup_times[picked])
+            numpy.add.at(self.expected_after, powerups[picked], window * len(team_captures) / duration)
+
+    def grid(self, values: numpy.ndarray, fmt: str) -> str:
+        rows = []
+        for y in range(self.height):
+            row = []
+            for x in range(self.width):
+                cell = y * self.width + x
+                value = values[cell]
+                row.append("    #" if not self.capturable[cell] else "    -" if numpy.isnan(value) else fmt % value)
+            rows.append("".join(row))
+        return "\n".join(rows)
+
+    def report(self, name: str) -> str:
+        matches = max(self.matches, 1)
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            first_capture = self.first_capture_seconds / self.first_captures
+            occupancy = self.occupancy.sum(axis=0) / self.seconds * 100
+            lift = self.captures_after / self.expected_after
+        lines = [
+            f"{name} ({self.key}): {self.matches} matches, {self.seconds / matches:.1f}s of play each",
+            f"wins: team 1 {self.wins[0] / matches:.0%}, team 2 {self.wins[1] / matches:.0%}, "
+            f"draws {self.draws / matches:.0%}, "
+            f"KOs per match: team 1 {self.kos[0] / matches:.1f}, team 2 {self.kos[1] / matches:.1f}",
+            "",
+            "captures per match",
+            self.grid(self.captures.sum(axis=0) / matches, "%5.1f"),
+            "taken from the other team per match",
+            self.grid(self.contested / matches, "%5.1f"),
+            "seconds to the first capture",
+            self.grid(first_capture, "%5.1f"),
+            "% of the time a player is on it",
+            self.grid(occupancy, "%5.1f"),
+            "",
+            "powerup     pickups/match  KOs/pickup  capture lift",
+        ]
+        names = {powerup: name for name, powerup in level.POWERUP_NAMES.items()}
+        for powerup in numpy.flatnonzero(self.pickups):
+            lines.append(
+                f"{names.get(powerup, powerup):<12}{self.pickups[powerup] / matches:>13.2f}"
+                f"{self.kos_by[powerup] / self.pickups[powerup]:>12.2f}{lift[powerup]:>14.2f}"
+            )
+        return "\n".join(lines)
+
+    def arrays(self) -> dict[str, numpy.ndarray]:
+        shape = (self.height, self.width)
+        return {
+            f"{self.key}/matches": numpy.array(self.matches),
+            f"{self.key}/seconds": numpy.array(self.seconds),
+            f"{self.key}/wins": self.wins,
+            f"{self.key}/draws": numpy.array(self.draws),
+            f"{self.key}/captures": self.captures.reshape(len(TEAMS), *shape),
+            f"{self.key}/contested": self.contested.reshape(shape),
+            f"{self.key}/first_capture_seconds": self.first_capture_seconds.reshape(shape),
+            f"{self.key}/first_captures": self.first_captures.reshape(shape),
+            f"{self.key}/occupancy": self.occupancy.reshape(len(TEAMS), *shape),
+            f"{self.key}/pickups": self.pickups,
+            f"{self.key}/kos_by": self.kos_by,
+            f"{self.key}/captures_after": self.captures_after,
+            f"{self.key}/expected_after": self.expected_after,
+        }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python match_stats.py", description="SquareWars match statistics")
+    parser.add_argument("streams", nargs="+", help='telemetry files, "-" for stdin')
+    parser.add_argument("--npz", help="also save every level's totals as arrays to this file")
+    args = parser.parse_args(argv)
+
+    stats: dict[str, LevelStats] = {}
+    for path in args.streams:
+        stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+        with stream:
+            for match in telemetry.read_matches(stream):
+                if match.level_key not in stats:
+                    stats[match.level_key] = LevelStats(match)
+                stats[match.level_key].add(match)
+    if not stats:
+        print("no matches")
+        return 1
+
+    names = {telemetry.level_key(played): f"level {index}" for index, played in enumerate(level.get_levels())}
+    print("\n\n".join(level_stats.report(names.get(key, "unknown level")) for key, level_stats in stats.items()))
+    if args.npz:
+        numpy.savez_compressed(args.npz, **{name: array for s in stats.values() for name, array in s.arrays().items()})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
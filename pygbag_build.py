@@ -1,7 +1,85 @@
+import json
+import math
 import os
 import shutil
+import subprocess
+import sys
+from pathlib import Path
 
-os.system("python -m pygbag --archive src/main.py")
+# the assets module is only needed for its tables of which images go where, no window required
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, "src")
 
-shutil.move("src/build/web.zip", "web.zip")
-shutil.rmtree("src/build")
+import pygame  # noqa: E402
+
+from square_wars import assets  # noqa: E402
+
+# the web build gets made from a copy of src/ with its assets reworked for the browser
+STAGING = Path("build/web_src")
+RES = STAGING / "res"
+# art sources (and whatever else the game never loads) only make the download bigger
+LEFT_OUT = shutil.ignore_patterns("__pycache__", "*.pyc", "*.ase", "concept", "build")
+
+
+def folder_size(path: Path) -> int:
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def convert_audio() -> None:
+    """Every WAV becomes a (much smaller) OGG, which is what `assets` loads on the web"""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise SystemExit("ffmpeg is needed to convert the audio to OGG")
+    for path in sorted([*RES.glob("sfx/*.wav"), *RES.glob("ost/*.wav")]):
+        subprocess.run(
+            [ffmpeg, "-loglevel", "error", "-y", "-i", path, "-c:a", "libvorbis", "-q:a", "3", path.with_suffix(".ogg")],
+            check=True,
+        )
+        path.unlink()
+
+
+def pack(surfaces: dict[str, pygame.Surface]) -> tuple[pygame.Surface, dict[str, list[int]]]:
+    """Packs the surfaces into rows (tallest first) of a sheet about as wide as it is tall"""
+    area = sum(surface.get_width() * surface.get_height() for surface in surfaces.values())
+    width = max(max(surface.get_width() for surface in surfaces.values()), 2 ** math.ceil(math.log2(math.sqrt(area))))
+    rects = {}
+    x = y = row_height = 0
+    for name, surface in sorted(surfaces.items(), key=lambda item: (-item[1].get_height(), item[0])):
+        if x + surface.get_width() > width:
+            x = 0
+            y += row_height
+            row_height = 0
+        rects[name] = [x, y, surface.get_width(), surface.get_height()]
+        x += surface.get_width()
+        row_height = max(row_height, surface.get_height())
+    sheet = pygame.Surface((width, y + row_height), pygame.SRCALPHA)
+    for name, (x, y, _, _) in rects.items():
+        # the sheet starts out fully transparent, so this copies the pixels as they are instead of blending them
+        sheet.blit(surfaces[name], (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+    return sheet, rects
+
+
+def pack_images() -> None:
+    """One atlas page per group of `assets.ATLAS_PAGES`, so the menu's page can be loaded before the gameplay one"""
+    images_dir = RES / "images"
+    index = {}
+    for page, names in assets.ATLAS_PAGES.items():
+        surfaces = {name: pygame.image.load(images_dir / f"{assets.IMAGES[name]}.png") for name in names}
+        sheet, index[page] = pack(surfaces)
+        pygame.image.save(sheet, images_dir / f"{page}.png")
+    for name in assets.IMAGES:
+        (images_dir / f"{assets.IMAGES[name]}.png").unlink(missing_ok=True)
+    (images_dir / f"{assets.ATLAS_INDEX}.json").write_text(json.dumps(index))
+
+
+shutil.rmtree(STAGING, ignore_errors=True)
+shutil.copytree("src", STAGING, ignore=LEFT_OUT)
+size_before = folder_size(Path("src/res"))
+convert_audio()
+pack_images()
+print(f"assets: {size_before / 1024:.0f} KiB -> {folder_size(RES) / 1024:.0f} KiB")
+
+subprocess.run([sys.executable, "-m", "pygbag", "--archive", STAGING / "main.py"], check=True)
+
+shutil.move(STAGING / "build" / "web.zip", "web.zip")
+shutil.rmtree("build")
@@ -0,0 +1,211 @@
+"""Records headless matches and renders recordings (see `square_wars.replay`) to PNG frames
+
+    python replays.py record match.json --level 2 --team-1-ai dumb
+    python replays.py render match.json frames/ --scale 4
+    python replays.py simulate --level 2 --count 1000 --telemetry - | python match_stats.py -
+
+The frames are split into one segment per process, every process plays the recording from the start without drawing
+until it gets to its segment, so a long match renders in about the time it takes to simulate it plus its share of the
+drawing. `ffmpeg -framerate 60 -i frames/%06d.png clip.mp4` turns them into a clip
+"""
+
+import argparse
+import bisect
+import multiprocessing
+import os
+import struct
+import sys
+import time
+import zlib
+from pathlib import Path
+
+# no window or sound card needed for any of this
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+# stdout can be a telemetry stream, which pygame's greeting would end up in
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, "src")
+
+import pygame  # noqa: E402
+
+from square_wars import assets, common, level, replay, settings, states, telemetry  # noqa: E402
+
+# give up on a recorded match that somehow never ends, in ticks
+MAX_TICKS = 60 * 60 * 10
+# zlib level of the frames, encoding them is most of the work and the frames compress well even at the fastest level
+PNG_COMPRESSION = 1
+
+
+def init_pygame() -> None:
+    pygame.init()
+    common.screen = pygame.display.set_mode(settings.LOGICAL_SIZE)
+    assets.load_assets()
+    common.dt = 1 / settings.FPS
+    common.events = []
+    # `Gameplay.reset` looks at it before taking over
+    common.current_state = None
+
+
+def record(
+    level_index: int, seed: int | None, ai: str, team_1_ai: str, fps: float, writer: telemetry.Writer | None = None
+) -> replay.Recording:
+    """Plays a level AI against AI at a fixed `fps` and returns its recording"""
+    recorder = replay.Recorder(seed=seed)
+    gameplay = states.Gameplay(
+        (level.get_levels()[level_index],), ai=ai, team_1_ai=team_1_ai, recorder=recorder, telemetry=writer
+    )
+    common.current_state = gameplay
+    # the scoreboard before the countdown waits for a key press
+    press = [pygame.Event(pygame.KEYDOWN, key=pygame.K_SPACE), pygame.Event(pygame.KEYUP, key=pygame.K_SPACE)]
+    for _ in range(MAX_TICKS):
+        if recorder.finished is not None:
+            return recorder.finished
+        common.dt = 1 / fps
+        common.bus.publish(press if gameplay.state == gameplay.STATE_START else [])
+        gameplay.update()
+    raise SystemExit(f"the match didn't end within {MAX_TICKS} ticks")
+
+
+def frame_ticks(recording: replay.Recording, fps: float) -> list[int]:
+    """For every frame of a clip at `fps`, the tick after which it gets drawn
+
+    Recordings of actual play have uneven ticks, so a tick can end up drawn more than once or not at all
+    """
+    times = []
+    elapsed = 0
+    for dt, _ in recording.ticks:
+        elapsed += dt
+        times.append(elapsed)
+    count = int(elapsed * fps + 1e-6)
+    # a little slack for the float error piling up in `elapsed`
+    return [bisect.bisect_left(times, (frame + 1) / fps - 1e-6) for frame in range(count)]
+
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png(surface: pygame.Surface, scale: int) -> bytes:
+    """`surface` upscaled `scale` times as a PNG, made straight from the small image
+
+    Every row of it turns into `scale` rows of the upscaled image, all but the first are stored with the "up" filter
+    (the difference to the row above), which makes them zeros that cost next to nothing to compress
+    """
+    width, height = surface.get_width() * scale, surface.get_height()
+    pixels = pygame.image.tobytes(pygame.transform.scale(surface, (width, height)), "RGB")
+    stride = width * 3
+    repeat = b"\2" + bytes(stride)
+    rows = []
+    for y in range(height):
+        rows.append(b"\0" + pixels[y * stride : (y + 1) * stride])
+        rows.extend([repeat] * (scale - 1))
+    return b"".join(
+        (
+            b"\x89PNG\r\n\x1a\n",
+            png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height * scale, 8, 2, 0, 0, 0)),
+            png_chunk(b"IDAT", zlib.compress(b"".join(rows), PNG_COMPRESSION)),
+            png_chunk(b"IEND", b""),
+        )
+    )
+
+
+def render_segment(args: tuple[str, int, list[int], str, int]) -> int:
+    """Draws the frames `first` onwards, `ticks` being the tick to draw each one after, returns how many got drawn"""
+    path, first, ticks, out_dir, scale = args
+    recording = replay.load(path)
+    playback = replay.Playback(recording)
+    gameplay = states.Gameplay((recording.level,), recording.ai, recording.team_1_ai, recorder=playback)
+    common.current_state = gameplay
+    frame = first
+    for tick in range(ticks[-1] + 1):
+        # fast forward, nothing gets drawn until the segment starts
+        gameplay.update()
+        if tick != ticks[frame - first]:
+            continue
+        common.screen.fill("black")
+        gameplay.draw()
+        png = encode_png(common.screen, scale)
+        while frame - first < len(ticks) and ticks[frame - first] == tick:
+            (Path(out_dir) / f"{frame:06d}.png").write_bytes(png)
+            frame += 1
+        if frame - first == len(ticks):
+            break
+    return frame - first
+
+
+def render(path: str, out_dir: str, scale: int, fps: float, processes: int) -> None:
+    recording = replay.load(path)
+    ticks = frame_ticks(recording, fps)
+    if not ticks:
+        raise SystemExit(f"{path} has nothing to render")
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    size = -(-len(ticks) // processes)
+    segments = [(path, first, ticks[first : first + size], out_dir, scale) for first in range(0, len(ticks), size)]
+    start = time.perf_counter()
+    # spawned rather than forked, SDL doesn't survive a fork
+    pool = multiprocessing.get_context("spawn").Pool(len(segments), initializer=init_pygame)
+    try:
+        drawn = sum(pool.imap_unordered(render_segment, segments))
+    finally:
+        # pygame's signal handlers hang on the SIGTERM `terminate` would send, the processes have to quit by themselves
+        pool.close()
+        pool.join()
+    print(
+        f"{drawn} frames ({recording.duration:.1f}s of play) in {time.perf_counter() - start:.1f}s "
+        f"with {len(segments)} process(es)"
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python replays.py", description="SquareWars match recordings")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="play a level AI against AI and save the recording")
+    record_parser.add_argument("output")
+    record_parser.add_argument("--level", type=int, default=0, help="index into the levels (or the level pack)")
+    record_parser.add_argument("--seed", type=int)
+    record_parser.add_argument("--ai", default=settings.AI_CONTROLLER, help="the AI of team 2")
+    record_parser.add_argument("--team-1-ai", default="dumb", help="the AI of team 1")
+    record_parser.add_argument("--fps", type=float, default=settings.FPS)
+
+    simulate_parser = commands.add_parser(
+        "simulate", help="play a level AI against AI many times over and stream the telemetry of every match"
+    )
+    simulate_parser.add_argument("--telemetry", required=True, help='file the matches get appended to, "-" for stdout')
+    simulate_parser.add_argument("--level", type=int, default=0, help="index into the levels (or the level pack)")
+    simulate_parser.add_argument("--count", type=int, default=100)
+    simulate_parser.add_argument("--seed", type=int, default=0, help="seed of the first match, the rest count up")
+    simulate_parser.add_argument("--ai", default=settings.AI_CONTROLLER, help="the AI of team 2")
+    simulate_parser.add_argument("--team-1-ai", default="dumb", help="the AI of team 1")
+    simulate_parser.add_argument("--fps", type=float, default=settings.FPS)
+
+    render_parser = commands.add_parser("render", help="render a recording to numbered PNG frames")
+    render_parser.add_argument("recording")
+    render_parser.add_argument("output_dir")
+    render_parser.add_argument("--scale", type=int, default=1, help="integer upscale of the 64x64 frames")
+    render_parser.add_argument("--fps", type=float, default=settings.FPS)
+    render_parser.add_argument("-p", "--processes", type=int, default=os.cpu_count() or 1)
+
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        init_pygame()
+        recording = record(args.level, args.seed, args.ai, args.team_1_ai, args.fps)
+        replay.save(recording, args.output)
+        print(f"{len(recording.ticks)} ticks ({recording.duration:.1f}s) saved to {args.output}")
+    elif args.command == "simulate":
+        init_pygame()
+        writer = telemetry.Writer(args.telemetry)
+        start = time.perf_counter()
+        for seed in range(args.seed, args.seed + args.count):
+            record(args.level, seed, args.ai, args.team_1_ai, args.fps, writer)
+        # stdout might be the telemetry
+        print(f"{args.count} matches in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    else:
+        if args.scale < 1:
+            parser.error("--scale has to be at least 1")
+        render(args.recording, args.output_dir, args.scale, args.fps, max(args.processes, 1))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
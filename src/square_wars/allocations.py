@@ -0,0 +1,216 @@
+import collections
+import statistics
+import sys
+import tracemalloc
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+PACKAGE_PREFIX = str(PACKAGE_DIR)
+# allocations made by the profilers themselves don't belong to any frame
+IGNORED_FILES = {str(PACKAGE_DIR / "allocations.py"), str(PACKAGE_DIR / "profiler.py")}
+
+# how many frames of history tracemalloc keeps per allocation, the call site is searched for in these
+TRACEBACK_DEPTH = 10
+HISTORY = 600
+# call sites that aren't the game's own code
+OUTSIDE = object()
+
+# `sites` maps (filename, line) to the (created, blocks, bytes) of it, `created` counts every object made during the
+# frame as it happens (temporaries included), `blocks`/`size` only what is still alive at the end of it
+FrameAllocations = collections.namedtuple("FrameAllocations", ("created", "blocks", "size", "peak", "sites"))
+
+
+class AllocationBudgetError(AssertionError):
+    pass
+
+
+def subsystem_of(filename: str) -> str:
+    """`square_wars/states/gameplay.py` -> `states.gameplay`"""
+    return ".".join(Path(filename).relative_to(PACKAGE_DIR).with_suffix("").parts)
+
+
+def line_of(code, offset: int) -> int | None:
+    for start, end, line in code.co_lines():
+        if start <= offset < end:
+            return line
+    return None
+
+
+class AllocationTracker:
+    """Attributes every frame's allocations to the lines of the game that made them
+
+    Two things get counted. Every object the game creates (a call to a class, `pygame.Vector2(...)`, `Rect(...)`, a
+    sprite...) is counted right as it happens through `sys.monitoring`, so temporaries that are gone again by the end
+    of the frame count just as much as anything kept. On top of that tracemalloc's traces get cleared at the start of
+    each frame, so the snapshot taken at its end holds what was allocated during the frame and is still alive. Objects
+    library code (pygame.sprite...) makes count towards the line of the game that called into it. Objects made by
+    operators (`vector * dt`) or by C code aren't calls to a class, so only the second count sees them if they
+    survive, and pixel data lives in SDL's memory, which tracemalloc can't see
+    """
+
+    def __init__(self, history: int = HISTORY):
+        self.frames: collections.deque[FrameAllocations] = collections.deque(maxlen=history)
+        self._started_tracing = False
+        self._site_cache: dict[tracemalloc.Traceback, tuple[str, int] | None] = {}
+        # objects created so far this frame, per call site
+        self._created: collections.Counter[tuple[str, int]] = collections.Counter()
+        self._call_sites: dict[tuple[object, int], object] = {}
+        self._tool_id: int | None = None
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEBACK_DEPTH)
+            self._started_tracing = True
+        if self._tool_id is None:
+            monitoring = sys.monitoring
+            tool_id = monitoring.PROFILER_ID
+            if monitoring.get_tool(tool_id) is not None:
+                raise RuntimeError(f"sys.monitoring tool {tool_id} is already taken by {monitoring.get_tool(tool_id)}")
+            monitoring.use_tool_id(tool_id, "square_wars allocations")
+            monitoring.register_callback(tool_id, monitoring.events.CALL, self.on_call)
+            monitoring.set_events(tool_id, monitoring.events.CALL)
+            # call sites turned off by an earlier tracker get looked at again
+            monitoring.restart_events()
+            self._tool_id = tool_id
+
+    def stop(self) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        if self._tool_id is not None:
+            sys.monitoring.set_events(self._tool_id, sys.monitoring.events.NO_EVENTS)
+            sys.monitoring.register_callback(self._tool_id, sys.monitoring.events.CALL, None)
+            sys.monitoring.free_tool_id(self._tool_id)
+            self._tool_id = None
+
+    def reset(self) -> None:
+        self.frames.clear()
+
+    def on_call(self, code, offset: int, function, _arg0):
+        key = (code, offset)
+        if key not in self._call_sites:
+            self._call_sites[key] = self.code_site(code, offset)
+        site = self._call_sites[key]
+        # a call site either makes objects or it doesn't, so the rest get turned off and stop costing anything
+        if site is None or not isinstance(function, type):
+            return sys.monitoring.DISABLE
+        if site is OUTSIDE:
+            # library code making objects for the game, which is whatever line of it is further up the stack
+            site = self.stack_site(sys._getframe(1))
+            if site is None:
+                return None
+        self._created[site] += 1
+        return None
+
+    @staticmethod
+    def code_site(code, offset: int):
+        """Where calls made from `code` get counted: the line itself, OUTSIDE the game or (the profilers) nowhere"""
+        if code.co_filename in IGNORED_FILES:
+            return None
+        if code.co_filename.startswith(PACKAGE_PREFIX):
+            return (code.co_filename, line_of(code, offset))
+        return OUTSIDE
+
+    @staticmethod
+    def stack_site(frame) -> tuple[str, int] | None:
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if filename.startswith(PACKAGE_PREFIX) and filename not in IGNORED_FILES:
+                return (filename, frame.f_lineno)
+            frame = frame.f_back
+        return None
+
+    def begin_frame(self) -> None:
+        tracemalloc.clear_traces()
+        self._created.clear()
+
+    def end_frame(self) -> FrameAllocations:
+        created = self._created.copy()
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        sites: dict[tuple[str, int], list[int]] = {site: [count, 0, 0] for site, count in created.items()}
+        blocks = size = 0
+        # grouped by whole traceback first, so each distinct one only gets walked once
+        for stat in snapshot.statistics("traceback"):
+            site = self.call_site(stat.traceback)
+            if site is None:
+                continue
+            counts = sites.setdefault(site, [0, 0, 0])
+            counts[1] += stat.count
+            counts[2] += stat.size
+            blocks += stat.count
+            size += stat.size
+        record = FrameAllocations(
+            created.total(), blocks, size, peak, {site: tuple(counts) for site, counts in sites.items()}
+        )
+        self.frames.append(record)
+        return record
+
+    def call_site(self, traceback: tracemalloc.Traceback) -> tuple[str, int] | None:
+        """The innermost line of the game in the traceback, or None when the game wasn't involved at all"""
+        if traceback not in self._site_cache:
+            site = None
+            # the most recent frame is the last one, the profilers only count when they're the ones allocating
+            if traceback[-1].filename not in IGNORED_FILES:
+                for frame in reversed(traceback):
+                    if frame.filename.startswith(PACKAGE_PREFIX) and frame.filename not in IGNORED_FILES:
+                        site = (frame.filename, frame.lineno)
+                        break
+            self._site_cache[traceback] = site
+        return self._site_cache[traceback]
+
+    def mean(self) -> FrameAllocations:
+        """Per frame averages over the recorded frames"""
+        count = max(len(self.frames), 1)
+        sites = collections.defaultdict(lambda: [0, 0, 0])
+        for record in self.frames:
+            for site, counts in record.sites.items():
+                for index, value in enumerate(counts):
+                    sites[site][index] += value
+        return FrameAllocations(
+            statistics.fmean(record.created for record in self.frames) if self.frames else 0,
+            statistics.fmean(record.blocks for record in self.frames) if self.frames else 0,
+            statistics.fmean(record.size for record in self.frames) if self.frames else 0,
+            max((record.peak for record in self.frames), default=0),
+            {site: tuple(value / count for value in counts) for site, counts in sites.items()},
+        )
+
+    def top_sites(self, count: int = 10, key: str = "created") -> list[tuple[str, float, float, float]]:
+        """The `count` lines allocating the most per frame, as (`file:line`, created, blocks, bytes)"""
+        index = ("created", "blocks", "size").index(key)
+        ranked = sorted(self.mean().sites.items(), key=lambda item: item[1][index], reverse=True)[:count]
+        return [(f"{subsystem_of(filename)}:{lineno}", *counts) for (filename, lineno), counts in ranked]
+
+    def by_subsystem(self) -> dict[str, tuple[float, float, float]]:
+        """Per frame (created, blocks, bytes) summed over every module of the game"""
+        totals = collections.defaultdict(lambda: [0, 0, 0])
+        for (filename, _), counts in self.mean().sites.items():
+            for index, value in enumerate(counts):
+                totals[subsystem_of(filename)][index] += value
+        return {name: tuple(counts) for name, counts in sorted(totals.items())}
+
+    def assert_budget(self, created=None, blocks=None, size=None, peak=None, subsystem: str | None = None) -> None:
+        """Raises `AllocationBudgetError` when the recorded frames allocated more per frame (on average) than allowed
+
+        `created` limits how many objects get made per frame, short lived ones included, `blocks` and `size` what gets
+        allocated and survives the frame, `peak` the highest traced memory use within a single frame, `subsystem`
+        narrows the created/blocks/size checks down to one module (`states.gameplay`)
+        """
+        mean = self.mean()
+        if subsystem is None:
+            actual_created, actual_blocks, actual_size = mean.created, mean.blocks, mean.size
+        else:
+            actual_created, actual_blocks, actual_size = self.by_subsystem().get(subsystem, (0, 0, 0))
+        failures = []
+        if created is not None and actual_created > created:
+            failures.append(f"{actual_created:.1f} objects created per frame (budget {created})")
+        if blocks is not None and actual_blocks > blocks:
+            failures.append(f"{actual_blocks:.1f} blocks per frame (budget {blocks})")
+        if size is not None and actual_size > size:
+            failures.append(f"{actual_size:.0f} bytes per frame (budget {size})")
+        if peak is not None and mean.peak > peak:
+            failures.append(f"peak of {mean.peak} bytes in a frame (budget {peak})")
+        if failures:
+            where = f" in {subsystem}" if subsystem is not None else ""
+            sites = ", ".join(f"{site} ({created:.1f})" for site, created, _, _ in self.top_sites(5))
+            raise AllocationBudgetError(f"over the allocation budget{where}: {'; '.join(failures)}, top sites: {sites}")
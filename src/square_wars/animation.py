@@ -1,61 +1,79 @@
+import functools
+
+import pygame
+
 from . import common, utils
 
+# distinct (frames, flip) combinations kept baked, far more than the game ever has at once
+FRAME_TABLES = 64
 
-class Animation:
-    def __init__(self, frames, speed=0.2, flip_x=False, flip_y=False):
-        self.frames = list(frames)
-        self.time = 0
-        self.speed = speed
-        self.flip_x = flip_x
-        self.flip_y = flip_y
 
-    def update(self):
-        self.time += common.dt
+@functools.lru_cache(maxsize=FRAME_TABLES)
+def frame_table(frames: tuple[pygame.Surface, ...], flip_x=False, flip_y=False) -> tuple[pygame.Surface, ...]:
+    """`frames` flipped once up front, shared by every animation made from the same frames"""
+    return tuple(utils.flip_surface(frame, flip_x, flip_y) for frame in frames)
 
-    def restart(self):
-        self.time = 0
 
-    @property
-    def image(self):
-        image = self.frames[round(self.time / self.speed) % len(self.frames)]
-        return utils.flip_surface(image, self.flip_x, self.flip_y)
+@functools.lru_cache(maxsize=FRAME_TABLES)
+def fade_table(surface: pygame.Surface, steps: int) -> tuple[pygame.Surface, ...]:
+    """`surface` at `steps` evenly spaced alphas, from fully transparent to opaque"""
+    faded = []
+    for step in range(steps):
+        frame = surface.copy()
+        frame.set_alpha(round(step * 255 / (steps - 1)))
+        faded.append(frame)
+    return tuple(faded)
 
 
-class NoLoopAnimation:
-    def __init__(self, frames, speed=0.2, flip_x=False, flip_y=False):
-        self.frames = list(frames)
-        self.time = 0
+class Animation:
+    """Loops through `frames`, the frame gets picked in `update` so looking at `image` costs nothing
+
+    With a `clock` (anything with a `time` that moves on by itself, like a state's `TimerWheel`) every animation
+    on it reads the same time instead of adding up dts of its own
+    """
+
+    def __init__(self, frames, speed=0.2, flip_x=False, flip_y=False, clock=None):
+        self.frames = frame_table(tuple(frames), flip_x, flip_y)
         self.speed = speed
-        self.flip_x = flip_x
-        self.flip_y = flip_y
+        self.clock = clock
+        self.start = 0 if clock is None else clock.time
+        self.time = 0
+        self.index = 0
 
     def update(self):
-        self.time += common.dt
+        if self.clock is None:
+            self.time += common.dt
+        else:
+            self.time = self.clock.time - self.start
+        self.index = self.frame_index()
 
     def restart(self):
+        self.start = 0 if self.clock is None else self.clock.time
         self.time = 0
+        self.index = 0
 
-    def done(self):
-        return min(round(self.time / self.speed), len(self.frames) - 1) == len(self.frames) - 1
+    def frame_index(self):
+        return round(self.time / self.speed) % len(self.frames)
 
     @property
     def image(self):
-        frame_index = min(round(self.time / self.speed), len(self.frames) - 1)
-        return utils.flip_surface(self.frames[frame_index], self.flip_x, self.flip_y)
+        return self.frames[self.index]
+
+
+class NoLoopAnimation(Animation):
+    def frame_index(self):
+        return min(round(self.time / self.speed), len(self.frames) - 1)
+
+    def done(self):
+        return self.index == len(self.frames) - 1
 
 
 class SingleAnimation:
     def __init__(self, surface, flip_x=False, flip_y=False):
-        self.surface = surface
-        self.flip_x = flip_x
-        self.flip_y = flip_y
+        self.image = frame_table((surface,), flip_x, flip_y)[0]
 
     def update(self):
         pass
 
     def restart(self):
         pass
-
-    @property
-    def image(self):
-        return utils.flip_surface(self.surface, self.flip_x, self.flip_y)
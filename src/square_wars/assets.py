@@ -1,3 +1,5 @@
+import functools
+import json
 from pathlib import Path
 
 import pygame
@@ -15,6 +17,8 @@ else:
 images: dict[str, pygame.Surface] = {}
 sfx: dict[str, pygame.mixer.Sound] = {}
 fonts: dict[str, pygame.font.Font] = {}
+# set once the volume gets changed, sounds loaded after that start out at it as well
+sound_volume: float | None = None
 
 
 def image_path(path, extension="png"):
@@ -42,6 +46,9 @@ def load_font(path, extension="ttf"):
 
 
 def set_sound_volume(value):
+    global sound_volume
+
+    sound_volume = value
     for sound in sfx.values():
         sound.set_volume(value)
 
@@ -52,51 +59,120 @@ def stop_all_sounds():
         sound.stop()
 
 
+# asset name -> file name (without the extension) of every image
+IMAGES = {
+    "Mr1": "Mr1",
+    "Mr1Back": "Mr1Back",
+    "Mr2": "Mr2",
+    "Mr2Back": "Mr2Back",
+    "tileset": "tileset",
+    "speedup": "speedup",
+    "menu_bg": "main_menu_bg",
+    "selector_arrow": "selector_arrow",
+    "play_button": "play_button",
+    "settings_button": "settings_button",
+    "menu_title": "menu_title",
+    "gun": "gun",
+    "ghost": "ghost",
+    "gascan": "gascan",
+    "explosion": "explosion",
+    "barbwire": "barbwire",
+    "ko": "ko",
+    "guiWoodBG": "guiWoodBG",
+    "clouds": "clouds",
+    "fov": "fov",
+    "countdown": "countdown",
+    "fullscreen_button": "fullscreen_button",
+    "back_button": "back_button",
+}
+SOUNDS = ("barbwire", "grass", "gunshot", "pickup", "select", "switch", "whack", "explosion", "speedup")
+FONTS = {"silkscreen": "silkfont", "silkscreen-bold": "silkfont-bold"}
+
+# what the menus need gets loaded before they show up, the rest streams in while they're on screen
+MENU_IMAGES = (
+    "menu_bg",
+    "selector_arrow",
+    "play_button",
+    "settings_button",
+    "menu_title",
+    "clouds",
+    "fullscreen_button",
+    "back_button",
+)
+MENU_SOUNDS = ("select", "switch")
+GAMEPLAY_IMAGES = tuple(name for name in IMAGES if name not in MENU_IMAGES)
+GAMEPLAY_SOUNDS = tuple(name for name in SOUNDS if name not in MENU_SOUNDS)
+
+# the web build packs the images into one atlas per group, this says where every image is on which page
+ATLAS_INDEX = "atlas"
+ATLAS_PAGES = {"atlas_menu": MENU_IMAGES, "atlas_gameplay": GAMEPLAY_IMAGES}
+
+# the gameplay assets that haven't been loaded yet, see `load_async`
+_pending = iter(())
+
+
+@functools.cache
+def get_atlas_index() -> dict[str, dict[str, list[int]]] | None:
+    path = image_path(ATLAS_INDEX, "json")
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def load_images(names) -> None:
+    """Loads the given images, cut out of the atlas pages when there are any"""
+    index = get_atlas_index()
+    if index is None:
+        images.update({name: load_image(IMAGES[name]) for name in names})
+        return
+    for page, rects in index.items():
+        wanted = [name for name in names if name in rects]
+        if wanted:
+            sheet = load_image(page)
+            images.update({name: sheet.subsurface(rects[name]) for name in wanted})
+
+
+def loading_steps(image_names, sound_names, font_names=()):
+    """Loads the assets one file at a time, yielding after each one"""
+    index = get_atlas_index()
+    if index is None:
+        for name in image_names:
+            load_images((name,))
+            yield
+    else:
+        for rects in index.values():
+            if any(name in rects for name in image_names):
+                load_images([name for name in image_names if name in rects])
+                yield
+    for name in sound_names:
+        sfx[name] = load_sound(name)
+        if sound_volume is not None:
+            sfx[name].set_volume(sound_volume)
+        yield
+    for name in font_names:
+        fonts[name] = load_font(FONTS[name])
+        yield
+
+
 def load_assets():
-    images.update(
-        {
-            "Mr1": load_image("Mr1"),
-            "Mr1Back": load_image("Mr1Back"),
-            "Mr2": load_image("Mr2"),
-            "Mr2Back": load_image("Mr2Back"),
-            "tileset": load_image("tileset"),
-            "speedup": load_image("speedup"),
-            "menu_bg": load_image("main_menu_bg"),
-            "selector_arrow": load_image("selector_arrow"),
-            "play_button": load_image("play_button"),
-            "settings_button": load_image("settings_button"),
-            "menu_title": load_image("menu_title"),
-            "gun": load_image("gun"),
-            "ghost": load_image("ghost"),
-            "gascan": load_image("gascan"),
-            "explosion": load_image("explosion"),
-            "barbwire": load_image("barbwire"),
-            "ko": load_image("ko"),
-            "guiWoodBG": load_image("guiWoodBG"),
-            "clouds": load_image("clouds"),
-            "fov": load_image("fov"),
-            "countdown": load_image("countdown"),
-            "fullscreen_button": load_image("fullscreen_button"),
-            "back_button": load_image("back_button"),
-        }
-    )
-    sfx.update(
-        {
-            "barbwire": load_sound("barbwire"),
-            "grass": load_sound("grass"),
-            "gunshot": load_sound("gunshot"),
-            "pickup": load_sound("pickup"),
-            "select": load_sound("select"),
-            "switch": load_sound("switch"),
-            "whack": load_sound("whack"),
-            "explosion": load_sound("explosion"),
-            "speedup": load_sound("speedup"),
-        }
-    )
-    fonts.update({"silkscreen": load_font("silkfont"), "silkscreen-bold": load_font("silkfont-bold")})
+    for _ in loading_steps(IMAGES, SOUNDS, FONTS):
+        pass
+
+
+def finish_loading():
+    """Loads whatever of the gameplay assets hasn't streamed in yet, right now"""
+    for _ in _pending:
+        pass
+
+
+async def stream_assets():
+    for _ in _pending:
+        await asyncio.sleep(0)
 
 
 async def load_async():
+    global _pending
+
     flags = 0
     if not settings.PYGBAG:
         flags = pygame.NOFRAME | pygame.SCALED
@@ -108,5 +184,9 @@ async def load_async():
     screen.blit(logo, logo_rect)
     pygame.display.update()
     await asyncio.sleep(0)
-    load_assets()
+    for _ in loading_steps(MENU_IMAGES, MENU_SOUNDS, FONTS):
+        await asyncio.sleep(0)
+    # keeps going in the background, while the logo and then the menu are shown
+    _pending = loading_steps(GAMEPLAY_IMAGES, GAMEPLAY_SOUNDS)
+    asyncio.create_task(stream_assets())
     await asyncio.sleep(2)
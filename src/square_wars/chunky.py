@@ -1,3 +1,5 @@
+import functools
+
 import pygame
 
 from . import assets, settings, animation, utils
@@ -15,15 +17,22 @@ FLOAT_BREAK_CENTER = 2
 FLOAT_BREAK_RIGHT = 3
 
 
+TEXT_CACHE_SIZE = 256
+
+
 class SysFontHolder:
     def __init__(self, name, size):
+        self.name = name
+        self.size = size
         self.fonts = {}
-        for i in range(16):
-            self.fonts[i] = pygame.font.SysFont(name, size, i & FONTTYPE_BOLD, i & FONTTYPE_ITALIC)
-            self.fonts[i].underline = i & FONTTYPE_UNDERLINE
-            self.fonts[i].strikethrough = i & FONTTYPE_STRIKETHROUGH
 
     def __getitem__(self, item):
+        # font variants are only created once they're actually asked for
+        if item not in self.fonts:
+            font = pygame.font.SysFont(self.name, self.size, item & FONTTYPE_BOLD, item & FONTTYPE_ITALIC)
+            font.underline = item & FONTTYPE_UNDERLINE
+            font.strikethrough = item & FONTTYPE_STRIKETHROUGH
+            self.fonts[item] = font
         return self.fonts[item]
 
 
@@ -35,6 +44,30 @@ class FontHolder:
         return self.fonts[item]
 
 
+font_data: dict[str, SysFontHolder | FontHolder] = {}
+
+
+def get_font_holder(fontname, fontsize):
+    fontkey = f"{fontname}-{fontsize}"
+    if fontkey not in font_data:
+        if fontkey == f"silkscreen-{settings.FONT_SIZE}":
+            font_data[fontkey] = FontHolder(
+                {
+                    0: assets.fonts["silkscreen"],
+                    FONTTYPE_BOLD: assets.fonts["silkscreen-bold"],
+                }
+            )
+        else:
+            font_data[fontkey] = SysFontHolder(fontname, fontsize)
+    return font_data[fontkey]
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(text, fonttype=0, fontname="silkscreen", fontsize=settings.FONT_SIZE, fontcolor="black", bgcolor=None):
+    # the returned surfaces are shared between chunks, so they must never be drawn onto
+    return get_font_holder(fontname, fontsize)[fonttype].render(text, False, fontcolor, bgcolor)
+
+
 class Chunk(pygame.sprite.Sprite):
     def __init__(self, image, float_method=FLOAT_INLINE):
         super().__init__()
@@ -79,22 +112,12 @@ class TextChunk(Chunk):
     def __init__(
         self, text, fonttype=0, fontname="silkscreen", fontsize=settings.FONT_SIZE, fontcolor="black", bgcolor=None
     ):
-        self.font_data = {
-            f"silkscreen-{settings.FONT_SIZE}": FontHolder(
-                {
-                    0: assets.fonts["silkscreen"],
-                    FONTTYPE_BOLD: assets.fonts["silkscreen-bold"],
-                }
-            )
-        }
-        fontkey = f"{fontname}-{fontsize}"
-        if fontkey in self.font_data:
-            font = self.font_data[fontkey][fonttype]
-        else:
-            holder = FontHolder(fontname, fontsize)
-            self.font_data[fontkey] = holder
-            font = holder[fonttype]
-        super().__init__(font.render(text, False, fontcolor, bgcolor))
+        # pygame.Color isn't hashable, so colors are normalized before hitting the cache
+        if isinstance(fontcolor, pygame.Color):
+            fontcolor = tuple(fontcolor)
+        if isinstance(bgcolor, pygame.Color):
+            bgcolor = tuple(bgcolor)
+        super().__init__(render_text(text, fonttype, fontname, fontsize, fontcolor, bgcolor))
 
 
 class ChunkRenderer(pygame.sprite.Sprite):
@@ -106,54 +129,108 @@ class ChunkRenderer(pygame.sprite.Sprite):
         # these vars set on rebuild
         self.image = None
         self.rect = None
+        self.lines = []
+        # where every line was drawn, so it can be cleared when it moves
+        self.line_rects = []
         self.rebuild()
 
     def rebuild(self):
-        layers = [0]
-        line_heights = []
-        previous_rect = pygame.Rect(0, 0, 0, 0)
-        current_row = []
-        height = 0
-        force_break = 0
-        for sprite in self.chunk_group:
-            # position sprite
+        self.relayout(0)
+
+    def relayout(self, first_line):
+        """Lay out every chunk from `first_line` on, only redrawing the lines that actually moved or changed"""
+        old_lines = [[(sprite, tuple(sprite.rect)) for sprite in line] for line in self.lines]
+        old_line_rects = self.line_rects
+        first_line = min(first_line, max(len(self.lines) - 1, 0))
+        if first_line:
+            # a resized chunk might now fit at the end of the line above it, so that one gets redone as well
+            first_line -= 1
+        kept_lines = self.lines[:first_line]
+        sprites = self.chunk_group.sprites()[sum(len(line) for line in kept_lines) :]
+
+        if kept_lines:
+            previous_sprite = kept_lines[-1][-1]
+            previous_rect = pygame.Rect(previous_sprite.rect.right, first_line - 1, 0, 0)
+            force_break = previous_sprite.float_method
+        else:
+            previous_rect = pygame.Rect(0, 0, 0, 0)
+            force_break = 0
+
+        new_lines = {}
+        for sprite in sprites:
+            sprite.rect.size = sprite.image.get_size()
+            # position sprite, `rect.top` holds the row index until the layers are set
             sprite.position(previous_rect, force_break, self.max_width)
             force_break = sprite.float_method
-            # if sprite is on a new row, position the last row, reset the row list
-            if sprite.rect.top != previous_rect.top:
-                max_height = 0
-                for row_sprite in current_row:
-                    max_height = max(row_sprite.rect.height, max_height)
-                layers.append(layers[-1] + max_height)
-                line_heights.append(max_height)
-                height += max_height
-                current_row = []
-            # add the sprite to the current row
-            current_row.append(sprite)
+            new_lines.setdefault(sprite.rect.top, []).append(sprite)
             previous_rect = sprite.rect
-        # position the final row
-        max_height = 0
-        for row_sprite in current_row:
-            max_height = max(row_sprite.rect.height, max_height)
-        layers.append(layers[-1] + max_height)
-        height += max_height
-        line_heights.append(max_height)
-        for sprite in self.chunk_group:
-            sprite.set_layers(layers, line_heights)
-        self.rect = pygame.Rect(0, 0, self.max_width, height)
-        self.image = pygame.Surface(self.rect.size, pygame.SRCALPHA).convert_alpha()
-        self.chunk_group.draw(self.image)
+        self.lines = kept_lines + [new_lines[row] for row in sorted(new_lines)]
+
+        line_heights = [max(sprite.rect.height for sprite in line) for line in self.lines]
+        layers = [0]
+        for line_height in line_heights:
+            layers.append(layers[-1] + line_height)
+        for row, line in enumerate(self.lines[first_line:], start=first_line):
+            for sprite in line:
+                sprite.rect.top = row
+                sprite.set_layers(layers, line_heights)
+        self.line_rects = [pygame.Rect(0, top, self.max_width, height) for top, height in zip(layers, line_heights, strict=False)]
+
+        height = layers[-1]
+        if self.image is None or self.rect.height != height:
+            self.rect = pygame.Rect(0, 0, self.max_width, height)
+            self.image = pygame.Surface(self.rect.size, pygame.SRCALPHA).convert_alpha()
+            self.chunk_group.draw(self.image)
+            return
+        self.redraw_lines(first_line, old_lines, old_line_rects)
+
+    def redraw_lines(self, first_line, old_lines, old_line_rects):
+        """Redraws every line from `first_line` on that isn't exactly where and what it was before
+
+        What such a line covered before gets cleared as well as what it covers now, so a line that moved or went
+        away leaves nothing behind. Everything is cleared before anything gets drawn, as a line's old spot can
+        overlap where the line before it is now
+        """
+        changed = []
+        for row in range(first_line, max(len(self.lines), len(old_line_rects))):
+            line = [(sprite, tuple(sprite.rect)) for sprite in self.lines[row]] if row < len(self.lines) else None
+            if row < len(old_lines) and line == old_lines[row]:
+                continue
+            covered = [line_rects[row] for line_rects in (old_line_rects, self.line_rects) if row < len(line_rects)]
+            self.image.fill((0, 0, 0, 0), covered[0].union(covered[-1]))
+            changed.append(row)
+        for row in changed:
+            if row < len(self.lines):
+                for sprite in self.lines[row]:
+                    self.image.blit(sprite.image, sprite.rect)
+
+    def redraw_chunk(self, sprite):
+        self.image.fill((0, 0, 0, 0), sprite.rect)
+        self.image.blit(sprite.image, sprite.rect)
 
     def rechunk(self, chunks):
         self.chunk_group = pygame.sprite.Group(*chunks)
+        self.lines = []
+        self.line_rects = []
         self.rebuild()
 
     def update(self, dt=None):
-        needs_update = self.dynamic
-        for sprite in self.chunk_group.sprites():
-            needs_update = sprite.update() or needs_update
-        if needs_update:
+        """Returns whether the rendered image changed"""
+        changed = [sprite for sprite in self.chunk_group.sprites() if sprite.update()]
+        if self.dynamic:
             self.rebuild()
+            return True
+        first_line = None
+        for sprite in changed:
+            if sprite.image.get_size() == sprite.rect.size:
+                # same size (e.g. another frame of an animation), so nothing else has to move
+                self.redraw_chunk(sprite)
+                continue
+            row = next(row for row, line in enumerate(self.lines) if sprite in line)
+            first_line = row if first_line is None else min(first_line, row)
+        if first_line is not None:
+            self.relayout(first_line)
+        return bool(changed)
 
     def move(self, offset):
         self.rect.topleft = pygame.Vector2(self.rect.topleft) + offset
@@ -162,23 +239,29 @@ class ChunkRenderer(pygame.sprite.Sprite):
         self.rect.topleft = pos
 
 
-def parse_chunky_text(text):
-    IMAGES = {
-        settings.MR1_CHAR: animation.Animation(utils.get_sprite_sheet(assets.images["Mr1"])),
-        settings.MR2_CHAR: animation.Animation(utils.get_sprite_sheet(assets.images["Mr2"])),
+@functools.cache
+def get_chunk_images():
+    # sliced once and shared, animated entries are frame tuples that every chunk wraps in its own `Animation`
+    return {
+        settings.MR1_CHAR: tuple(utils.get_sprite_sheet(assets.images["Mr1"])),
+        settings.MR2_CHAR: tuple(utils.get_sprite_sheet(assets.images["Mr2"])),
         settings.TEAM1_TILE_CHAR: assets.images["tileset"].subsurface((16, 0, 8, 8)),
         settings.TEAM2_TILE_CHAR: assets.images["tileset"].subsurface((24, 0, 8, 8)),
         settings.TEAM1_KO_CHAR: assets.images["ko"].subsurface((0, 0, 8, 8)),
         settings.TEAM2_KO_CHAR: assets.images["ko"].subsurface((8, 0, 8, 8)),
     }
+
+
+def parse_chunky_text(text):
+    IMAGES = get_chunk_images()
     chunks = []
     current_chunk = ""
     for char in text:
         if char in IMAGES:
             chunks.append(TextChunk(current_chunk))
             current_chunk = ""
-            if isinstance(IMAGES[char], animation.Animation):
-                chunks.append(AnimationChunk(IMAGES[char]))
+            if isinstance(IMAGES[char], tuple):
+                chunks.append(AnimationChunk(animation.Animation(IMAGES[char])))
             else:
                 chunks.append(Chunk(IMAGES[char]))
         elif char == "\n":
@@ -2,11 +2,13 @@ import queue
 import pygame
 import random
 import math
+import time
 
 from . import common
 from . import settings
 from . import level
-from . import timer
+from . import mcts
+from . import planner
 
 COMMAND_UP: int = 0
 COMMAND_STOP_UP: int = 1
@@ -64,47 +66,43 @@ class InputControllerA(Controller):
         self.left_key = left_key
         self.right_key = right_key
         self.shoot_key = shoot_key
+        self.press_commands = {
+            up_key: COMMAND_UP,
+            down_key: COMMAND_DOWN,
+            left_key: COMMAND_LEFT,
+            right_key: COMMAND_RIGHT,
+            shoot_key: COMMAND_SHOOT,
+        }
+        self.release_commands = {
+            up_key: COMMAND_STOP_UP,
+            down_key: COMMAND_STOP_DOWN,
+            left_key: COMMAND_STOP_LEFT,
+            right_key: COMMAND_STOP_RIGHT,
+        }
 
     def register_sprite(self, sprite: pygame.sprite.Sprite) -> None:
         self.sprite = sprite
 
     def on_motion_input(self) -> None:
-        keys = pygame.key.get_pressed()
+        keys = common.bus.held
         self.command_queue.put((Command(COMMAND_STOP_UP)))
         self.command_queue.put((Command(COMMAND_STOP_DOWN)))
         self.command_queue.put((Command(COMMAND_STOP_LEFT)))
         self.command_queue.put((Command(COMMAND_STOP_RIGHT)))
-        if keys[self.up_key]:
+        if self.up_key in keys:
             self.command_queue.put(Command(COMMAND_UP))
-        if keys[self.down_key]:
+        if self.down_key in keys:
             self.command_queue.put(Command(COMMAND_DOWN))
-        if keys[self.left_key]:
+        if self.left_key in keys:
             self.command_queue.put(Command(COMMAND_LEFT))
-        if keys[self.right_key]:
+        if self.right_key in keys:
             self.command_queue.put(Command(COMMAND_RIGHT))
 
     def update(self) -> None:
-        for event in common.events:
-            if event.type == pygame.KEYDOWN:
-                if event.key == self.up_key:
-                    self.command_queue.put(Command(COMMAND_UP))
-                if event.key == self.down_key:
-                    self.command_queue.put(Command(COMMAND_DOWN))
-                if event.key == self.left_key:
-                    self.command_queue.put(Command(COMMAND_LEFT))
-                if event.key == self.right_key:
-                    self.command_queue.put(Command(COMMAND_RIGHT))
-                if event.key == self.shoot_key:
-                    self.command_queue.put(Command(COMMAND_SHOOT))
-            if event.type == pygame.KEYUP:
-                if event.key == self.up_key:
-                    self.command_queue.put(Command(COMMAND_STOP_UP))
-                if event.key == self.down_key:
-                    self.command_queue.put(Command(COMMAND_STOP_DOWN))
-                if event.key == self.left_key:
-                    self.command_queue.put(Command(COMMAND_STOP_LEFT))
-                if event.key == self.right_key:
-                    self.command_queue.put(Command(COMMAND_STOP_RIGHT))
+        for event in common.bus.select(pygame.KEYDOWN, pygame.KEYUP):
+            commands = self.press_commands if event.type == pygame.KEYDOWN else self.release_commands
+            if event.key in commands:
+                self.command_queue.put(Command(commands[event.key]))
 
 
 class InputControllerB(InputControllerA):
@@ -120,15 +118,21 @@ class InputControllerB(InputControllerA):
 
 
 class DumbAIController(Controller):
+    # squares the path search looks at before giving the rest of the frame back
+    PLAN_CHUNK = 16
+
     def __init__(self, dumbness=8):
         super().__init__()
         self.running_from = None
-        self.running_timer = timer.Timer(3)
+        self.running_timer = common.current_state.timers.schedule(3)
         self.running_timer.end()
         self.random_latency = dumbness  # increasing this slows the AI down
         self.pathfind_queue = queue.Queue()
         self.initial_frame = True
         self.target_teams = {settings.TEAM_1, settings.TEAM_2, settings.TEAM_NONE}
+        # a path being planned on `common.planner`, and the square it's planned from
+        self.plan_job = None
+        self.plan_start = None
 
     def register_sprite(self, sprite: pygame.sprite.Sprite) -> None:
         super().register_sprite(sprite)
@@ -140,46 +144,106 @@ class DumbAIController(Controller):
         self.command_queue.put((Command(COMMAND_STOP_LEFT)))
         self.command_queue.put((Command(COMMAND_STOP_RIGHT)))
         self.pathfind_queue = queue.Queue()
+        self.cancel_plan()
         self.pathfind()
 
+    def get_cell(self) -> tuple[int, int]:
+        return int(self.sprite.rect.x / 8), int(self.sprite.rect.y / 8)
+
     def pathfind(self) -> bool:
+        return self.set_path(planner.run(self.plan_path(self.get_cell())))
+
+    def set_path(self, path) -> bool:
+        if path is None:
+            return False
+        for direction in path:
+            self.pathfind_queue.put(direction)
+            self.pathfind_queue.put(stops[direction])
+        return True
+
+    def request_path(self) -> None:
+        """Plans a path on the planner, which gets followed once it's done (straight away when nothing serves it)"""
+        if self.plan_job is None:
+            self.plan_start = self.get_cell()
+            self.plan_job = common.planner.submit(self.plan_path(self.plan_start), common.current_state)
+        self.collect_path()
+
+    def collect_path(self) -> None:
+        if self.plan_job is None or not (self.plan_job.done or self.plan_job.cancelled):
+            return
+        job, self.plan_job = self.plan_job, None
+        # a path planned from somewhere else is no good anymore
+        if job.done and self.plan_start == self.get_cell() and not self.pathfind_queue.qsize():
+            self.set_path(job.result)
+
+    def cancel_plan(self) -> None:
+        if self.plan_job is not None:
+            self.plan_job.cancel()
+        self.plan_job = None
+
+    def plan_path(self, start: tuple[int, int]):
+        """Planner job finding the nearest target square, returns the directions to go in to get there (or None)"""
+        field = self.capture_field()
+        if field is not None:
+            return self.field_path(field, start)
         # these variables are used no matter what state the AI is in
         # find nearest target square using BFS
-        x, y = int(self.sprite.rect.x / 8), int(self.sprite.rect.y / 8)
+        x, y = start
         frontier = queue.Queue()
         frontier.put((x, y))
         came_from = {(x, y): None}
         grid = common.current_state.squares
-        players = common.current_state.players
+        # looked up once, not for every square searched
+        target = self.get_target_player()
         target_position = None
+        searched = 0
 
         while target_position is None:
             if frontier.empty():
                 break
+            searched += 1
+            if not searched % self.PLAN_CHUNK:
+                yield
             current = frontier.get()
             for next in grid.get_neighbors(current):
                 if next not in came_from:
                     frontier.put(next)
                     came_from[next] = current
-                    if self.is_valid_target(*next):
+                    if self.is_valid_target(*next, target):
                         target_position = next
         if target_position is None:
-            return False
+            return None
+        return self.trace_path(came_from, (x, y), target_position)
+
+    def capture_field(self):
+        """The team's distance field when just taking squares, None when the AI is after something else"""
+        if self.sprite.powerup is not None or self.running_timer.time_left:
+            return None
+        return common.current_state.squares.fields.get(self.sprite.team)
+
+    def field_path(self, field, start: tuple[int, int]):
+        # the field already knows the way, one step at a time
+        step = field.next_step(start)
+        if step is None:
+            return None
+        return [directions[step[0] - start[0], step[1] - start[1]]]
+
+    def trace_path(self, came_from: dict, start: tuple[int, int], end: tuple[int, int]) -> list:
+        """Directions from `start` to `end`, going back over what the search came from"""
         # contruct path of coordinates to that square
         path = []
-        current = target_position
-        while current != (x, y):
+        current = end
+        while current != start:
             path.append(current)
             current = came_from[current]
         path.reverse()
-        # convert path of coordinates to commands
-        current = (x, y)
+        # convert path of coordinates to directions
+        current = start
+        moves = []
         for coord in path:
-            direction = directions[coord[0] - current[0], coord[1] - current[1]]
-            self.pathfind_queue.put(direction)
-            self.pathfind_queue.put(stops[direction])
+            moves.append(directions[coord[0] - current[0], coord[1] - current[1]])
             current = coord
-        return True
+        return moves
 
     def get_target_player(self):
         target = None
@@ -189,20 +253,22 @@ class DumbAIController(Controller):
                 break
         return target
 
-    def is_valid_target(self, x, y):
+    def is_valid_target(self, x, y, target=None):
         square = common.current_state.squares.get_sprite_by_coordinate(x, y)
         if self.running_timer.time_left:
             return common.current_state.squares.is_clear_position(x, y)
         if self.sprite.powerup is None:
             return square.team in self.target_teams and square.occupant is None
         if self.sprite.powerup.type in {level.POWERUP_GUN, level.POWERUP_GASCAN}:
-            target = self.get_target_player()
+            if target is None:
+                target = self.get_target_player()
             if target is not None:
                 return int(target.rect.x / 8) == x and int(target.rect.y / 8) == y
         return True  # default to random walk if you don't know what to do
 
     def update(self) -> None:
-        self.running_timer.update()
+        # a path planned in between frames is ready to go as soon as it's done
+        self.collect_path()
         if (
             self.sprite.aligned
             and common.current_state.squares.get_sprite_by_coordinate(
@@ -236,8 +302,86 @@ class DumbAIController(Controller):
         if self.sprite.half_aligned and self.pathfind_queue.qsize():
             self.command_queue.put(Command(self.pathfind_queue.get()))
         if self.sprite.aligned and not self.sprite.speeding_up and not random.randint(0, self.random_latency):
-            go = True
             if not self.pathfind_queue.qsize():
-                go = self.pathfind()
-            if go:
+                self.request_path()
+            if self.pathfind_queue.qsize():
                 self.command_queue.put(Command(self.pathfind_queue.get()))
+
+
+class MCTSController(DumbAIController):
+    """Picks every step with a tree search (see `mcts`) that never holds a frame up
+
+    A step is searched for until the root has been visited `DECISION_VISITS` times, on the planner in between frames
+    when the main loop serves it, and the search then carries on from where the game is expected to be once the player
+    is over there. Without the planner being served, every searching AI shares the planner's `frame_deadline` instead,
+    so more of them don't make a frame take longer. Running away and going after the other player with a gun or gas
+    can are left to `DumbAIController`
+    """
+
+    # a move visited less than this is more of a guess than the greedy one
+    MIN_VISITS = 8
+    # how much searching a step is worth before making it
+    DECISION_VISITS = 100
+
+    def __init__(self, dumbness=8):
+        super().__init__(dumbness)
+        self.search = None
+        self.think_job = None
+
+    def register_sprite(self, sprite: pygame.sprite.Sprite) -> None:
+        super().register_sprite(sprite)
+        opponent_team = settings.TEAM_1 if sprite.team == settings.TEAM_2 else settings.TEAM_2
+        self.search = mcts.Search(common.current_state.squares.compiled, sprite.team, opponent_team)
+
+    def sync_search(self) -> None:
+        grid = common.current_state.squares.grid
+        teams = [grid[cell].team if cell in grid else settings.TEAM_ROCK for cell in self.search.cells]
+        target = self.get_target_player()
+        opponent = None if target is None else (int(target.rect.x / 8), int(target.rect.y / 8))
+        self.search.set_root(teams, (int(self.sprite.rect.x / 8), int(self.sprite.rect.y / 8)), opponent)
+
+    def plan_path(self, start: tuple[int, int]):
+        if self.running_timer.time_left or (
+            self.sprite.powerup is not None and self.sprite.powerup.type in {level.POWERUP_GUN, level.POWERUP_GASCAN}
+        ):
+            return (yield from super().plan_path(start))
+        self.sync_search()
+        # in between frames the search gets as long as it takes, inside of one only what's left of the budget
+        while self.search.root_visits < self.DECISION_VISITS:
+            if not common.planner.served and time.perf_counter() > common.planner.frame_deadline():
+                break
+            self.search.iterate()
+            yield
+        move = self.search.best_move(self.MIN_VISITS)
+        if move is None:
+            # not searched enough yet, so this step is the greedy one
+            path = yield from super().plan_path(start)
+            return path and path[:1]
+        self.search.expect(move)
+        self.start_thinking()
+        return [directions[move[0] - start[0], move[1] - start[1]]]
+
+    def start_thinking(self) -> None:
+        """Has the planner search ahead from the expected root, unless it already is"""
+        # unserved, it would run to the end right here, the search gets its share of every frame in `update` instead
+        if not common.planner.served:
+            return
+        if self.think_job is None or self.think_job.done or self.think_job.cancelled:
+            self.think_job = common.planner.submit(self.thinking(), common.current_state)
+
+    def thinking(self):
+        """Planner job searching until the decision at the root has been searched enough, restarted when it moves"""
+        while self.search.root_key is not None and self.search.root_visits < self.DECISION_VISITS:
+            self.search.iterate()
+            yield
+
+    def update(self) -> None:
+        super().update()
+        if not common.planner.served:
+            self.search.think(common.planner.frame_deadline() - time.perf_counter())
+
+
+AI_CONTROLLERS = {
+    "dumb": DumbAIController,
+    "mcts": MCTSController,
+}
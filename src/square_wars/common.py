@@ -1,12 +1,15 @@
 import pygame
 
-from . import proto
+from . import proto, event_bus, planner as _planner, profiler as _profiler
 
 window: pygame.Window
 screen: pygame.Surface
 
 dt: float
 events: list[pygame.Event]
+bus: event_bus.EventBus = event_bus.EventBus()
+profiler: _profiler.FrameProfiler = _profiler.FrameProfiler()
+planner: _planner.Planner = _planner.Planner()
 clock: pygame.Clock
 
 current_state: proto.State
@@ -0,0 +1,109 @@
+import collections
+import heapq
+
+from . import level
+
+UNREACHABLE = 1 << 30
+
+
+class DistanceField:
+    """Walking distance from every cell to the nearest source cell, for all of a team's AIs to share
+
+    Sources come and go one at a time as squares change hands, and only the part of the field that depends on the
+    changed cell gets worked out again: a new source can only bring cells closer, so it spreads out from there until it
+    stops making a difference, a removed one pushes cells away, so the cells that were reached through it are found
+    first and then filled back in from the cells around them. Either way the cost is the size of the change, not of the
+    board
+    """
+
+    def __init__(self, compiled: level.CompiledLevel, sources=()):
+        self.neighbors = compiled.neighbors
+        self.sources: set[tuple[int, int]] = set()
+        # cells that can't reach a source just aren't in here
+        self.distances: dict[tuple[int, int], int] = {}
+        for cell in sources:
+            self.sources.add(cell)
+            self.distances[cell] = 0
+        self.spread(collections.deque(self.sources))
+
+    def distance(self, cell: tuple[int, int]) -> int:
+        if cell in self.distances:
+            return self.distances[cell]
+        # cells nothing walks onto (spawn tiles) still get one, from the cells around them
+        return min((self.distances.get(next, UNREACHABLE) + 1 for next in self.neighbors[cell]), default=UNREACHABLE)
+
+    def next_step(self, cell: tuple[int, int]) -> tuple[int, int] | None:
+        """The neighbour of `cell` closest to a source, None when no source can be reached from it"""
+        best = None
+        best_distance = UNREACHABLE
+        for next in self.neighbors[cell]:
+            distance = self.distances.get(next, UNREACHABLE)
+            if distance < best_distance:
+                best = next
+                best_distance = distance
+        return best
+
+    def spread(self, frontier: collections.deque) -> None:
+        distances = self.distances
+        neighbors = self.neighbors
+        while frontier:
+            current = frontier.popleft()
+            distance = distances[current] + 1
+            for next in neighbors[current]:
+                if distances.get(next, UNREACHABLE) > distance:
+                    distances[next] = distance
+                    frontier.append(next)
+
+    def add_source(self, cell: tuple[int, int]) -> None:
+        if cell in self.sources:
+            return
+        self.sources.add(cell)
+        self.distances[cell] = 0
+        self.spread(collections.deque((cell,)))
+
+    def remove_source(self, cell: tuple[int, int]) -> None:
+        if cell not in self.sources:
+            return
+        self.sources.remove(cell)
+        distances = self.distances
+        neighbors = self.neighbors
+        affected = self.reached_through(cell)
+        for current in affected:
+            del distances[current]
+        # filled back in from the cells bordering them, nearest first
+        heap = self.seeds(affected)
+        heapq.heapify(heap)
+        while heap:
+            distance, current = heapq.heappop(heap)
+            if distances.get(current, UNREACHABLE) <= distance:
+                continue
+            distances[current] = distance
+            for next in neighbors[current]:
+                if next in affected and distances.get(next, UNREACHABLE) > distance + 1:
+                    heapq.heappush(heap, (distance + 1, next))
+
+    def reached_through(self, cell: tuple[int, int]) -> dict[tuple[int, int], int]:
+        """Everything that might have been reached through `cell`, a few more than that is fine"""
+        distances = self.distances
+        neighbors = self.neighbors
+        affected = {cell: 0}
+        stack = [cell]
+        while stack:
+            current = stack.pop()
+            distance = affected[current] + 1
+            for next in neighbors[current]:
+                if next not in affected and next not in self.sources and distances.get(next) == distance:
+                    affected[next] = distance
+                    stack.append(next)
+        return affected
+
+    def seeds(self, cells) -> list[tuple[int, tuple[int, int]]]:
+        """(distance, cell) for every one of `cells` that borders a cell with a distance"""
+        distances = self.distances
+        neighbors = self.neighbors
+        seeds = []
+        for current in cells:
+            distance = min((distances.get(next, UNREACHABLE) + 1 for next in neighbors[current]), default=UNREACHABLE)
+            if distance < UNREACHABLE:
+                seeds.append((distance, current))
+        return seeds
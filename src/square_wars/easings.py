@@ -2,11 +2,20 @@
 This module level docstrings is used to give credit to JiffyRob, who made this file possible
 """
 
+import functools
 import math
-import time
 
 import pygame
 
+from . import common
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+LUT_SIZE = 1024
+
 
 def create_exp_easings(exp):
     def ease_in(time):
@@ -204,10 +213,77 @@ def in_out_bounce(time):
     return (1 - out_bounce(1 - 2 * time)) / 2 if time < 0.5 else (1 + out_bounce(2 * time - 1)) / 2
 
 
+@functools.lru_cache(maxsize=64)
+def lookup_table(easing, size=LUT_SIZE) -> tuple[float, ...]:
+    """`easing` sampled at `size` evenly spaced points from 0 to 1, inclusive"""
+    if numpy is not None:
+        # branchless easings can be evaluated in one go, anything that needs scalars falls back to the loop below
+        try:
+            samples = numpy.asarray(easing(numpy.linspace(0, 1, size)), dtype=float)
+        except (TypeError, ValueError):
+            samples = None
+        if samples is not None and samples.shape == (size,):
+            return tuple(samples.tolist())
+    return tuple(easing(idx / (size - 1)) for idx in range(size))
+
+
 # this specifically is what Matiiss made
 
 
-class EasyVec:
+class Tween:
+    """Base for anything eased over time, driven by the game clock through `advance` (usually by a `TweenManager`)"""
+
+    def __init__(self, easing, total_time_s: float, lut_size: int = LUT_SIZE) -> None:
+        self.easing = easing
+        self.table = lookup_table(easing, lut_size)
+        self.total_time_s = total_time_s
+        self.elapsed_time_s = 0
+        self.done = False
+
+    def apply(self, value: float) -> None: ...
+
+    def finish(self) -> None: ...
+
+    def advance(self, dt: float) -> bool:
+        """Returns whether the tween is still running"""
+        if self.done:
+            return False
+        self.elapsed_time_s += dt
+        if self.elapsed_time_s > self.total_time_s:
+            self.done = True
+            self.finish()
+            return False
+
+        last_index = len(self.table) - 1
+        self.apply(self.table[round(self.elapsed_time_s / self.total_time_s * last_index)])
+        return True
+
+    def update(self) -> None:
+        self.advance(common.dt)
+
+
+class TweenManager:
+    def __init__(self) -> None:
+        self.tweens: list[Tween] = []
+
+    def add(self, tween: Tween) -> Tween:
+        self.tweens.append(tween)
+        return tween
+
+    def update(self, dt: float | None = None) -> None:
+        # finished tweens drop out here, so nobody has to remove them by hand
+        if dt is None:
+            dt = common.dt
+        self.tweens = [tween for tween in self.tweens if tween.advance(dt)]
+
+    def clear(self) -> None:
+        self.tweens.clear()
+
+    def __len__(self) -> int:
+        return len(self.tweens)
+
+
+class EasyVec(Tween):
     def __init__(
         self,
         easing,
@@ -216,28 +292,22 @@ class EasyVec:
         total_time_s: float,
         start_immediately: bool = True,
     ) -> None:
-        self.easing = easing
+        super().__init__(easing, total_time_s)
 
         self.start_pos = start_pos.copy()
         self.end_pos = end_pos.copy()
         self.current_pos = self.start_pos.copy()
 
-        self.total_time_s = total_time_s
-        self.start_time_s = time.perf_counter()
-
-    def update(self):
-        elapsed_time_s = time.perf_counter() - self.start_time_s
-        if elapsed_time_s > self.total_time_s:
-            self.current_pos = self.end_pos
-            return
+    def apply(self, value: float) -> None:
+        x = scale(self.start_pos.x, self.end_pos.x, value)
+        y = scale(self.start_pos.y, self.end_pos.y, value)
+        self.current_pos.update(x, y)
 
-        time_fraction = elapsed_time_s / self.total_time_s
-        x = scale(self.start_pos.x, self.end_pos.x, self.easing(time_fraction))
-        y = scale(self.start_pos.y, self.end_pos.y, self.easing(time_fraction))
-        self.current_pos = pygame.Vector2(x, y)
+    def finish(self) -> None:
+        self.current_pos.update(self.end_pos)
 
 
-class EasyScalar:
+class EasyScalar(Tween):
     def __init__(
         self,
         easing,
@@ -246,20 +316,14 @@ class EasyScalar:
         total_time_s: float,
         start_immediately: bool = True,
     ) -> None:
-        self.easing = easing
+        super().__init__(easing, total_time_s)
 
         self.start = start
         self.end = end
         self.current = start
 
-        self.total_time_s = total_time_s
-        self.start_time_s = time.perf_counter()
-
-    def update(self):
-        elapsed_time_s = time.perf_counter() - self.start_time_s
-        if elapsed_time_s > self.total_time_s:
-            self.current = self.end
-            return
+    def apply(self, value: float) -> None:
+        self.current = scale(self.start, self.end, value)
 
-        time_fraction = elapsed_time_s / self.total_time_s
-        self.current = scale(self.start, self.end, self.easing(time_fraction))
+    def finish(self) -> None:
+        self.current = self.end
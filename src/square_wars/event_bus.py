@@ -0,0 +1,71 @@
+import collections
+from collections.abc import Callable, Sequence
+
+import pygame
+
+KEY_EVENTS = {pygame.KEYDOWN, pygame.KEYUP}
+
+
+class EventBus:
+    """Holds a frame's events bucketed by type (and by key, for keyboard events)
+
+    Anything that lives as long as the game can `subscribe` and gets called from `dispatch` with just the events it asked
+    for, everything else asks for the buckets it cares about with `get`/`select` in its own update
+    """
+
+    def __init__(self):
+        self.events: list[pygame.Event] = []
+        # keys that have gone down and not back up yet, going by the events alone so replays (see `replay`) see it too
+        self.held: set[int] = set()
+        self._by_type: dict[int, list[pygame.Event]] = collections.defaultdict(list)
+        self._by_key: dict[tuple[int, int], list[pygame.Event]] = collections.defaultdict(list)
+        self._subscribers: dict[int | tuple[int, int], list[Callable[[pygame.Event], None]]] = (
+            collections.defaultdict(list)
+        )
+
+    def publish(self, events: list[pygame.Event]) -> None:
+        self.events = events
+        self._by_type.clear()
+        self._by_key.clear()
+        for event in events:
+            self._by_type[event.type].append(event)
+            if event.type in KEY_EVENTS:
+                self._by_key[(event.type, event.key)].append(event)
+                if event.type == pygame.KEYDOWN:
+                    self.held.add(event.key)
+                else:
+                    self.held.discard(event.key)
+
+    def get(self, event_type: int, key: int | None = None) -> Sequence[pygame.Event]:
+        if key is not None:
+            return self._by_key.get((event_type, key), ())
+        return self._by_type.get(event_type, ())
+
+    def select(self, *event_types: int) -> Sequence[pygame.Event]:
+        """Events of any of the given types, in the order they happened"""
+        present = [event_type for event_type in event_types if event_type in self._by_type]
+        if not present:
+            return ()
+        if len(present) == 1:
+            return self._by_type[present[0]]
+        # interleaved types are rare enough that going through the whole frame's events here is fine
+        return [event for event in self.events if event.type in present]
+
+    def subscribe(self, event_type: int, handler: Callable[[pygame.Event], None], key: int | None = None) -> None:
+        self._subscribers[event_type if key is None else (event_type, key)].append(handler)
+
+    def unsubscribe(self, event_type: int, handler: Callable[[pygame.Event], None], key: int | None = None) -> None:
+        handlers = self._subscribers.get(event_type if key is None else (event_type, key), [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    def dispatch(self) -> None:
+        """Calls the handlers of the topics that got events this frame, the rest of the subscribers aren't looked at"""
+        for buckets in (self._by_type, self._by_key):
+            for topic, events in list(buckets.items()):
+                handlers = self._subscribers.get(topic)
+                if not handlers:
+                    continue
+                for event in events:
+                    for handler in list(handlers):
+                        handler(event)
@@ -1,6 +1,12 @@
-import pygame
-
+import functools
+import hashlib
+import json
+import marshal
+import os
 from dataclasses import dataclass
+from pathlib import Path
+
+from . import settings
 
 POWERUP_SPEEDUP = 1
 POWERUP_GUN = 2
@@ -14,6 +20,32 @@ CHAR_T2 = "2"
 CHAR_ROCK = "#"
 CHAR_GRAVEL = "%"
 
+CHAR_TEAMS = {
+    CHAR_BLANK: settings.TEAM_NONE,
+    CHAR_T1: settings.TEAM_1_SPAWN,
+    CHAR_T2: settings.TEAM_2_SPAWN,
+    CHAR_ROCK: settings.TEAM_ROCK,
+    CHAR_GRAVEL: settings.TEAM_GRAVEL,
+}
+SPAWN_TEAMS = {
+    settings.TEAM_1_SPAWN: settings.TEAM_1,
+    settings.TEAM_2_SPAWN: settings.TEAM_2,
+}
+# squares can only ever change between these, so what's walkable is known as soon as the level is
+CLEAR_TEAMS = {settings.TEAM_1, settings.TEAM_2, settings.TEAM_NONE, settings.TEAM_GRAVEL}
+DIRECTIONS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+POWERUP_NAMES = {
+    "speedup": POWERUP_SPEEDUP,
+    "gun": POWERUP_GUN,
+    "gascan": POWERUP_GASCAN,
+    "barbwire": POWERUP_BARBWIRE,
+    "torch": POWERUP_TORCH,
+}
+
+# bump whenever `CompiledLevel` changes, so stale cache files stop matching
+COMPILER_VERSION = 1
+
 
 @dataclass(frozen=True)
 class Level:
@@ -251,3 +283,167 @@ LEVELS = (
     TIME_TRIALS,
     DEATH,
 )
+
+
+@dataclass(frozen=True)
+class CompiledLevel:
+    """Everything about a level's world that can be worked out before playing it"""
+
+    width: int
+    height: int
+    # (x, y, team) of every tile, in the order they appear in the world
+    tiles: tuple[tuple[int, int, int], ...]
+    # (x, y, team) of every player
+    spawns: tuple[tuple[int, int, int], ...]
+    clear: frozenset[tuple[int, int]]
+    # clear orthogonal neighbours of every cell, and the ones including diagonals
+    neighbors: dict[tuple[int, int], tuple[tuple[int, int], ...]]
+    neighbors8: dict[tuple[int, int], tuple[tuple[int, int], ...]]
+    # (x, y, dx, dy) -> how many clear cells there are from (x, y) on in that direction
+    runs: dict[tuple[int, int, int, int], int]
+
+    def to_bytes(self) -> bytes:
+        return marshal.dumps(
+            (self.width, self.height, self.tiles, self.spawns, self.clear, self.neighbors, self.neighbors8, self.runs)
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CompiledLevel":
+        return cls(*marshal.loads(data))
+
+    def get_neighbors(self, x: int, y: int, eight=False) -> tuple[tuple[int, int], ...]:
+        table = self.neighbors8 if eight else self.neighbors
+        if (x, y) in table:
+            return table[(x, y)]
+        return find_neighbors(self.clear, x, y, eight)
+
+    def clear_run(self, x: int, y: int, direction: tuple[int, int]) -> int:
+        dx, dy = direction
+        if (x, y, dx, dy) in self.runs:
+            return self.runs[(x, y, dx, dy)]
+        score = 0
+        while (x, y) in self.clear:
+            x += dx
+            y += dy
+            score += 1
+        return score
+
+
+def find_neighbors(clear, x: int, y: int, eight=False) -> tuple[tuple[int, int], ...]:
+    distances = {1, 2} if eight else {1}
+    return tuple(
+        (nx, ny)
+        for nx in range(x - 1, x + 2)
+        for ny in range(y - 1, y + 2)
+        if abs(nx - x) + abs(ny - y) in distances and (nx, ny) in clear
+    )
+
+
+def compile_world(world: str) -> CompiledLevel:
+    tiles = []
+    for y, row in enumerate(world.strip().split("\n")):
+        for x, char in enumerate(row):
+            if char not in CHAR_TEAMS:
+                raise ValueError(f"unknown tile {char!r} at {x}, {y}")
+            tiles.append((x, y, CHAR_TEAMS[char]))
+    width = max((x + 1 for x, _, _ in tiles), default=0)
+    height = max((y + 1 for _, y, _ in tiles), default=0)
+    spawns = tuple((x, y, SPAWN_TEAMS[team]) for x, y, team in tiles if team in SPAWN_TEAMS)
+    clear = frozenset((x, y) for x, y, team in tiles if team in CLEAR_TEAMS)
+
+    cells = [(x, y) for y in range(height) for x in range(width)]
+    runs = {}
+    for dx, dy in DIRECTIONS:
+        # walked from the far end, so every cell's run is just one more than the next one's
+        for x, y in sorted(cells, key=lambda cell: cell[0] * dx + cell[1] * dy, reverse=True):
+            runs[(x, y, dx, dy)] = runs.get((x + dx, y + dy, dx, dy), 0) + 1 if (x, y) in clear else 0
+    return CompiledLevel(
+        width,
+        height,
+        tuple(tiles),
+        spawns,
+        clear,
+        {(x, y): find_neighbors(clear, x, y) for x, y in cells},
+        {(x, y): find_neighbors(clear, x, y, True) for x, y in cells},
+        runs,
+    )
+
+
+def content_hash(world: str) -> str:
+    return hashlib.sha1(f"{COMPILER_VERSION}:{marshal.version}:{world.strip()}".encode()).hexdigest()
+
+
+_compiled: dict[str, CompiledLevel] = {}
+
+
+def compile_level(level: Level) -> CompiledLevel:
+    """The compiled form of a level's world, from memory, then the on-disk cache and only then compiled anew"""
+    key = content_hash(level.world)
+    if key in _compiled:
+        return _compiled[key]
+    compiled = None
+    cache_path = settings.LEVEL_CACHE_DIR / f"{key}.bin" if settings.LEVEL_CACHE_DIR is not None else None
+    if cache_path is not None and cache_path.exists():
+        try:
+            compiled = CompiledLevel.from_bytes(cache_path.read_bytes())
+        except (OSError, ValueError, EOFError, TypeError):
+            compiled = None
+    if compiled is None:
+        compiled = compile_world(level.world)
+        if cache_path is not None:
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+                temp_path.write_bytes(compiled.to_bytes())
+                os.replace(temp_path, cache_path)
+            except OSError:
+                pass  # only a cache, the level just gets compiled again next time
+    _compiled[key] = compiled
+    return compiled
+
+
+def from_dict(data: dict) -> Level:
+    """Powerups are given by name and the world either as one string or a list of rows"""
+    world = data["world"]
+    if not isinstance(world, str):
+        world = "\n".join(world)
+    return Level(
+        remark=data.get("remark", ""),
+        powerups=tuple(POWERUP_NAMES[name] for name in data.get("powerups", ())),
+        ai_dumbness=data.get("ai_dumbness", 8),
+        world=world,
+        fov=data.get("fov", False),
+    )
+
+
+def to_dict(level: Level) -> dict:
+    names = {powerup: name for name, powerup in POWERUP_NAMES.items()}
+    return {
+        "remark": level.remark,
+        "powerups": [names[powerup] for powerup in level.powerups],
+        "ai_dumbness": level.ai_dumbness,
+        "fov": level.fov,
+        "world": level.world.strip().split("\n"),
+    }
+
+
+def load(path) -> Level:
+    """Reads a level from a JSON file (see `from_dict`)"""
+    return from_dict(json.loads(Path(path).read_text()))
+
+
+def save(level: Level, path) -> None:
+    Path(path).write_text(json.dumps(to_dict(level), indent=4) + "\n")
+
+
+def load_pack(directory) -> tuple[Level, ...]:
+    """Every `*.json` level in a directory, in file name order"""
+    return tuple(load(path) for path in sorted(Path(directory).glob("*.json")))
+
+
+@functools.cache
+def get_levels() -> tuple[Level, ...]:
+    """The levels a game goes through, the pack from `settings.LEVEL_PACK` if there is one"""
+    if settings.LEVEL_PACK:
+        return load_pack(settings.LEVEL_PACK)
+    return LEVELS
@@ -4,7 +4,7 @@ import platform
 import pygame
 import pygame._sdl2 as pg_sdl2  # noqa
 
-from . import common, settings, assets, states, event_types
+from . import common, settings, assets, states, event_types, pacing
 
 if settings.PYGBAG:
     platform.window.canvas.style.imageRendering = "pixelated"
@@ -38,30 +38,71 @@ async def run():
     prev_music_volume = common.music_volume
 
     running = True
+
+    def quit_game(_event):
+        nonlocal running
+        running = False
+
+    def escape(_event):
+        nonlocal running
+        if not settings.PYGBAG and isinstance(common.current_state, states.MainMenu):
+            running = False
+        else:
+            common.current_state = states.MainMenu()
+
+    def switch_to_gameplay(_event):
+        common.current_state = states.Gameplay()
+
+    profiler = common.profiler
+    pacer = pacing.FramePacer(settings.FPS, web=settings.PYGBAG)
+    if settings.PROFILER_CSV_PATH and not settings.PYGBAG:
+        profiler.start_csv(settings.PROFILER_CSV_PATH)
+    if settings.PROFILER_ALLOCATIONS and not settings.PYGBAG:
+        profiler.start_allocations()
+
+    # gets a slice of time at the `asyncio.sleep` at the end of every frame, except while recording: plans finishing
+    # whenever there's time for them can't be replayed, so then they're made right away like in the tools
+    planner_task = None if settings.RECORD_DIR else asyncio.create_task(common.planner.serve())
+
+    common.bus.subscribe(pygame.QUIT, quit_game)
+    common.bus.subscribe(pygame.KEYDOWN, lambda _event: profiler.toggle_overlay(), key=settings.PROFILER_KEY)
+    common.bus.subscribe(pygame.KEYDOWN, escape, key=pygame.K_ESCAPE)
+    common.bus.subscribe(event_types.SWITCH_TO_GAMEPLAY, switch_to_gameplay)
+
     while running:
-        dt = clock.tick(settings.FPS * (not settings.PYGBAG)) / 1000
-        common.dt = dt = pygame.math.clamp(dt, 0.0005, 0.05)
+        dt = await pacer.wait()
+        # only keeps count for `get_fps`, waiting is up to the pacer
+        clock.tick()
+        # after the wait, so the frame time is the work done and not the time spent waiting for the next frame
+        profiler.begin_frame()
+        dt = max(dt, 0.0005)
         if not settings.PYGBAG:
             pygame.display.set_caption(
                 f"{settings.TITLE} | FPS: {clock.get_fps():.0f} | {common.current_state.caption_string}"
             )
 
         common.screen.fill("black")
-        common.events = pygame.event.get()
-        for event in common.events:
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    if not settings.PYGBAG and isinstance(common.current_state, states.MainMenu):
-                        running = False
-                    else:
-                        common.current_state = states.MainMenu()
-            elif event.type == event_types.SWITCH_TO_GAMEPLAY:
-                common.current_state = states.Gameplay()
-
-        common.current_state.update()
-        common.current_state.draw()
+        with profiler.section("input"):
+            common.events = pygame.event.get()
+            # sorted into per-type buckets once, everything after this only looks at the buckets it needs
+            common.bus.publish(common.events)
+            common.bus.dispatch()
+
+        with profiler.section("update"), pacer.update_cost:
+            # a long frame gets caught up on in several updates, only the first one sees the frame's events
+            for index, step in enumerate(pacer.steps(dt)):
+                if index:
+                    common.events = []
+                    common.bus.publish(common.events)
+                common.dt = step
+                common.current_state.update()
+        if pacer.render:
+            with pacer.render_cost:
+                with profiler.section("draw"):
+                    common.current_state.draw()
+                profiler.draw_overlay(common.screen, dt)
+                with profiler.section("present"):
+                    pygame.display.flip()
 
         if prev_sfx_volume != common.sfx_volume:
             assets.set_sound_volume(common.sfx_volume)
@@ -71,9 +112,13 @@ async def run():
             pygame.mixer.music.set_volume(common.music_volume)
             prev_music_volume = common.music_volume
 
-        pygame.display.flip()
+        pacer.report(profiler)
+        profiler.end_frame()
         await asyncio.sleep(0)
 
+    if planner_task is not None:
+        planner_task.cancel()
+    profiler.close()
     pygame.quit()
 
 
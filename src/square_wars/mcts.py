@@ -0,0 +1,259 @@
+import array
+import math
+import random
+import time
+
+from . import level, settings
+
+# squares that change hands when a player stops on them, gravel is walkable but never owned
+CAPTURABLE_TEAMS = (settings.TEAM_NONE, settings.TEAM_1, settings.TEAM_2)
+
+EXPLORATION = 0.5
+# plies (one move of one player) looked ahead from the root, later captures count for less
+DEPTH = 16
+DISCOUNT = 0.9
+# returns get divided by the best one possible (taking a square from the opponent every move), so they stay in -1..1
+MAX_RETURN = 2 * (1 - DISCOUNT**DEPTH) / (1 - DISCOUNT)
+# how likely a rollout move goes for a square that can be captured when there is one next to the player
+GREEDY = 0.8
+# nodes kept at most, once that many are in the table every new one takes the place of the oldest. Kept small enough
+# that the one dict of the table never gets big enough for growing or compacting it to stall an iteration
+MAX_NODES = 20_000
+
+PASS = -1
+
+
+class Search:
+    """Monte Carlo tree search over the squares of a level, run for a slice of time at a time
+
+    The state is just the team of every cell and the cells of two players (the searching one and its opponent), who take
+    turns moving to a neighbouring cell and capture whatever they step on. Nodes are kept in a table keyed by a Zobrist
+    hash of the state, so positions reached by different move orders are searched once and the tree carries over from
+    one decision to the next as long as the game went the way it was searched. The table only holds numbers, which the
+    garbage collector doesn't need to look at, however big the tree gets
+    """
+
+    def __init__(self, compiled: level.CompiledLevel, team: int, opponent_team: int):
+        self.width = compiled.width
+        self.sides = (team, opponent_team)
+        # every cell gets an index, walls included (players start on spawn tiles, which aren't walkable)
+        self.cells = [(x, y) for y in range(compiled.height) for x in range(compiled.width)]
+        self.neighbors = [
+            tuple(nx + ny * self.width for nx, ny in compiled.get_neighbors(x, y)) or (PASS,) for x, y in self.cells
+        ]
+        keys = random.Random(0)
+        self.team_keys = [{team: keys.getrandbits(64) for team in CAPTURABLE_TEAMS} for _ in self.cells]
+        self.position_keys = [[keys.getrandbits(64) for _ in self.cells] for _ in range(2)]
+        self.turn_key = keys.getrandbits(64)
+        self.rng = random.Random()
+        # every node has a slot, per slot: its key, how often it was visited, its summed returns (from the searching
+        # player's point of view) and how many of its moves have been tried, untried ones are always tried before any
+        # gets picked again. Slots get handed out in turn, so the next one to be taken is always the oldest node
+        self.slots: dict[int, int] = {}
+        self.keys = array.array("Q", bytes(8 * MAX_NODES))
+        self.visits = array.array("q", bytes(8 * MAX_NODES))
+        self.values = array.array("d", bytes(8 * MAX_NODES))
+        self.expanded = array.array("q", bytes(8 * MAX_NODES))
+        self.next_slot = 0
+        self.root_key = None
+        self.root_teams: list[int] = []
+        self.root_positions = [PASS, PASS]
+
+    @property
+    def root_visits(self) -> int:
+        return self.node_visits(self.root_key)
+
+    def node_visits(self, key: int) -> int:
+        slot = self.slots.get(key)
+        return 0 if slot is None else self.visits[slot]
+
+    def add(self, key: int) -> int:
+        """Gives `key` the oldest slot, dropping whatever node had it"""
+        slot = self.next_slot
+        self.next_slot = (slot + 1) % MAX_NODES
+        if self.slots.get(self.keys[slot]) == slot:
+            del self.slots[self.keys[slot]]
+        self.slots[key] = slot
+        self.keys[slot] = key
+        self.visits[slot] = 0
+        self.values[slot] = 0.0
+        self.expanded[slot] = 0
+        return slot
+
+    def index(self, x: int, y: int) -> int:
+        return x + y * self.width
+
+    def hash(self, teams: list[int], positions: list[int]) -> int:
+        """Key of a state with the searching player to move"""
+        key = 0
+        for index, team in enumerate(teams):
+            if team in CAPTURABLE_TEAMS:
+                key ^= self.team_keys[index][team]
+        for player, position in enumerate(positions):
+            if position != PASS:
+                key ^= self.position_keys[player][position]
+        return key
+
+    def actions(self, positions: list[int], to_move: int) -> tuple[int, ...]:
+        position = positions[to_move]
+        if position == PASS:
+            return (PASS,)
+        return self.neighbors[position]
+
+    def child_key(self, key: int, teams: list[int], positions: list[int], to_move: int, action: int) -> int:
+        key ^= self.turn_key
+        if action == PASS:
+            return key
+        key ^= self.position_keys[to_move][positions[to_move]] ^ self.position_keys[to_move][action]
+        owner = teams[action]
+        team = self.sides[to_move]
+        if owner in CAPTURABLE_TEAMS and owner != team:
+            key ^= self.team_keys[action][owner] ^ self.team_keys[action][team]
+        return key
+
+    def play(self, teams: list[int], positions: list[int], to_move: int, action: int) -> int:
+        """Applies a move in place, returns how much it was worth to the searching player"""
+        if action == PASS:
+            return 0
+        positions[to_move] = action
+        owner = teams[action]
+        team = self.sides[to_move]
+        if owner not in CAPTURABLE_TEAMS or owner == team:
+            return 0
+        teams[action] = team
+        # taking a square from the other player is worth twice as much as taking an empty one
+        gain = 2 if owner == self.sides[1 - to_move] else 1
+        return gain if to_move == 0 else -gain
+
+    def set_root(self, teams: list[int], position: tuple[int, int], opponent: tuple[int, int] | None) -> None:
+        """Moves the root to the current state of the game, the searching player is the one to move"""
+        positions = [self.index(*position), PASS if opponent is None else self.index(*opponent)]
+        key = self.hash(teams, positions)
+        if key == self.root_key:
+            return
+        self.root_key = key
+        self.root_teams = teams
+        self.root_positions = positions
+
+    def expect(self, move: tuple[int, int]) -> None:
+        """Moves the root on to the searching player having made `move` and the opponent its likeliest reply
+
+        Searched while the player walks over, so the next decision is mostly made by the time it gets there
+        """
+        teams = self.root_teams.copy()
+        positions = self.root_positions.copy()
+        key = self.root_key
+        for to_move, action in ((0, self.index(*move)), (1, None)):
+            if action is None:
+                action = max(
+                    self.actions(positions, to_move),
+                    key=lambda action: self.node_visits(self.child_key(key, teams, positions, to_move, action)),
+                )
+            key = self.child_key(key, teams, positions, to_move, action)
+            self.play(teams, positions, to_move, action)
+        self.root_key = key
+        self.root_teams = teams
+        self.root_positions = positions
+
+    def select(self, key: int, teams: list[int], positions: list[int], to_move: int, actions: tuple[int, ...]) -> int:
+        log_visits = math.log(self.visits[self.slots[key]])
+        # the opponent picks whatever is worst for the searching player
+        sign = 1 if to_move == 0 else -1
+        best_score = -math.inf
+        best = actions[0]
+        for action in actions:
+            slot = self.slots.get(self.child_key(key, teams, positions, to_move, action))
+            if slot is None or not self.visits[slot]:
+                return action
+            visits = self.visits[slot]
+            score = sign * self.values[slot] / visits + EXPLORATION * math.sqrt(log_visits / visits)
+            if score > best_score:
+                best_score = score
+                best = action
+        return best
+
+    def rollout_action(self, teams: list[int], positions: list[int], to_move: int) -> int:
+        actions = self.actions(positions, to_move)
+        if self.rng.random() < GREEDY:
+            team = self.sides[to_move]
+            captures = [
+                action
+                for action in actions
+                if action != PASS and teams[action] in CAPTURABLE_TEAMS and teams[action] != team
+            ]
+            if captures:
+                return self.rng.choice(captures)
+        return self.rng.choice(actions)
+
+    def iterate(self) -> None:
+        teams = self.root_teams.copy()
+        positions = self.root_positions.copy()
+        key = self.root_key
+        to_move = 0
+        total = 0.0
+        weight = 1.0
+        depth = 0
+        slots = self.slots
+        # down the tree until reaching a node that wasn't there before, the root (like any other node) can have been
+        # dropped to make room, then it just gets added back
+        slot = slots.get(key)
+        if slot is None:
+            slot = self.add(key)
+        path = [slot]
+        while depth < DEPTH:
+            actions = self.actions(positions, to_move)
+            tried = self.expanded[slot]
+            if tried < len(actions):
+                self.expanded[slot] = tried + 1
+                action = actions[tried]
+            else:
+                action = self.select(key, teams, positions, to_move, actions)
+            key = self.child_key(key, teams, positions, to_move, action)
+            total += weight * self.play(teams, positions, to_move, action)
+            weight *= DISCOUNT
+            to_move = 1 - to_move
+            depth += 1
+            slot = slots.get(key)
+            if slot is None:
+                path.append(self.add(key))
+                break
+            path.append(slot)
+        # and random (if greedy) moves from there on
+        while depth < DEPTH:
+            total += weight * self.play(teams, positions, to_move, self.rollout_action(teams, positions, to_move))
+            weight *= DISCOUNT
+            to_move = 1 - to_move
+            depth += 1
+        total /= MAX_RETURN
+        visits = self.visits
+        values = self.values
+        for slot in path:
+            visits[slot] += 1
+            values[slot] += total
+
+    def think(self, budget: float) -> int:
+        """Searches for (about) `budget` seconds, returns how many iterations that got done"""
+        if self.root_key is None:
+            return 0
+        deadline = time.perf_counter() + budget
+        iterations = 0
+        while time.perf_counter() < deadline:
+            self.iterate()
+            iterations += 1
+        return iterations
+
+    def best_move(self, min_visits: int = 1) -> tuple[int, int] | None:
+        """The most visited move from the root, None if the search hasn't looked at any move enough yet"""
+        if self.root_key is None:
+            return None
+        best = None
+        best_visits = min_visits - 1
+        for action in self.actions(self.root_positions, 0):
+            child = self.child_key(self.root_key, self.root_teams, self.root_positions, 0, action)
+            visits = self.node_visits(child)
+            if visits > best_visits:
+                best = action
+                best_visits = visits
+        if best is None or best == PASS:
+            return None
+        return self.cells[best]
@@ -0,0 +1,111 @@
+import asyncio
+import math
+import time
+
+# how long the last bit of a wait gets spun instead of slept at first, adjusted to how late sleeps actually wake up
+SPIN_S = 0.002
+MIN_SPIN_S = 0.0002
+MAX_SPIN_S = 0.004
+# renders skipped in a row at most, so the screen still moves when the game can't keep up at all
+MAX_SKIPPED_RENDERS = 4
+# the longest a single update may simulate, longer frames get simulated in several updates, up to `MAX_STEPS`
+MAX_STEP_S = 0.05
+MAX_STEPS = 4
+# further behind than this and the schedule starts over instead of trying to catch up
+MAX_LAG_S = 0.25
+# weight of the newest sample in the running averages of update/render cost and oversleep
+SMOOTHING = 0.1
+
+STRATEGY_SLEEP = "sleep"  # ahead of time, sleeps most of the wait and spins the rest
+STRATEGY_YIELD = "yield"  # in the browser, where spinning would block the page, waits on asyncio instead
+STRATEGY_SKIP = "skip"  # behind, keeps simulating but leaves out rendering until it has caught up
+
+
+class _Cost:
+    """Reusable context manager keeping a running average of how long what it wraps takes"""
+
+    __slots__ = ("average", "start")
+
+    def __init__(self):
+        self.average = 0.0
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self.average += (time.perf_counter() - self.start - self.average) * SMOOTHING
+
+
+class FramePacer:
+    """Holds the main loop to a fixed schedule of frames
+
+    Frames are due every `1 / fps` seconds. Ahead of schedule the pacer waits for the next frame, sleeping while the OS
+    can be trusted to wake it up in time and spinning the rest of the way. Behind schedule it doesn't wait at all, and
+    when the frame would end late (going by what updating and rendering have been costing), it's only simulated,
+    so a slow machine gets fewer frames on screen instead of a game that runs in slow motion
+    """
+
+    def __init__(self, fps: float, web: bool = False):
+        self.frame_time = 1 / fps
+        self.web = web
+        self.deadline = None
+        self.last_frame = None
+        self.lateness = 0.0
+        self.spin = SPIN_S
+        self.update_cost = _Cost()
+        self.render_cost = _Cost()
+        self.strategy = STRATEGY_YIELD if web else STRATEGY_SLEEP
+        # frames that started more than a whole frame late
+        self.missed = 0
+        self.skipped_renders = 0
+        self.render = True
+
+    async def wait(self) -> float:
+        """Waits for the next frame to be due, returns how long it's been since the last one"""
+        now = time.perf_counter()
+        self.deadline = now if self.deadline is None else self.deadline + self.frame_time
+        if now - self.deadline > MAX_LAG_S:
+            self.deadline = now
+        if now < self.deadline:
+            if self.web:
+                await asyncio.sleep(self.deadline - now)
+            else:
+                self.sleep_until(self.deadline)
+            now = time.perf_counter()
+        self.lateness = max(now - self.deadline, 0)
+        if self.lateness > self.frame_time:
+            self.missed += 1
+        # a frame finishing late pushes every following one back as well, not rendering it lets the simulation catch up
+        behind = self.lateness + self.update_cost.average + self.render_cost.average > self.frame_time
+        self.render = not behind or self.skipped_renders >= MAX_SKIPPED_RENDERS
+        self.skipped_renders = 0 if self.render else self.skipped_renders + 1
+        if not self.render:
+            self.strategy = STRATEGY_SKIP
+        else:
+            self.strategy = STRATEGY_YIELD if self.web else STRATEGY_SLEEP
+        dt = 0 if self.last_frame is None else now - self.last_frame
+        self.last_frame = now
+        return dt
+
+    def steps(self, dt: float) -> list[float]:
+        """`dt` split into updates of at most `MAX_STEP_S`, beyond `MAX_STEPS` of them the game does slow down"""
+        count = min(max(math.ceil(dt / MAX_STEP_S), 1), MAX_STEPS)
+        return [min(dt / count, MAX_STEP_S)] * count
+
+    def sleep_until(self, deadline: float) -> None:
+        wake_at = deadline - self.spin
+        remaining = wake_at - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+            # the spin only needs to cover how late sleeps tend to wake up
+            oversleep = max(time.perf_counter() - wake_at, 0)
+            target = min(max(oversleep * 2, MIN_SPIN_S), MAX_SPIN_S)
+            self.spin += (target - self.spin) * SMOOTHING
+        while time.perf_counter() < deadline:
+            pass
+
+    def report(self, profiler) -> None:
+        profiler.set_stat("pacing", self.strategy)
+        profiler.set_stat("missed", self.missed)
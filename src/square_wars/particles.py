@@ -1,6 +1,6 @@
 import pygame, random
 
-from . import timer, common
+from . import common
 
 
 class PixelParticle(pygame.sprite.DirtySprite):
@@ -10,7 +10,7 @@ class PixelParticle(pygame.sprite.DirtySprite):
         self.layer = layer
         self.rect = pygame.FRect(position, (1, 1))
         self.direction = pygame.Vector2(direction)
-        self.life_timer = timer.Timer(life)
+        self.life_timer = common.current_state.timers.schedule(life, self.kill)
         self.image = pygame.Surface((1, 1)).convert()
         self.image.fill(color)
 
@@ -19,9 +19,6 @@ class PixelParticle(pygame.sprite.DirtySprite):
 
     def update(self):
         self.rect.center += self.direction * common.dt
-        self.life_timer.update()
-        if not self.life_timer.time_left:
-            self.kill()
 
 
 def particle_splash(position, layer, color, count):
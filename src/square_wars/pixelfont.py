@@ -1,5 +1,5 @@
 from collections import namedtuple
-from functools import cache
+from functools import lru_cache
 
 import pygame
 
@@ -8,74 +8,96 @@ SPACE = 1
 NEWLINE = 2
 
 Chunk = namedtuple("Chunk", ("type", "data", "size"))
+Layout = namedtuple("Layout", ("size", "blits"))
 
 
 class PixelFont:
-    def __init__(self, char_surfs, encoding="ascii"):
+    LAYOUT_CACHE_SIZE = 256
+
+    def __init__(self, char_surfs, encoding="ascii", layout_cache_size=LAYOUT_CACHE_SIZE):
         self.chars = char_surfs
         self.encoding = encoding
 
-    @cache
+        if hasattr(char_surfs, "items"):
+            items = list(char_surfs.items())
+        else:
+            items = list(enumerate(char_surfs))
+
+        # pack every glyph into a single atlas, so a whole string is just a list of areas of one surface
+        atlas_width = sum(surface.get_width() for _, surface in items)
+        self.line_height = max((surface.get_height() for _, surface in items), default=0)
+        self.atlas = pygame.Surface((atlas_width, self.line_height), pygame.SRCALPHA)
+        self.glyph_rects: dict[int, pygame.Rect] = {}
+        self.advances: dict[int, int] = {}
+        x = 0
+        for char, surface in items:
+            rect = surface.get_rect(topleft=(x, 0))
+            self.atlas.blit(surface, rect)
+            self.glyph_rects[char] = rect
+            self.advances[char] = rect.width
+            x += rect.width
+
+        # bound per instance, so the cache neither keys on nor outlives self
+        self.layout = lru_cache(maxsize=layout_cache_size)(self._layout)
+
     def get_word_size(self, word):
-        width = 0
-        height = 0
-        for char in word.encode(self.encoding):
-            width += self.chars[char].get_width()
-            height = max(height, self.chars[char].get_height())
-        return width, height
-
-    @cache
+        encoded = word.encode(self.encoding)
+        return sum(self.advances[char] for char in encoded), self.line_height if encoded else 0
+
     def get_surface(self, char):
         return self.chars[char.encode(self.encoding)[0]]
 
     def chunkify(self, text):
         current = ""
+        space_size = self.get_surface(" ").get_size()
         for char in text:
             whitespace_type = {" ": SPACE, "\n": NEWLINE, "\r": NEWLINE}.get(char)
-            if char not in {" ", "\n", "\r"}:
+            if whitespace_type is None:
                 current += char
             else:
                 if current:
                     yield Chunk(WORD, current, self.get_word_size(current))
                     current = ""
-                yield Chunk(whitespace_type, None, self.get_surface(" ").get_size())
+                yield Chunk(whitespace_type, None, space_size)
         if current:
             yield Chunk(WORD, current, self.get_word_size(current))
 
-    @cache
-    def positions(self, chunks, width=0):
-        row_width = 0
-        row_height = 0
-        height = 0
-        for chunk in chunks:
-            row_height = max(row_height, chunk.size[1])
-            row_width += chunk.size[0]
-            if (width and (row_width > width)) or chunk.type == NEWLINE:
-                row_width = chunk.size[0]
-                height += row_height + 1
-            yield (max(row_width - chunk.size[0], 0), height), chunk
-
-    @cache
+    def _layout(self, text, width=0):
+        x = 0
+        y = 0
+        content_width = 0
+        blits = []
+        for chunk in self.chunkify(text):
+            chunk_width = chunk.size[0]
+            if chunk.type == NEWLINE or (width and x and x + chunk_width > width):
+                y += self.line_height + 1
+                x = 0
+                if chunk.type != WORD:
+                    continue
+            if chunk.type == WORD:
+                for char in chunk.data.encode(self.encoding):
+                    blits.append((self.atlas, (x, y), self.glyph_rects[char]))
+                    x += self.advances[char]
+            else:
+                x += chunk_width
+            content_width = max(content_width, x)
+        return Layout((width or content_width, y + self.line_height), tuple(blits))
+
+    def positions(self, text, width=0):
+        return tuple((position, area) for _, position, area in self.layout(text, width).blits)
+
     def size(self, text, width=0):
-        (last_x, last_y), last_chunk = tuple(self.positions(self.chunkify(text), width))[-1]
-        width = width or (last_x + last_chunk.size[0])
-        height = last_y + last_chunk.size[1]
-        return width, height
+        return self.layout(text, width).size
 
     def render_to(self, surface, rect, text):
-        position = pygame.Vector2(rect.topleft)
-        for offset, chunk in self.positions(self.chunkify(text), rect.width):
-            if chunk.type == WORD:
-                letter_position = position + offset
-                for char in chunk.data:
-                    char_surface = self.get_surface(char)
-                    surface.blit(char_surface, letter_position)
-                    letter_position.x += char_surface.get_width()
+        left, top = rect.topleft
+        blits = self.layout(text, rect.width).blits
+        if left or top:
+            blits = [(atlas, (x + left, y + top), area) for atlas, (x, y), area in blits]
+        surface.blits(blits, doreturn=False)
 
-    @cache
     def render(self, text, width=0):
-        # TODO: Optimize?
-        surface = pygame.Surface(self.size(text, width)).convert_alpha()
-        surface.fill((0, 0, 0, 0))
-        self.render_to(surface, surface.get_rect(), text)
+        layout = self.layout(text, width)
+        surface = pygame.Surface(layout.size, pygame.SRCALPHA)
+        surface.blits(layout.blits, doreturn=False)
         return surface
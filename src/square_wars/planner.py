@@ -0,0 +1,114 @@
+import asyncio
+import collections
+import time
+from collections.abc import Generator
+
+from . import common, settings
+
+
+class Job:
+    """Planning work handed to the `Planner`, a generator that yields after every small chunk of work
+
+    Whatever the generator returns ends up in `result` once it's `done`
+    """
+
+    __slots__ = ("steps", "owner", "done", "cancelled", "result")
+
+    def __init__(self, steps: Generator, owner=None):
+        self.steps = steps
+        # the state the job was started for, it gets dropped once that isn't the current one anymore
+        self.owner = owner
+        self.done = False
+        self.cancelled = False
+        self.result = None
+
+    def cancel(self) -> None:
+        if not self.done:
+            self.steps.close()
+        self.cancelled = True
+
+    def step(self) -> bool:
+        """Does one chunk of the work, False once there's nothing left to do"""
+        try:
+            next(self.steps)
+        except StopIteration as stop:
+            self.done = True
+            self.result = stop.value
+            return False
+        return True
+
+
+def run(steps: Generator):
+    """Does all of a job's work right away, returns its result"""
+    job = Job(steps)
+    while job.step():
+        pass
+    return job.result
+
+
+class Planner:
+    """Runs planning jobs (AI paths and searches) in between frames instead of inside of them
+
+    The main loop already yields to asyncio once a frame, `serve` is a task that gets to run right then and advances
+    the jobs round robin, one chunk at a time, until `budget` seconds are used up. A job that needs longer than that just
+    takes more frames, so an expensive AI decides later instead of slowing the game down. Nothing serves the planner
+    outside of the main loop (benchmarks, tools), so jobs are run to completion as soon as they are submitted then, and
+    whatever searches inside of the frame instead shares `frame_budget` seconds of it (see `frame_deadline`)
+    """
+
+    def __init__(self, budget: float = settings.AI_PLAN_BUDGET_S, frame_budget: float = settings.AI_THINK_BUDGET_S):
+        self.budget = budget
+        self.frame_budget = frame_budget
+        self.jobs: collections.deque[Job] = collections.deque()
+        self.served = False
+        # set by the first one to search in a frame
+        self._frame_deadline: float | None = None
+
+    def submit(self, steps: Generator, owner=None) -> Job:
+        job = Job(steps, owner)
+        if not self.served:
+            while job.step():
+                pass
+            return job
+        self.jobs.append(job)
+        return job
+
+    def begin_frame(self) -> None:
+        self._frame_deadline = None
+
+    def frame_deadline(self) -> float:
+        """When searching inside of this frame has to stop, the same for everything searching in it"""
+        if self._frame_deadline is None:
+            self._frame_deadline = time.perf_counter() + self.frame_budget
+        return self._frame_deadline
+
+    def clear(self) -> None:
+        while self.jobs:
+            self.jobs.popleft().cancel()
+
+    def run_slice(self, budget: float | None = None) -> int:
+        """Advances the jobs for `budget` seconds at most, returns how many chunks of work got done"""
+        deadline = time.perf_counter() + (self.budget if budget is None else budget)
+        steps = 0
+        while self.jobs and time.perf_counter() < deadline:
+            job = self.jobs.popleft()
+            if job.cancelled:
+                continue
+            if job.owner is not None and job.owner is not common.current_state:
+                job.cancel()
+                continue
+            steps += 1
+            if job.step():
+                self.jobs.append(job)
+        return steps
+
+    async def serve(self) -> None:
+        self.served = True
+        try:
+            while True:
+                self.run_slice()
+                common.profiler.set_stat("jobs", len(self.jobs))
+                await asyncio.sleep(0)
+        finally:
+            self.served = False
+            self.clear()
@@ -0,0 +1,191 @@
+import collections
+import csv
+import time
+
+import pygame
+
+from . import allocations, assets
+
+# how many frames the overlay's percentiles and averages are taken over
+WINDOW = 300
+OVERLAY_REFRESH_S = 0.5
+
+
+class _Section:
+    """Reusable context manager timing one named part of the frame, does nothing while the profiler is off"""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "FrameProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter() if self.profiler.enabled else None
+        return self
+
+    def __exit__(self, *_):
+        if self.start is not None:
+            self.profiler.add(self.name, time.perf_counter() - self.start)
+            self.start = None
+
+
+class FrameProfiler:
+    """Times parts of every frame while the overlay is shown or samples are being written to a CSV file
+
+    Samples are in seconds internally and milliseconds in the CSV file and on the overlay. Sections can nest (the HUD is
+    timed inside of update and draw), per sprite class times are recorded as `update:<class>` and `draw:<class>`
+    """
+
+    def __init__(self):
+        self.show_overlay = False
+        self.frame_index = 0
+        self.frame_start = None
+        self.current: dict[str, float] = collections.defaultdict(float)
+        self.history: collections.deque[dict[str, float]] = collections.deque(maxlen=WINDOW)
+        self.stats: dict[str, object] = {}
+        self._sections: dict[str, _Section] = {}
+        self._csv_file = None
+        self._csv_writer = None
+        self._overlay: pygame.Surface | None = None
+        self._overlay_age = OVERLAY_REFRESH_S
+        self.allocations: allocations.AllocationTracker | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.show_overlay or self._csv_writer is not None
+
+    def toggle_overlay(self) -> None:
+        self.show_overlay = not self.show_overlay
+        self._overlay_age = OVERLAY_REFRESH_S
+
+    def start_csv(self, path) -> None:
+        self.close()
+        self._csv_file = open(path, "w", newline="")
+        self._csv_writer = csv.writer(self._csv_file)
+        # long format, so sprite classes that only show up later don't need a column of their own
+        self._csv_writer.writerow(("frame", "name", "value"))
+
+    def start_allocations(self) -> allocations.AllocationTracker:
+        """Traces every frame's allocations as well, this slows everything down a lot"""
+        if self.allocations is None:
+            self.allocations = allocations.AllocationTracker()
+            self.allocations.start()
+        return self.allocations
+
+    def stop_allocations(self) -> None:
+        if self.allocations is not None:
+            self.allocations.stop()
+        self.allocations = None
+        self.stats.pop("allocs", None)
+
+    def close(self) -> None:
+        self.stop_allocations()
+        if self._csv_file is not None:
+            self._csv_file.close()
+        self._csv_file = None
+        self._csv_writer = None
+
+    def section(self, name: str) -> _Section:
+        if name not in self._sections:
+            self._sections[name] = _Section(self, name)
+        return self._sections[name]
+
+    def add(self, name: str, seconds: float) -> None:
+        self.current[name] += seconds
+
+    def set_stat(self, name: str, value) -> None:
+        """Non-timing values (counters, modes...) shown on the overlay and written with the frame's samples"""
+        self.stats[name] = value
+
+    def begin_frame(self) -> None:
+        if self.allocations is not None:
+            self.allocations.begin_frame()
+        self.frame_start = time.perf_counter() if self.enabled else None
+
+    def end_frame(self) -> None:
+        frame_end = time.perf_counter()
+        if self.allocations is not None:
+            # objects created during the frame, whether or not they're still alive at its end
+            self.set_stat("allocs", self.allocations.end_frame().created)
+        if self.frame_start is None:
+            return
+        self.current["frame"] = frame_end - self.frame_start
+        self.frame_start = None
+        sample = dict(self.current)
+        self.current.clear()
+        self.history.append(sample)
+        if self._csv_writer is not None:
+            for name, seconds in sample.items():
+                self._csv_writer.writerow((self.frame_index, name, f"{seconds * 1000:.4f}"))
+            for name, value in self.stats.items():
+                self._csv_writer.writerow((self.frame_index, name, value))
+        self.frame_index += 1
+
+    def update_group(self, group: pygame.sprite.AbstractGroup) -> None:
+        if not self.enabled:
+            group.update()
+            return
+        for sprite in group.sprites():
+            start = time.perf_counter()
+            sprite.update()
+            self.add(f"update:{type(sprite).__name__}", time.perf_counter() - start)
+
+    def draw_group(self, group: pygame.sprite.AbstractGroup, surface: pygame.Surface) -> None:
+        if not self.enabled:
+            group.draw(surface)
+            return
+        # same as a full redraw of a LayeredDirty, except every sprite's image fetch and blit gets timed
+        for sprite in group.sprites():
+            if not getattr(sprite, "visible", True):
+                continue
+            start = time.perf_counter()
+            surface.blit(
+                sprite.image, sprite.rect, getattr(sprite, "source_rect", None), getattr(sprite, "blendmode", 0)
+            )
+            self.add(f"draw:{type(sprite).__name__}", time.perf_counter() - start)
+
+    def percentiles(self, name: str = "frame", percents=(50, 95, 99)) -> list[float]:
+        samples = sorted(sample.get(name, 0) for sample in self.history)
+        if not samples:
+            return [0 for _ in percents]
+        return [samples[min(len(samples) - 1, len(samples) * percent // 100)] for percent in percents]
+
+    def top_classes(self, count: int = 3) -> list[tuple[str, float]]:
+        totals = collections.defaultdict(float)
+        for sample in self.history:
+            for name, seconds in sample.items():
+                if ":" in name:
+                    totals[name.split(":", 1)[1]] += seconds
+        frames = max(len(self.history), 1)
+        ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:count]
+        return [(name, seconds / frames) for name, seconds in ranked]
+
+    def _render_overlay(self) -> pygame.Surface:
+        font = assets.fonts["silkscreen"]
+        lines = [
+            f"{percent}% {seconds * 1000:.1f}"
+            for percent, seconds in zip((50, 95, 99), self.percentiles(), strict=True)
+        ]
+        lines += [f"{name[:6]} {seconds * 1000:.1f}" for name, seconds in self.top_classes()]
+        lines += [f"{name[:6]} {value}" for name, value in self.stats.items()]
+        rendered = [font.render(line, False, "#f9e6cf") for line in lines]
+        line_height = font.get_linesize() - 2
+        overlay = pygame.Surface(
+            (max(surface.get_width() for surface in rendered) + 2, line_height * len(rendered) + 2), pygame.SRCALPHA
+        )
+        overlay.fill((0, 0, 0, 160))
+        for idx, surface in enumerate(rendered):
+            overlay.blit(surface, (1, 1 + idx * line_height))
+        return overlay
+
+    def draw_overlay(self, surface: pygame.Surface, dt: float) -> None:
+        if not self.show_overlay:
+            return
+        # numbers that change every frame can't be read anyway, so the overlay only gets re-rendered now and then
+        self._overlay_age += dt
+        if self._overlay is None or self._overlay_age >= OVERLAY_REFRESH_S:
+            self._overlay_age = 0
+            self._overlay = self._render_overlay()
+        surface.blit(self._overlay, (0, 0))
@@ -0,0 +1,28 @@
+import collections
+
+import pygame
+
+# free render targets, keyed by (size, flags) so a released surface is only ever handed out as an identical one
+_free: dict[tuple[tuple[int, int], int], list[pygame.Surface]] = collections.defaultdict(list)
+
+
+def acquire(size, flags=0) -> pygame.Surface:
+    """Returns a surface of the given size and flags, reusing a released one when possible
+
+    A reused surface keeps whatever was last drawn onto it, so clear it if the whole area isn't going to be covered
+    """
+    size = (int(size[0]), int(size[1]))
+    free = _free[(size, flags)]
+    if free:
+        return free.pop()
+    return pygame.Surface(size, flags)
+
+
+def release(surface: pygame.Surface, flags=0) -> None:
+    """Hands a surface from `acquire` back to the pool, `flags` must be the ones it was acquired with"""
+    surface.set_alpha(None)
+    _free[(surface.get_size(), flags)].append(surface)
+
+
+def clear() -> None:
+    _free.clear()
@@ -0,0 +1,188 @@
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pygame
+
+from . import common, level
+
+# bump whenever the file layout changes
+FORMAT_VERSION = 1
+
+# everything gameplay reacts to, the rest of a frame's events doesn't need to be kept
+RECORDED_EVENTS = (pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN)
+
+
+@dataclass
+class Recording:
+    """One level played from start to end, as the level, a seed and every tick's dt and input
+
+    Gameplay only ever moves forward by `common.dt` and only reads input from `common.bus`, so feeding it the same ticks
+    plays the level out the same way again. Randomness is taken care of by reseeding `random` at the start of every
+    tick, so whatever else draws from it in between (the menu during the transition) can't knock a replay off course.
+    What can't be replayed exactly is an AI that thinks for as long as it has wall clock time (the MCTS one)
+    """
+
+    level: level.Level
+    seed: int
+    ai: str
+    team_1_ai: str | None = None
+    # `Gameplay.reset` already updates the sprites once, with whatever dt and input the frame setting up the level had
+    start_dt: float = 0.0
+    start_events: list[tuple[int, int]] = field(default_factory=list)
+    # keys held down when the level got set up and as of the first tick, the transition in between isn't recorded
+    start_held: tuple[int, ...] = ()
+    first_tick_held: tuple[int, ...] = ()
+    # (dt, [(event type, key or mouse button), ...]) per update
+    ticks: list[tuple[float, list[tuple[int, int]]]] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return sum(dt for dt, _ in self.ticks)
+
+
+def reseed(seed: int, tick: int) -> None:
+    # hashing ints doesn't depend on PYTHONHASHSEED, so every process comes up with the same seed
+    random.seed(hash((seed, tick)))
+
+
+def encode_event(event: pygame.Event) -> tuple[int, int]:
+    return event.type, event.key if event.type in (pygame.KEYDOWN, pygame.KEYUP) else event.button
+
+
+def decode_event(event_type: int, code: int) -> pygame.Event:
+    if event_type in (pygame.KEYDOWN, pygame.KEYUP):
+        return pygame.Event(event_type, key=code)
+    return pygame.Event(event_type, button=code, pos=(0, 0))
+
+
+def recorded_events() -> list[tuple[int, int]]:
+    return [encode_event(event) for event in common.bus.select(*RECORDED_EVENTS)]
+
+
+def save(recording: Recording, path) -> None:
+    data = {
+        "version": FORMAT_VERSION,
+        "level": level.to_dict(recording.level),
+        "seed": recording.seed,
+        "ai": recording.ai,
+        "team_1_ai": recording.team_1_ai,
+        "start_dt": recording.start_dt,
+        "start_events": [list(event) for event in recording.start_events],
+        "start_held": list(recording.start_held),
+        "first_tick_held": list(recording.first_tick_held),
+        # most ticks have no input at all, those are just the dt
+        "ticks": [[dt, *map(list, events)] if events else dt for dt, events in recording.ticks],
+    }
+    Path(path).write_text(json.dumps(data, separators=(",", ":")))
+
+
+def load(path) -> Recording:
+    data = json.loads(Path(path).read_text())
+    if data.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{path} is a version {data.get('version')} recording, only version {FORMAT_VERSION} plays")
+    ticks = []
+    for tick in data["ticks"]:
+        if isinstance(tick, list):
+            ticks.append((tick[0], [tuple(event) for event in tick[1:]]))
+        else:
+            ticks.append((tick, []))
+    return Recording(
+        level=level.from_dict(data["level"]),
+        seed=data["seed"],
+        ai=data["ai"],
+        team_1_ai=data["team_1_ai"],
+        start_dt=data["start_dt"],
+        start_events=[tuple(event) for event in data["start_events"]],
+        start_held=tuple(data["start_held"]),
+        first_tick_held=tuple(data["first_tick_held"]),
+        ticks=ticks,
+    )
+
+
+class Recorder:
+    """Records every level a `Gameplay` state plays, each one gets saved to `directory` once it's over
+
+    Gameplay calls `begin` when a level starts, `tick` at the start of every update and `end` once time is up
+    """
+
+    def __init__(self, directory=None, seed: int | None = None):
+        self.directory = directory
+        # a new random one for every level when not given
+        self.seed = seed
+        self.recording: Recording | None = None
+        # the last level that got recorded all the way to the end
+        self.finished: Recording | None = None
+
+    def begin(self, gameplay) -> None:
+        seed = self.seed if self.seed is not None else random.getrandbits(32)
+        self.recording = Recording(
+            gameplay.level,
+            seed,
+            gameplay.ai,
+            gameplay.team_1_ai,
+            start_dt=common.dt,
+            start_events=recorded_events(),
+            start_held=tuple(sorted(common.bus.held)),
+        )
+        reseed(seed, 0)
+
+    def tick(self) -> None:
+        recording = self.recording
+        if recording is None:
+            return
+        reseed(recording.seed, len(recording.ticks) + 1)
+        if not recording.ticks:
+            recording.first_tick_held = tuple(sorted(common.bus.held))
+        recording.ticks.append((common.dt, recorded_events()))
+
+    def end(self) -> None:
+        if self.recording is None:
+            return
+        if self.directory is not None:
+            directory = Path(self.directory)
+            directory.mkdir(parents=True, exist_ok=True)
+            save(self.recording, directory / f"{time.strftime('%Y%m%d-%H%M%S')}-{self.recording.seed:08x}.json")
+        self.finished = self.recording
+        self.recording = None
+
+
+class Playback:
+    """Stands in for a `Recorder` to play a recording back, every update gets the dt and input it had back then
+
+    It sets `common.dt` and publishes the tick's events itself, so whatever drives the replay only has to call
+    `update` once per tick
+    """
+
+    def __init__(self, recording: Recording):
+        self.recording = recording
+        self.tick_index = 0
+
+    @property
+    def done(self) -> bool:
+        return self.tick_index >= len(self.recording.ticks)
+
+    def begin(self, gameplay) -> None:
+        self.tick_index = 0
+        common.dt = self.recording.start_dt
+        common.bus.publish([decode_event(*event) for event in self.recording.start_events])
+        common.bus.held.clear()
+        common.bus.held.update(self.recording.start_held)
+        reseed(self.recording.seed, 0)
+
+    def tick(self) -> None:
+        if self.done:
+            return
+        dt, events = self.recording.ticks[self.tick_index]
+        self.tick_index += 1
+        reseed(self.recording.seed, self.tick_index)
+        common.dt = dt
+        common.bus.publish([decode_event(*event) for event in events])
+        if self.tick_index == 1:
+            common.bus.held.clear()
+            common.bus.held.update(self.recording.first_tick_held)
+
+    def end(self) -> None:
+        pass
@@ -20,8 +20,13 @@ class ScoreBoard(pygame.sprite.Sprite):
         self.gameplay_state = gameplay_state
         self.rect = pygame.Rect(0, -64, 64, 64)
         self.leaving = False
-        self.renderer = chunky.ChunkRenderer(chunky.parse_chunky_text(self.text), self.image.get_width() - 8)
         self.last_text = self.text
+        self.renderer = chunky.ChunkRenderer(chunky.parse_chunky_text(self.last_text), self.image.get_width() - 8)
+        # the text is only re-evaluated once the gameplay state reports a score change
+        self.text_changed = False
+        if self.true_text is None:
+            self.gameplay_state.add_score_listener(self.on_score_changed)
+        self.compose()
 
     @property
     def text(self):
@@ -42,6 +47,21 @@ class ScoreBoard(pygame.sprite.Sprite):
     def done(self):
         return self.leaving and not self.down_timer.time_left
 
+    def on_score_changed(self):
+        self.text_changed = True
+
+    def compose(self):
+        rect = self.renderer.image.get_bounding_rect()
+        rect.centerx = self.image.get_rect().centerx
+        rect.centery = self.image.get_rect().centerx
+        rect.top = max(rect.top, 15)
+        self.image.blit(self.bg_image, (0, 0))
+        self.image.blit(self.renderer.image, rect)
+
+    def kill(self):
+        self.gameplay_state.remove_score_listener(self.on_score_changed)
+        super().kill()
+
     def update(self):
         super().update()
         self.down_timer.update()
@@ -50,23 +70,26 @@ class ScoreBoard(pygame.sprite.Sprite):
             self.rect.top = pygame.math.lerp(-64, 0, easings.out_quad(1 - self.down_timer.decimal_percent_left))
         else:
             self.rect.top = pygame.math.lerp(0, 64, easings.in_quad(1 - self.down_timer.decimal_percent_left))
-        if self.text != self.last_text:
-            self.renderer.rechunk(chunky.parse_chunky_text(self.text))
-        self.renderer.update()
-        rect = self.renderer.image.get_bounding_rect()
-        rect.centerx = self.image.get_rect().centerx
-        rect.centery = self.image.get_rect().centerx
-        rect.top = max(rect.top, 15)
-        self.image = self.bg_image.copy()
-        self.image.blit(self.renderer.image, rect)
-        for event in common.events:
-            if (
-                event.type in {pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN}
-                and not self.live_timer.time_left
-                and not self.leaving
-            ):
-                self.leaving = True
-                self.down_timer.restart()
+        if self.done:
+            self.kill()
+            return
+        needs_compose = self.renderer.update()
+        if self.text_changed:
+            self.text_changed = False
+            text = self.text
+            if text != self.last_text:
+                self.last_text = text
+                self.renderer.rechunk(chunky.parse_chunky_text(text))
+                needs_compose = True
+        if needs_compose:
+            self.compose()
+        if (
+            (common.bus.get(pygame.KEYDOWN) or common.bus.get(pygame.MOUSEBUTTONDOWN))
+            and not self.live_timer.time_left
+            and not self.leaving
+        ):
+            self.leaving = True
+            self.down_timer.restart()
 
 
 class Countdown(pygame.sprite.Sprite):
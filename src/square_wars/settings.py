@@ -1,5 +1,7 @@
 import pygame
 import sys
+import os
+from pathlib import Path
 
 PYGBAG = sys.platform == "emscripten"
 
@@ -34,3 +36,37 @@ TEAM2_KO_CHAR = "%"
 FONT_SIZE = 8
 
 FPS = 60
+
+# a directory of level files (see `level.load`) played instead of the built in levels
+LEVEL_PACK = os.environ.get("SQUARE_WARS_LEVEL_PACK")
+# compiled levels get cached here, keyed by the hash of their contents
+if PYGBAG:
+    LEVEL_CACHE_DIR = None
+else:
+    LEVEL_CACHE_DIR = Path(os.environ.get("SQUARE_WARS_CACHE_DIR", Path.home() / ".cache" / "square_wars")) / "levels"
+
+# which of `command.AI_CONTROLLERS` the computer players use
+AI_CONTROLLER = os.environ.get("SQUARE_WARS_AI", "dumb")
+# CPU time all the searching AIs share every frame, when they have to search inside of the frame
+AI_THINK_BUDGET_S = 0.002
+# CPU time all the AI planning gets in between two frames (see `planner`)
+AI_PLAN_BUDGET_S = 0.004
+
+# every level played gets recorded into this directory when set (see `replay`), the recordings can be rendered to
+# frames with replays.py
+if PYGBAG:
+    RECORD_DIR = None
+else:
+    RECORD_DIR = os.environ.get("SQUARE_WARS_RECORD_DIR")
+# what happens in every level played gets streamed to this file ("-" for stdout) when set (see `telemetry`), for
+# match_stats.py to make sense of
+if PYGBAG:
+    TELEMETRY_PATH = None
+else:
+    TELEMETRY_PATH = os.environ.get("SQUARE_WARS_TELEMETRY")
+
+PROFILER_KEY = pygame.K_F3
+# frame timings get streamed to this file when set
+PROFILER_CSV_PATH = os.environ.get("SQUARE_WARS_PROFILE_CSV")
+# traces allocations made during every frame as well (see `allocations`), costly
+PROFILER_ALLOCATIONS = bool(os.environ.get("SQUARE_WARS_PROFILE_ALLOCS"))
@@ -1,10 +1,13 @@
+import functools
+import math
 import queue
 import random
 import pygame
-from collections.abc import Iterator
+from collections.abc import Iterable
 from typing import Any
 
 from .. import timer, scoreboard, particles, assets, animation, common, command, settings, utils, level, easings
+from .. import distance_field, replay, telemetry as _telemetry
 from . import transition, main_menu
 
 
@@ -12,7 +15,52 @@ def center_point_collide(sprite1, sprite2):
     return sprite1.rect.collidepoint(sprite2.rect.center)
 
 
+# entities only keep references to these, every sheet gets sliced (and flipped) once and shared between all of them
+@functools.cache
+def get_sheet(name: str) -> tuple[pygame.Surface, ...]:
+    return tuple(utils.get_sprite_sheet(assets.images[name]))
+
+
+@functools.cache
+def get_tile_images() -> dict[int, pygame.Surface]:
+    return dict(
+        zip(
+            (
+                settings.TEAM_ROCK,
+                settings.TEAM_NONE,
+                settings.TEAM_1,
+                settings.TEAM_2,
+                settings.TEAM_1_SPAWN,
+                settings.TEAM_2_SPAWN,
+                settings.TEAM_GRAVEL,
+            ),
+            get_sheet("tileset"),
+            strict=False,
+        )
+    )
+
+
+def get_walk_frames(color: str) -> dict[tuple[int, int], tuple[pygame.Surface, ...]]:
+    """Frames for every direction a player can face, `color` being the team's sprite number"""
+    front = get_sheet(f"Mr{color}")
+    back = get_sheet(f"Mr{color}Back")
+    front_flipped = animation.frame_table(front, True)
+    back_flipped = animation.frame_table(back, True)
+    return {
+        (-1, -1): back_flipped,
+        (0, -1): back_flipped,
+        (1, -1): back,
+        (1, 0): front,
+        (1, 1): front,
+        (0, 1): front,
+        (-1, 1): front_flipped,
+        (-1, 0): front_flipped,
+    }
+
+
 class Bullet(pygame.sprite.DirtySprite):
+    __slots__ = ("image", "rect", "velocity", "owner")
+
     SPEED = 64
 
     def __init__(self, pos: tuple[int, int], direction: pygame.Vector2, owner: pygame.sprite.DirtySprite):
@@ -32,19 +80,21 @@ class Bullet(pygame.sprite.DirtySprite):
         self.rect.center += self.velocity * common.dt
         for player in common.current_state.players:
             if player.rect.colliderect(self.rect) and player is not self.owner:
-                player.whack()
+                player.whack(level.POWERUP_GUN)
                 self.kill()
 
 
 class Explosion(pygame.sprite.DirtySprite):
+    __slots__ = ("image", "rect", "anim", "deadly_timer")
+
     def __init__(self, pos: tuple[int, int]):
         super().__init__()
         self.layer = 3
         common.current_state.explosions.add(self)
         self.rect = pygame.FRect(pos, (8, 8))
-        self.anim = animation.NoLoopAnimation(utils.get_sprite_sheet(assets.images["explosion"]))
+        self.anim = animation.NoLoopAnimation(get_sheet("explosion"), clock=common.current_state.timers)
         self.image = self.anim.image
-        self.deadly_timer = timer.Timer(0.6)
+        self.deadly_timer = common.current_state.timers.schedule(0.6)
 
     def update_visuals(self):
         self.anim.update()
@@ -52,21 +102,52 @@ class Explosion(pygame.sprite.DirtySprite):
 
     def update(self):
         self.update_visuals()
-        self.deadly_timer.update()
         x, y = int(self.rect.x / 8), int(self.rect.y / 8)
         common.current_state.squares.get_sprite_by_coordinate(x, y).reset()
         if self.deadly_timer.time_left:
             for player in common.current_state.players:
                 if self.rect.collidepoint(player.rect.center):
-                    player.whack()
+                    player.whack(level.POWERUP_GASCAN)
         if self.anim.done():
             self.kill()
 
 
 class Player(pygame.sprite.DirtySprite):
+    # `image` is a property, the base sprite classes still keep a small __dict__ of their own
+    __slots__ = (
+        "controller",
+        "team",
+        "rect",
+        "moving",
+        "last_moving",
+        "command_queue",
+        "squares",
+        "speeding_up",
+        "blink_timer",
+        "blink_on",
+        "strafing",
+        "align_flag",
+        "powerup",
+        "spawn_point",
+        "whacked",
+        "whacked_timer",
+        "particle_timer",
+        "walk_frames",
+        "walk_time",
+        "walk_index",
+        "target_teams",
+        "particle_color",
+        "velocity",
+        "motion",
+    )
+
     SPEED = 32
     SPEEDY_SPEED = 64
     GHOST_SPEED = 32
+    ANIM_SPEED = 0.2
+    BLANK_IMAGE = pygame.Surface((0, 0))
+    # alphas the ghost fades out through, baked once instead of a faded copy every frame
+    GHOST_FADE_STEPS = 32
 
     def __init__(self, controller: command.Controller, pos: tuple[int, int], team: int):
         super().__init__()
@@ -81,29 +162,21 @@ class Player(pygame.sprite.DirtySprite):
         self.command_queue = queue.Queue()
         self.squares = pygame.sprite.Group()
         self.speeding_up = False
-        self.blink_timer = timer.Timer(0.1)
+        self.blink_timer = common.current_state.timers.schedule(0.1, self.blink, repeat=True)
         self.blink_on = False
         self.strafing = False
         self.align_flag = False
         self.powerup = None
         self.spawn_point = self.rect.topleft
-        self.ghost_anim = animation.SingleAnimation(assets.images["ghost"])
         self.whacked = False
-        self.whacked_timer = timer.Timer(3)
-        self.particle_timer = timer.Timer(0.3)
+        self.whacked_timer = common.current_state.timers.schedule(3)
+        self.particle_timer = common.current_state.timers.schedule(0.3)
         color = {settings.TEAM_2: "2", settings.TEAM_1: "1"}[self.team]
-        self.anim_dict = {
-            (-1, -1): animation.Animation(utils.get_sprite_sheet(assets.images[f"Mr{color}Back"]), flip_x=True),
-            (0, -1): animation.Animation(utils.get_sprite_sheet(assets.images[f"Mr{color}Back"]), flip_x=True),
-            (1, -1): animation.Animation(utils.get_sprite_sheet(assets.images[f"Mr{color}Back"])),
-            (1, 0): animation.Animation(utils.get_sprite_sheet(assets.images[f"Mr{color}"])),
-            (1, 1): animation.Animation(utils.get_sprite_sheet(assets.images[f"Mr{color}"])),
-            (0, 1): animation.Animation(utils.get_sprite_sheet(assets.images[f"Mr{color}"])),
-            (-1, 1): animation.Animation(utils.get_sprite_sheet(assets.images[f"Mr{color}"]), flip_x=True),
-            (-1, 0): animation.Animation(utils.get_sprite_sheet(assets.images[f"Mr{color}"]), flip_x=True),
-        }
+        # one clock for the walk cycle, whichever way the player is facing
+        self.walk_frames = get_walk_frames(color)
+        self.walk_time = 0
+        self.walk_index = 0
         self.controller.register_sprite(self)
-        self.blank_image = pygame.Surface((0, 0))
         self.target_teams = {
             settings.TEAM_NONE,
         }
@@ -123,17 +196,15 @@ class Player(pygame.sprite.DirtySprite):
     @property
     def image(self):
         if self.whacked:
-            image = self.ghost_anim.image.copy()
-            image.set_alpha(self.whacked_timer.decimal_percent_left * 255)
-            return image
+            frames = animation.fade_table(assets.images["ghost"], self.GHOST_FADE_STEPS)
+            return frames[round(self.whacked_timer.decimal_percent_left * (self.GHOST_FADE_STEPS - 1))]
         if self.speeding_up and self.blink_on:
-            return self.blank_image
+            return self.BLANK_IMAGE
         facing = self.moving
         if not pygame.Vector2(self.moving):
             facing = self.last_moving
-        if not pygame.Vector2(self.moving):
-            self.anim_dict[tuple(facing)].restart()
-        return self.anim_dict[tuple(facing)].image
+        frames = self.walk_frames[tuple(facing)]
+        return frames[self.walk_index % len(frames)]
 
     @property
     def aligned(self):
@@ -154,27 +225,38 @@ class Player(pygame.sprite.DirtySprite):
         if self.powerup is not None:
             self.powerup.kill()
         self.powerup = sprite
+        if common.current_state.telemetry is not None:
+            common.current_state.telemetry.pickup(self, sprite.type)
 
     def dequip_powerup(self):
         self.powerup = None
 
-    def whack(self):
+    def blink(self):
+        if not self.whacked:
+            self.blink_on = not self.blink_on
+
+    def whack(self, cause: int | None = None):
+        """Knocks the player out, `cause` being the powerup that did it"""
         if not self.whacked:
             assets.sfx["whack"].play()
+            if common.current_state.telemetry is not None:
+                common.current_state.telemetry.ko(self, cause)
             if self.powerup is not None:
                 self.powerup.kill()
                 self.dequip_powerup()
             self.whacked = True
             self.whacked_timer.restart()
-            common.current_state.kos[self.team] += 1
+            common.current_state.add_ko(self.team)
             self.speeding_up = False
             self.motion = [0, 0]
 
     def update_visuals(self):
-        for anim in self.anim_dict.values():
-            anim.update()
-        self.ghost_anim.update()
-        self.particle_timer.update()
+        # standing still starts the walk cycle over, here rather than when drawn so skipped renders don't change it
+        if pygame.Vector2(self.moving):
+            self.walk_time += common.dt
+        else:
+            self.walk_time = 0
+        self.walk_index = round(self.walk_time / self.ANIM_SPEED)
         if not self.whacked and (pygame.Vector2(self.moving) and not self.particle_timer.time_left) or self.speeding_up:
             self.particle_timer.restart()
             lower_bound = 5
@@ -282,23 +364,26 @@ class Player(pygame.sprite.DirtySprite):
                 self.speeding_up = False
                 self.controller.on_motion_input()
             self.rect.clamp_ip((0, 0, 64, 64))
-            self.blink_timer.update()
-            if not self.blink_timer.time_left:
-                self.blink_timer.restart()
-                self.blink_on = not self.blink_on
         else:
-            self.whacked_timer.update()
-            self.ghost_anim.update()
             self.rect.topleft = pygame.Vector2(self.rect.topleft).move_towards(
                 self.spawn_point, self.GHOST_SPEED * common.dt
             )
             if self.rect.topleft == self.spawn_point and not self.whacked_timer.time_left:
-                self.ghost_anim.restart()
                 self.controller.on_motion_input()
                 self.whacked = False
 
 
 class Speedup(pygame.sprite.DirtySprite):
+    __slots__ = ("type", "image", "rect", "coord", "direction", "anim")
+
+    # frames of the sheet and how to flip them for every direction
+    DIRECTIONS = {
+        (0, -1): (slice(2, None), False, False),
+        (0, 1): (slice(2, None), False, True),
+        (-1, 0): (slice(None, 2), True, False),
+        (1, 0): (slice(None, 2), False, False),
+    }
+
     def __init__(self, pos: tuple[int, int]):
         super().__init__()
         self.type = level.POWERUP_SPEEDUP
@@ -306,27 +391,16 @@ class Speedup(pygame.sprite.DirtySprite):
         self.layer = 2
         self.rect = pygame.FRect(pos, (8, 8))
         x, y = int(pos[0] / 8), int(pos[1] / 8)
-        anim_dict = {
-            (0, -1): animation.Animation(utils.get_sprite_sheet(assets.images["speedup"])[2:]),
-            (0, 1): animation.Animation(utils.get_sprite_sheet(assets.images["speedup"])[2:], flip_y=True),
-            (-1, 0): animation.Animation(utils.get_sprite_sheet(assets.images["speedup"])[:2], flip_x=True),
-            (1, 0): animation.Animation(utils.get_sprite_sheet(assets.images["speedup"])[:2]),
-        }
-        squares = common.current_state.squares
         self.coord = x, y
-        self.direction = sorted(anim_dict.keys(), key=self.get_direction_score, reverse=True)[random.randint(0, 1)]
-        self.anim = anim_dict[self.direction]
+        self.direction = sorted(self.DIRECTIONS, key=self.get_direction_score, reverse=True)[random.randint(0, 1)]
+        frames, flip_x, flip_y = self.DIRECTIONS[self.direction]
+        self.anim = animation.Animation(
+            get_sheet("speedup")[frames], flip_x=flip_x, flip_y=flip_y, clock=common.current_state.timers
+        )
         self.image = self.anim.image
 
     def get_direction_score(self, direction):
-        score = 0
-        x, y = self.coord
-        dx, dy = direction
-        while common.current_state.squares.is_clear_position(x, y):
-            x += dx
-            y += dy
-            score += 1
-        return score
+        return common.current_state.squares.clear_run(*self.coord, direction)
 
     def unused(self):
         return True  # use kills it
@@ -341,10 +415,14 @@ class Speedup(pygame.sprite.DirtySprite):
             if self.rect.collidepoint(player.rect.center) and player.aligned:
                 assets.sfx["speedup"].play()
                 player.speedup(self.direction)
+                if common.current_state.telemetry is not None:
+                    common.current_state.telemetry.pickup(player, self.type)
                 self.kill()
 
 
 class ShotGun(pygame.sprite.DirtySprite):
+    __slots__ = ("type", "image", "rect", "player")
+
     def __init__(self, pos: tuple[int, int]):
         super().__init__()
         self.type = level.POWERUP_GUN
@@ -380,20 +458,17 @@ class ShotGun(pygame.sprite.DirtySprite):
 
 
 class GasCan(pygame.sprite.DirtySprite):
+    __slots__ = ("type", "image", "rect", "anim", "explosion_timer", "state", "player")
+
     def __init__(self, pos: tuple[int, int]):
         super().__init__()
         self.type = level.POWERUP_GASCAN
         self.dirty = 2
         self.layer = 4
-        frames = utils.get_sprite_sheet(assets.images["gascan"])
-        self.anim_dict = {
-            "idle": animation.SingleAnimation(frames[0]),
-            "lit": animation.Animation(frames[:3]),
-        }
         self.rect = pygame.FRect(pos, (8, 8))
-        self.anim = self.anim_dict["idle"]
+        self.anim = animation.SingleAnimation(get_sheet("gascan")[0])
         self.image = self.anim.image
-        self.explosion_timer = timer.Timer(1)
+        self.explosion_timer = None  # only starts ticking once lit
         self.state = "idle"
         self.player = None
 
@@ -425,63 +500,75 @@ class GasCan(pygame.sprite.DirtySprite):
                         self.player = player
             else:
                 self.rect.center = self.player.rect.midtop
-        else:
-            self.explosion_timer.update()
-            if not self.explosion_timer.time_left:
-                self.explode()
         self.update_visuals()
 
     def use(self):
+        # placed before going back into the powerups, which look at where it is to know which cell it takes up
+        self.rect.center = self.player.rect.center
         common.current_state.powerups.add(self)
         self.player.dequip_powerup()
-        self.rect.center = self.player.rect.center
-        self.anim = self.anim_dict["lit"]
+        self.anim = animation.Animation(get_sheet("gascan")[:3], clock=common.current_state.timers)
         self.state = "lit"
+        self.explosion_timer = common.current_state.timers.schedule(1, self.explode)
 
 
 class Barbwire(pygame.sprite.DirtySprite):
+    __slots__ = ("type", "image", "rect", "live_timer", "live", "owner")
+
     def __init__(self, position: tuple[int, int], owner=None):
         super().__init__()
         self.type = level.POWERUP_BARBWIRE
         self.dirty = 2
         self.layer = 4
-        self.live_timer = timer.Timer(7)
+        self.live_timer = None  # only starts ticking once live
         self.rect = pygame.Rect(position, (8, 8))
-        self.images = utils.get_sprite_sheet(assets.images["barbwire"])
         self.live = owner is not None
-        self.image = self.images[self.live]
+        self.image = get_sheet("barbwire")[self.live]
         self.owner = owner
+        if self.live:
+            self.live_timer = common.current_state.timers.schedule(7, self.kill)
 
     def unused(self):
         return not self.live
 
     def update_visuals(self):
-        self.image = self.images[self.live]
+        self.image = get_sheet("barbwire")[self.live]
 
     def update(self):
         for player in common.current_state.players:
             if self.rect.collidepoint(player.rect.center) and player.aligned and not player.whacked:
                 if self.live and player is not self.owner:
-                    player.whack()
+                    player.whack(level.POWERUP_BARBWIRE)
                 if not self.live:
                     assets.sfx["barbwire"].play()
+                    if common.current_state.telemetry is not None:
+                        common.current_state.telemetry.pickup(player, self.type)
                     self.owner = player
                     self.live = True
-        if self.live:
-            self.live_timer.update()
-            if not self.live_timer.time_left:
-                self.kill()
+                    self.live_timer = common.current_state.timers.schedule(7, self.kill)
         self.update_visuals()
 
 
 class Square(pygame.sprite.DirtySprite):
+    __slots__ = (
+        "image",
+        "rect",
+        "player_group",
+        "team_groups",
+        "team",
+        "team_group",
+        "owner",
+        "occupant",
+        "teamchange_timer",
+        "_x",
+        "_y",
+    )
+
     def __init__(
         self,
         pos: tuple[int, int],
         player_group: pygame.sprite.Group,
-        blank_group: pygame.sprite.Group,
-        team1_group: pygame.sprite.Group,
-        team2_group: pygame.sprite.Group,
+        team_groups: dict[int, pygame.sprite.Group],
         start_team: settings.TEAM_NONE,
     ):
         super().__init__()
@@ -490,54 +577,53 @@ class Square(pygame.sprite.DirtySprite):
         self.rect = pygame.FRect(0, 0, 8, 8)
         self.rect.topleft = pos
         self.player_group = player_group
-        self.team_groups = {
-            settings.TEAM_NONE: blank_group,
-            settings.TEAM_1: team1_group,
-            settings.TEAM_2: team2_group,
-        }
+        # shared by every square of the level
+        self.team_groups = team_groups
         self.team = start_team
         self.team_group = None
         if self.team in self.team_groups.keys():
             self.team_group = self.team_groups[self.team]
             self.team_group.add(self)
         self.owner = None
-        self.images = dict(
-            zip(
-                (
-                    settings.TEAM_ROCK,
-                    settings.TEAM_NONE,
-                    settings.TEAM_1,
-                    settings.TEAM_2,
-                    settings.TEAM_1_SPAWN,
-                    settings.TEAM_2_SPAWN,
-                    settings.TEAM_GRAVEL,
-                ),
-                utils.get_sprite_sheet(assets.images["tileset"]),
-                strict=False,
-            )
-        )
+        self.image = get_tile_images()[self.team]
         self.occupant = None
-        self.teamchange_timer = timer.Timer(0.3)
+        self.teamchange_timer = common.current_state.timers.schedule(0.3)
         self._x = 0
         self._y = 0
 
+    def set_team(self, team):
+        if team == self.team:
+            return
+        self.team = team
+        # update team groups to reflect new ownership
+        if self.team_group is not None:
+            self.team_group.remove(self)
+        self.team_group = self.team_groups.get(self.team)
+        if self.team_group is not None:
+            self.team_group.add(self)
+        common.current_state.squares.team_changed(self)
+        common.current_state.score_changed()
+        if common.current_state.telemetry is not None:
+            common.current_state.telemetry.capture(self._x, self._y, team)
+
     def reset(self):
         if self.team in {settings.TEAM_NONE, settings.TEAM_1, settings.TEAM_2}:
-            self.team = settings.TEAM_NONE
+            self.set_team(settings.TEAM_NONE)
             self.owner = None
-            self.image = self.images[self.team]
+            self.image = get_tile_images()[self.team]
 
     def update_visuals(self):
-        self.image = self.images[self.team].copy()
+        # only a square that's being taken over needs an image of its own, the rest show the shared tile
+        self.image = get_tile_images()[self.team]
         if self.occupant and self.teamchange_timer.time_left:
             if self.occupant.team == settings.TEAM_1:
                 color = settings.TEAM1_COLOR
             else:
                 color = settings.TEAM2_COLOR
+            self.image = self.image.copy()
             pygame.draw.line(self.image, color, (0, 8), (0, round(self.teamchange_timer.decimal_percent_left * 8)))
 
     def update(self) -> None:
-        self.teamchange_timer.update()
         # check if I collide with any players and change color to match
         changed = False
         if self.team not in {settings.TEAM_GRAVEL, settings.TEAM_ROCK, settings.TEAM_1_SPAWN, settings.TEAM_2_SPAWN}:
@@ -546,7 +632,7 @@ class Square(pygame.sprite.DirtySprite):
                     self.occupant = None
                     self.teamchange_timer.restart()
                 elif not self.teamchange_timer.time_left and self.owner is not self.occupant:
-                    self.team = self.occupant.team
+                    self.set_team(self.occupant.team)
                     self.owner = self.occupant
                     self.owner.squares.add(self)
                     changed = True
@@ -558,19 +644,26 @@ class Square(pygame.sprite.DirtySprite):
                         if self.occupant.speeding_up:
                             self.teamchange_timer.end()
             if changed:
-                # update team groups to reflect new ownership
-                self.team_group.remove(self)
-                self.team_group = self.team_groups[self.team]
-                self.team_group.add(self)
                 self.owner.squares.remove(self)
         # change color
         self.update_visuals()
 
 
+# squares each team's AIs go after
+TARGET_TEAMS = {
+    settings.TEAM_1: {settings.TEAM_NONE, settings.TEAM_2},
+    settings.TEAM_2: {settings.TEAM_NONE, settings.TEAM_1},
+}
+
+
 class SquareSpriteGroup(pygame.sprite.Group):
-    def __init__(self):
+    def __init__(self, compiled: level.CompiledLevel):
         super().__init__()
         self.grid = {}
+        # walls never move, so neighbours and clear runs come straight from the compiled level
+        self.compiled = compiled
+        # per team, how far every cell is from a square it can take (see `build_fields`)
+        self.fields: dict[int, distance_field.DistanceField] = {}
 
     def add_to_grid(self, sprite: Square, x: int, y: int) -> None:
         if sprite.team != settings.TEAM_ROCK:
@@ -579,19 +672,33 @@ class SquareSpriteGroup(pygame.sprite.Group):
             sprite._y = y
         self.add(sprite)
 
-    def get_neighbors(self, sprite: Square, eight=False) -> Iterator[tuple[int, int]]:
-        if eight:
-            distances = {1, 2}
-        else:
-            distances = {1}
+    def build_fields(self) -> None:
+        """One distance field per team, shared by all of its AIs and kept up to date as squares change hands"""
+        self.fields = {
+            team: distance_field.DistanceField(
+                self.compiled, [cell for cell, sprite in self.grid.items() if sprite.team in targets]
+            )
+            for team, targets in TARGET_TEAMS.items()
+        }
+
+    def team_changed(self, sprite: Square) -> None:
+        cell = (sprite._x, sprite._y)
+        for team, field in self.fields.items():
+            if sprite.team in TARGET_TEAMS[team]:
+                field.add_source(cell)
+            else:
+                field.remove_source(cell)
+
+    def get_neighbors(self, sprite: Square, eight=False) -> Iterable[tuple[int, int]]:
         if isinstance(sprite, tuple):
             x, y = sprite
         else:
             x, y = sprite._x, sprite._y
-        for nx in range(x - 1, x + 2):
-            for ny in range(y - 1, y + 2):
-                if abs(nx - x) + abs(ny - y) in distances and self.is_clear_position(nx, ny):
-                    yield nx, ny
+        return self.compiled.get_neighbors(x, y, eight)
+
+    def clear_run(self, x: int, y: int, direction: tuple[int, int]) -> int:
+        """How many clear positions there are in a row from (x, y) on (itself included)"""
+        return self.compiled.clear_run(x, y, direction)
 
     def get_sprite_by_coordinate(self, x: int, y: int) -> Square:
         return self.grid[(x, y)]
@@ -600,15 +707,44 @@ class SquareSpriteGroup(pygame.sprite.Group):
         return (x, y) in self.grid
 
     def is_clear_position(self, x, y):
-        return self.has_at_position(x, y) and self.get_sprite_by_coordinate(x, y).team in {
-            settings.TEAM_1,
-            settings.TEAM_2,
-            settings.TEAM_NONE,
-            settings.TEAM_GRAVEL,
-        }
+        return (x, y) in self.compiled.clear
+
+
+class PowerupGroup(pygame.sprite.Group):
+    """Powerups lying around on the board, keeping the set of cells a new one can be put on up to date"""
+
+    def __init__(self, clear_cells):
+        super().__init__()
+        # sorted, so the same seed spawns the same powerups in the same places
+        self.free_cells = utils.RandomSet(sorted(clear_cells))
+        self.clear_cells = clear_cells
+        self.cells: dict[pygame.sprite.Sprite, tuple[int, int]] = {}
+        self.cell_counts: dict[tuple[int, int], int] = {}
+
+    @staticmethod
+    def get_cell(sprite) -> tuple[int, int]:
+        # the cell whose center the sprite covers (which is what blocked a spot before)
+        return math.ceil((sprite.rect.left - 4) / 8), math.ceil((sprite.rect.top - 4) / 8)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        cell = self.cells[sprite] = self.get_cell(sprite)
+        self.cell_counts[cell] = self.cell_counts.get(cell, 0) + 1
+        self.free_cells.discard(cell)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        cell = self.cells.pop(sprite)
+        self.cell_counts[cell] -= 1
+        if not self.cell_counts[cell]:
+            del self.cell_counts[cell]
+            if cell in self.clear_cells:
+                self.free_cells.add(cell)
 
 
 class FOV(pygame.sprite.DirtySprite):
+    __slots__ = ("rect", "targets", "surface", "fov_image", "fov_rect")
+
     def __init__(self, player):
         super().__init__()
         self.dirty = 2
@@ -652,11 +788,29 @@ class Gameplay:
         level.POWERUP_TORCH: Barbwire,  # FOR NOW...
     }
 
-    def __init__(self):
+    def __init__(
+        self,
+        levels: tuple[level.Level, ...] | None = None,
+        ai: str | None = None,
+        team_1_ai: str | None = None,
+        recorder: replay.Recorder | replay.Playback | None = None,
+        telemetry: _telemetry.Writer | None = None,
+    ):
+        # usually streamed in by now, unless play got pressed the moment the menu showed up
+        assets.finish_loading()
+        self.levels = levels if levels is not None else level.get_levels()
+        # which of `command.AI_CONTROLLERS` plays team 2, and team 1 as well if given (otherwise it's the keyboard)
+        self.ai = ai if ai is not None else settings.AI_CONTROLLER
+        self.team_1_ai = team_1_ai
+        if recorder is None and settings.RECORD_DIR:
+            recorder = replay.Recorder(settings.RECORD_DIR)
+        self.recorder = recorder
+        if telemetry is None and settings.TELEMETRY_PATH:
+            telemetry = _telemetry.Writer(settings.TELEMETRY_PATH)
+        self.telemetry = telemetry
         self.level_index = 0
         # timer
         self.timer = timer.Timer(64)
-        self.powerup_timer = timer.Timer(2)
         self.caption_string = "TIME: 64"
         self.countdown_timer = timer.Timer(3)
         # handles level switch
@@ -677,120 +831,137 @@ class Gameplay:
         pygame.mixer.music.unpause()
 
     def reset(self):
-        self.level = level.LEVELS[self.level_index]
+        self.level = self.levels[self.level_index]
+        if self.recorder is not None:
+            self.recorder.begin(self)
+        compiled = level.compile_level(self.level)
+        # Jiffy's turn for some hax code, entities look up the timer wheel through the current state
+        state = common.current_state
+        common.current_state = self
+        # every in-level timer lives here, it only advances while the game is actually being played
+        self.timers = timer.TimerWheel()
+        self.powerup_timer = self.timers.schedule(2, self.spawn_powerup, repeat=True)
         # sprite groups
         self.sprites = pygame.sprite.LayeredDirty()
-        self.powerups = pygame.sprite.Group()
+        self.powerups = PowerupGroup(compiled.clear)
         self.players = pygame.sprite.Group()
         self.hud = pygame.sprite.Group()
         self.added_scoreboard = False
         # handles squares as a graph of neighbouring sprites for BFS
-        self.squares = SquareSpriteGroup()
+        self.squares = SquareSpriteGroup(compiled)
         self.blanks = pygame.sprite.Group()
         self.team_one_squares = pygame.sprite.Group()
         self.team_two_squares = pygame.sprite.Group()
+        self.team_groups = {
+            settings.TEAM_NONE: self.blanks,
+            settings.TEAM_1: self.team_one_squares,
+            settings.TEAM_2: self.team_two_squares,
+        }
         self.explosions = pygame.sprite.Group()
+        # called whenever square ownership or KO counts change
+        self.score_listeners = []
         # spawn grid
-        y = 0
-        x = 0
-        for char in self.level.world.strip():
-            match char:
-                case "\n":
-                    y += 1
-                    x = 0
-                    continue
-                case level.CHAR_ROCK:
-                    team = settings.TEAM_ROCK
-                case level.CHAR_GRAVEL:
-                    team = settings.TEAM_GRAVEL
-                case level.CHAR_BLANK:
-                    team = settings.TEAM_NONE
-                case level.CHAR_T1:
-                    team = settings.TEAM_1_SPAWN
+        for x, y, team in compiled.tiles:
+            if team == settings.TEAM_1_SPAWN:
+                if self.team_1_ai is not None:
+                    controller = command.AI_CONTROLLERS[self.team_1_ai](self.level.ai_dumbness)
+                else:
                     controller = command.InputControllerA()
-                    player = Player(controller, (x * 8, y * 8), settings.TEAM_1)
-                    self.sprites.add(player)
-                    self.players.add(player)
-                    # spawn FOV blinder (if needed)
-                    if self.level.fov:
-                        self.sprites.add(FOV(player))
-                case level.CHAR_T2:
-                    team = settings.TEAM_2_SPAWN
-                    controller = command.DumbAIController(self.level.ai_dumbness)
-                    player = Player(controller, (x * 8, y * 8), settings.TEAM_2)
-                    self.sprites.add(player)
-                    self.players.add(player)
-            sprite = Square(
-                (x * 8, y * 8), self.players, self.blanks, self.team_one_squares, self.team_two_squares, team
-            )
+                player = Player(controller, (x * 8, y * 8), settings.TEAM_1)
+                self.sprites.add(player)
+                self.players.add(player)
+                # spawn FOV blinder (if needed)
+                if self.level.fov:
+                    self.sprites.add(FOV(player))
+            elif team == settings.TEAM_2_SPAWN:
+                controller = command.AI_CONTROLLERS[self.ai](self.level.ai_dumbness)
+                player = Player(controller, (x * 8, y * 8), settings.TEAM_2)
+                self.sprites.add(player)
+                self.players.add(player)
+            sprite = Square((x * 8, y * 8), self.players, self.team_groups, team)
             self.sprites.add(sprite)
             self.squares.add_to_grid(sprite, x, y)
-            x += 1
+        self.squares.build_fields()
         # set game values
         self.kos = {
             settings.TEAM_1: 0,
             settings.TEAM_2: 0,
         }
         self.state = self.STATE_START
+        if self.telemetry is not None:
+            self.telemetry.begin(self)
         # create scoreboard
         self.scoreboard = scoreboard.ScoreBoard(self, self.level.remark)
         self.hud.add(self.scoreboard)
         # timer stuff
         self.timer.restart()
-        self.powerup_timer.restart()
-        # Jiffy's turn for some hax code
-        state = common.current_state
-        common.current_state = self
         self.sprites.update()
         common_current_state = state
+        self.tweens = easings.TweenManager()
         self.transition_easers: dict[Any, easings.EasyScalar] = {}
 
     def get_winner(self):
-        return list(
-            sorted((settings.TEAM_1, settings.TEAM_2), key=lambda x: self.get_square_count(x) - self.get_ko_count(x))
-        )[-1]
+        """The team with the higher score (squares minus KOs), `settings.TEAM_NONE` for a draw"""
+        score_1 = self.get_square_count(settings.TEAM_1) - self.get_ko_count(settings.TEAM_1)
+        score_2 = self.get_square_count(settings.TEAM_2) - self.get_ko_count(settings.TEAM_2)
+        if score_1 == score_2:
+            return settings.TEAM_NONE
+        return settings.TEAM_1 if score_1 > score_2 else settings.TEAM_2
 
     def get_square_count(self, team):
-        count = 0
-        for square in self.squares.sprites():
-            if square.team == team:
-                count += 1
-        return count
+        return len({settings.TEAM_1: self.team_one_squares, settings.TEAM_2: self.team_two_squares}[team])
 
     def get_ko_count(self, team):
         return self.kos[team]
 
+    def add_ko(self, team):
+        self.kos[team] += 1
+        self.score_changed()
+
+    def add_score_listener(self, callback):
+        self.score_listeners.append(callback)
+
+    def remove_score_listener(self, callback):
+        if callback in self.score_listeners:
+            self.score_listeners.remove(callback)
+
+    def score_changed(self):
+        for callback in self.score_listeners:
+            callback()
+
     def can_put_powerup_in_spot(self, spot):
-        center = (spot[0] * 8 + 4, spot[1] * 8 + 4)
-        if not self.squares.is_clear_position(*spot):
-            return False
-        for sprite in self.powerups:
-            if sprite.rect.collidepoint((center)):
-                return False
-        return True
+        return spot in self.powerups.free_cells
+
+    def spawn_powerup(self):
+        # a full board just skips this spawn instead of stacking powerups on top of each other
+        if not self.level.powerups or not self.powerups.free_cells:
+            return
+        spot = self.powerups.free_cells.choice()
+        powerup = self.POWERUPS[random.choice(self.level.powerups)]((spot[0] * 8, spot[1] * 8))
+        self.sprites.add(powerup)
+        self.powerups.add(powerup)
 
     def update(self) -> None:
+        if self.recorder is not None:
+            self.recorder.tick()
+        common.planner.begin_frame()
         self.countdown_timer.update()
         if self.state == self.STATE_GAMEPLAY:
             if not self.timer.time_left:
                 self.state = self.STATE_END
+                if self.recorder is not None:
+                    self.recorder.end()
+                if self.telemetry is not None:
+                    self.telemetry.end(self.get_winner())
                 self.scoreboard = scoreboard.ScoreBoard(self)
                 self.hud.add(self.scoreboard)
-            self.sprites.update()
+            self.timers.advance(common.dt)
+            common.profiler.update_group(self.sprites)
+            if self.telemetry is not None:
+                self.telemetry.tick(common.dt)
             self.caption_string = f"TIME: {int(self.timer.update()):02d}"
-            self.powerup_timer.update()
-            if (not self.powerup_timer.time_left) and self.level.powerups:
-                self.powerup_timer.restart()
-                for i in range(30):
-                    spot = (random.randint(0, 7), random.randint(0, 7))
-                    if self.can_put_powerup_in_spot(spot):
-                        break
-                powerup = self.POWERUPS[random.choice(self.level.powerups)]((spot[0] * 8, spot[1] * 8))
-                self.sprites.add(powerup)
-                self.powerups.add(powerup)
-            for event in common.events:
-                if event.type == pygame.KEYDOWN and event.key == pygame.K_e:
-                    self.pause()
+            if common.bus.get(pygame.KEYDOWN, pygame.K_e):
+                self.pause()
         elif self.state == self.STATE_START:
             if self.scoreboard.done:
                 self.state = self.STATE_COUNTDOWN
@@ -809,7 +980,7 @@ class Gameplay:
                     self.state = self.STATE_DEFEAT
                     self.scoreboard = scoreboard.ScoreBoard(self, f"Failure.\n{self.total_score}pts")
                     self.hud.add(self.scoreboard)
-                elif self.level_index >= len(level.LEVELS):
+                elif self.level_index >= len(self.levels):
                     self.state = self.STATE_VICTORY
                     self.scoreboard = scoreboard.ScoreBoard(self, f"Victory!\n{self.total_score}pts")
                     self.hud.add(self.scoreboard)
@@ -822,13 +993,15 @@ class Gameplay:
             if self.scoreboard.done:
                 pygame.event.post(pygame.Event(pygame.KEYDOWN, key=pygame.K_ESCAPE))
                 pygame.event.post(pygame.Event(pygame.KEYUP, key=pygame.K_ESCAPE))
-        self.hud.update()
+        with common.profiler.section("hud"):
+            self.hud.update()
 
     def draw(self, surface=None) -> None:
         if surface is None:
             surface = common.screen
-        self.sprites.draw(surface)
-        self.hud.draw(surface)
+        common.profiler.draw_group(self.sprites, surface)
+        with common.profiler.section("hud"):
+            self.hud.draw(surface)
 
     def transition_init(self) -> None:
         # hax
@@ -840,24 +1013,26 @@ class Gameplay:
         screen = common.screen
         common.screen = pygame.Surface(common.screen.get_size())
         self.draw()
-        self.____transition_image_original = self.____transition_image = common.screen
+        self.____transition_image_original = common.screen
         self.____transition_image_alpha = 0
         self.____transition_image_width = 0
         common.screen = screen
 
-        self.transition_easers["size"] = easings.EasyScalar(easings.in_bounce, 0, 64, 3)
+        self.transition_easers["size"] = self.tweens.add(easings.EasyScalar(easings.in_bounce, 0, 64, 3))
+        # every size the bounce can pass through is scaled up front, so the transition only has to pick a frame
+        self.____transition_frames = [
+            pygame.transform.scale(self.____transition_image_original, (width, width)) for width in range(64 + 1)
+        ]
+        self.____transition_image = self.____transition_frames[0]
 
     def transition_update(self) -> None:
-        for easer in self.transition_easers.values():
-            easer.update()
+        self.tweens.update()
 
         self.____transition_image_alpha += 80 * common.dt
         # self.____transition_image_width += 30 * common.dt
         # self.____transition_image_width = min(self.____transition_image_width, 64)  # nice hardcoded value
         self.____transition_image_width = self.transition_easers["size"].current
-        self.____transition_image = pygame.transform.scale(
-            self.____transition_image_original, (self.____transition_image_width, self.____transition_image_width)
-        )
+        self.____transition_image = self.____transition_frames[int(self.____transition_image_width)]
         self.____transition_image.set_alpha(self.____transition_image_alpha)
 
         if self.____transition_image_alpha >= 255 and self.____transition_image_width >= 64:
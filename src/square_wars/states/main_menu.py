@@ -5,7 +5,7 @@ import random
 import math
 import pygame._sdl2 as pg_sdl2  # noqa
 
-from .. import common, assets, ui, utils, easings, timer, settings
+from .. import common, assets, ui, utils, easings, timer, settings, render_targets
 
 from . import transition, gameplay
 
@@ -77,6 +77,26 @@ class MainMenu:
         (61, 61),
     )
     day_length = 10
+    phase_length = 15  # fifteen seconds/day (and /night, /dawn, /dusk)
+    phase_steps = 64  # how many distinct sky colors each phase is quantized into
+    _day_cycle: list[tuple[pygame.Color, pygame.Color]] | None = None
+
+    @classmethod
+    def get_day_cycle(cls) -> list[tuple[pygame.Color, pygame.Color]]:
+        """(sky color, window color) for every step of a whole day, only computed once"""
+        if cls._day_cycle is None:
+            cls._day_cycle = []
+            for step in range(4 * cls.phase_steps):
+                x = step / cls.phase_steps
+                # add two 90 degree out-of-phase triangle waves to make a trapezoid
+                lerp_value = pygame.math.clamp((abs((x % 4) - 2) - 1) + (abs(((x - 1) % 4) - 2)) / 2, 0, 1)
+                cls._day_cycle.append(
+                    (
+                        cls.night_color.lerp(cls.day_color, lerp_value),
+                        cls.night_window_color.lerp(cls.day_window_color, lerp_value),
+                    )
+                )
+        return cls._day_cycle
 
     def __init__(self):
         pygame.mixer.music.load(assets.ost_path("SquareWars"))
@@ -111,9 +131,19 @@ class MainMenu:
         self.mmm = self.bg_image.get_at((1, 0))
         self.time = 0
 
+        # sky, buildings and windows only change when the day cycle steps, so they're kept composed in one surface
+        self.day_cycle = self.get_day_cycle()
+        self.day_step = None
+        self.day_colors = None
+        self.background = pygame.Surface(settings.LOGICAL_SIZE).convert()
+        self.window_mask = pygame.Mask(settings.LOGICAL_SIZE)
+        for coord in self.window_coordinates:
+            self.window_mask.set_at(coord)
+
         pygame.mixer.music.load(assets.ost_path("SquareWars"))
         pygame.mixer.music.play(loops=-1)
 
+        self.tweens = easings.TweenManager()
         self.transition_easers: dict[Any, easings.EasyVec] = {}
 
     def update(self) -> None:
@@ -132,22 +162,28 @@ class MainMenu:
         if surface is None:
             surface = common.screen
         # day/night cycle
-        x = self.time / 15  # fifteen seconds/day (and /night, /dawn, /dusk)
-        lerp_value = pygame.math.clamp((abs((x % 4) - 2) - 1) + (abs(((x - 1) % 4) - 2)) / 2, 0, 1)
-        # sky
-        surface.fill(self.night_color.lerp(self.day_color, lerp_value))
-        common.screen.blit(assets.images["menu_bg"], (0, 0))
-        # windows
-        window_color = self.night_window_color.lerp(self.day_window_color, lerp_value)
-        for coord in self.window_coordinates:
-            surface.set_at(coord, window_color)
+        day_step = int(self.time / self.phase_length * self.phase_steps) % len(self.day_cycle)
+        if day_step != self.day_step:
+            self.day_step = day_step
+            self.redraw_background()
+        surface.blit(self.background, (0, 0))
         self.sprites.draw(surface)
 
         self.ui_manager.draw(surface)
 
+    def redraw_background(self) -> None:
+        day_colors = self.day_cycle[self.day_step]
+        if day_colors == self.day_colors:
+            return
+        self.day_colors = sky_color, window_color = day_colors
+        # sky
+        self.background.fill(sky_color)
+        self.background.blit(assets.images["menu_bg"], (0, 0))
+        # windows, all of them in one go
+        self.window_mask.to_surface(self.background, setcolor=window_color, unsetcolor=None)
+
     def transition_update(self) -> None:
-        for easer in self.transition_easers.values():
-            easer.update()
+        self.tweens.update()
 
         p_button = self.ui_manager["play_button"]
         s_button = self.ui_manager["settings_button"]
@@ -178,13 +214,15 @@ class MainMenu:
             self.smoke_timer = timer.Timer(random.random() * 0.5 + 0.5)
 
     def transition_draw(self, dst: pygame.Surface) -> None:
-        surf = dst.copy()
+        # fully covered by the fill, so a pooled surface doesn't need clearing
+        surf = render_targets.acquire(dst.get_size(), pygame.SRCALPHA)
         surf.fill(self.mmm)
         surf.blit(self.bg_image, (0, 0))
         self.sprites.draw(surf)
         surf.blit(self.ui_manager["menu_title"].image, self.ui_manager["menu_title"].rect)
         surf.set_alpha(self.ui_manager["menu_title"].alpha)
         dst.blit(surf, (0, 0))
+        render_targets.release(surf, pygame.SRCALPHA)
         self.ui_manager.draw_exclude_once("menu_title")
         self.ui_manager.draw(dst)
 
@@ -245,12 +283,16 @@ class MainMenu:
         time_s = 1
 
         p_button = self.ui_manager["play_button"]
-        self.transition_easers[p_button] = easings.EasyVec(
-            ease, p_button.position, pygame.Vector2(p_button.position.x - dist, p_button.position.y), time_s
+        self.transition_easers[p_button] = self.tweens.add(
+            easings.EasyVec(
+                ease, p_button.position, pygame.Vector2(p_button.position.x - dist, p_button.position.y), time_s
+            )
         )
         s_button = self.ui_manager["settings_button"]
-        self.transition_easers[s_button] = easings.EasyVec(
-            ease, s_button.position, pygame.Vector2(s_button.position.x + dist, s_button.position.y), time_s
+        self.transition_easers[s_button] = self.tweens.add(
+            easings.EasyVec(
+                ease, s_button.position, pygame.Vector2(s_button.position.x + dist, s_button.position.y), time_s
+            )
         )
 
 
@@ -259,7 +301,10 @@ class SettingsMenu:
 
     def __init__(self):
         super().__init__()
-        self.ui_manager = ui.UIManager(without_selector=True)
+        background = pygame.Surface(settings.LOGICAL_SIZE).convert()
+        background.fill(pygame.color.Color("#0098dc"))
+        background.blit(assets.images["menu_bg"], (0, 0))
+        self.ui_manager = ui.UIManager(without_selector=True, background=background)
 
         slider_rect = pygame.Rect(0, 0, 50, 6)
         slider_rect.center = (settings.LOGICAL_WIDTH / 2, 22)
@@ -345,13 +390,8 @@ class SettingsMenu:
         #         )
         # self.particle_manager.render(static=True)
 
-        common.screen.fill(pygame.color.Color("#0098dc"))
-        common.screen.blit(assets.images["menu_bg"], (0, 0))
-
+        # background included, only the widgets that changed get redrawn into the ui layer
         self.ui_manager.draw(common.screen)
-        for widget in self.ui_manager.widgets:
-            if isinstance(widget, ui.HorizontalSlider):
-                widget.draw(common.screen)
 
     @staticmethod
     def toggle_fullscreen():
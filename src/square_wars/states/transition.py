@@ -1,6 +1,6 @@
 import pygame
 
-from .. import proto, common
+from .. import proto, common, render_targets
 
 
 class Transition:
@@ -18,11 +18,16 @@ class Transition:
         self.next_state.transition_update()
 
     def draw(self) -> None:
-        current_surf = pygame.Surface(common.screen.get_size(), flags=pygame.SRCALPHA)
+        current_surf = render_targets.acquire(common.screen.get_size(), pygame.SRCALPHA)
+        current_surf.fill((0, 0, 0, 0))
         self.current_state.transition_draw(current_surf)
 
-        next_surf = pygame.Surface(common.screen.get_size(), flags=pygame.SRCALPHA)
+        next_surf = render_targets.acquire(common.screen.get_size(), pygame.SRCALPHA)
+        next_surf.fill((0, 0, 0, 0))
         self.next_state.transition_draw(next_surf)
 
         common.screen.blit(next_surf, (0, 0))
         common.screen.blit(current_surf, (0, 0))
+
+        render_targets.release(next_surf, pygame.SRCALPHA)
+        render_targets.release(current_surf, pygame.SRCALPHA)
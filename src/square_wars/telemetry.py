@@ -0,0 +1,187 @@
+import array
+import struct
+import sys
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import BinaryIO
+
+from . import level, settings
+
+# bump whenever the layout of the records changes
+FORMAT_VERSION = 1
+
+# a stream is any number of matches back to back, each one a header and then its records, so streams (files, pipes) can
+# just be concatenated. The header says how long the records are, so a reader can take a whole match in one go
+MATCH = struct.Struct("<cB8sBBBI")  # b"M", version, level key (see `level_key`), width, height, players, records length
+# the team of every player and then of every cell (row by row) follow the header
+TICK = "<cf"  # b"T", dt, and then the cell of every player, closes the tick the records before it happened in
+CAPTURE = struct.Struct("<cHb")  # b"C", cell, team, every time a square changes hands (including back to nobody)
+PICKUP = struct.Struct("<cBB")  # b"P", player, powerup
+KO = struct.Struct("<cBB")  # b"K", player, powerup that did it (NO_CAUSE if none)
+END = struct.Struct("<cb")  # b"E", winning team (TEAM_NONE for a draw)
+
+NO_CAUSE = 255
+
+
+class Writer:
+    """Writes what happens in every level a `Gameplay` state plays to `output`, compact enough to keep all of them
+
+    Only gameplay ticks are written, one record each with the dt and where every player is, and in between those a
+    record for every square changing hands, powerup being picked up and player getting knocked out. A level is only
+    written once it's over, so quitting one halfway through leaves nothing behind. `output` is a path ("-" being
+    stdout) or a binary file
+    """
+
+    def __init__(self, output: str | BinaryIO):
+        self.output = output
+        # the level being played, None in between levels
+        self.records: bytearray | None = None
+        self.header = b""
+        self.start = b""
+        self.width = 0
+        self.players: dict = {}
+        self.tick_struct = struct.Struct(TICK)
+
+    def begin(self, gameplay) -> None:
+        compiled = gameplay.squares.compiled
+        grid = gameplay.squares.grid
+        self.width = compiled.width
+        self.players = {player: index for index, player in enumerate(gameplay.players)}
+        self.tick_struct = struct.Struct(TICK + "H" * len(self.players))
+        teams = [player.team for player in self.players]
+        # rows shorter than the widest one leave holes, which are as good as rocks
+        cells = [
+            grid[(x, y)].team if (x, y) in grid else settings.TEAM_ROCK
+            for y in range(compiled.height)
+            for x in range(compiled.width)
+        ]
+        self.start = struct.pack(f"<{len(teams)}b{len(cells)}b", *teams, *cells)
+        # the length of the records gets filled in at the end
+        self.header = (bytes.fromhex(level_key(gameplay.level)), compiled.width, compiled.height, len(self.players))
+        self.records = bytearray()
+
+    def cell(self, x: int, y: int) -> int:
+        return y * self.width + x
+
+    def capture(self, x: int, y: int, team: int) -> None:
+        if self.records is not None:
+            self.records += CAPTURE.pack(b"C", self.cell(x, y), team)
+
+    def pickup(self, player, powerup: int) -> None:
+        if self.records is not None:
+            self.records += PICKUP.pack(b"P", self.players[player], powerup)
+
+    def ko(self, player, cause: int | None) -> None:
+        if self.records is not None:
+            self.records += KO.pack(b"K", self.players[player], NO_CAUSE if cause is None else cause)
+
+    def tick(self, dt: float) -> None:
+        if self.records is None:
+            return
+        cells = [self.cell(int(player.rect.centerx // 8), int(player.rect.centery // 8)) for player in self.players]
+        self.records += self.tick_struct.pack(b"T", dt, *cells)
+
+    def end(self, winner: int) -> None:
+        if self.records is None:
+            return
+        self.records += END.pack(b"E", winner)
+        data = MATCH.pack(b"M", FORMAT_VERSION, *self.header, len(self.records)) + self.start + self.records
+        self.records = None
+        if self.output == "-":
+            sys.stdout.buffer.write(data)
+            sys.stdout.buffer.flush()
+        elif isinstance(self.output, str):
+            with open(self.output, "ab") as file:
+                file.write(data)
+        else:
+            self.output.write(data)
+            self.output.flush()
+
+
+def level_key(played: level.Level) -> str:
+    """Tells levels apart by their world, whichever pack or position they're played from"""
+    return level.content_hash(played.world)[:16]
+
+
+@dataclass
+class Match:
+    """One level's worth of a stream, every kind of record in arrays of its own
+
+    Records are tied to ticks by index, `tick` of a record being the tick it happened in
+    """
+
+    level_key: str
+    width: int
+    height: int
+    # team of every player, and of every cell at the start
+    teams: tuple[int, ...]
+    start: bytes
+    winner: int = 0
+    dts: array.array = field(default_factory=lambda: array.array("f"))
+    # the cell of every player on every tick, flattened
+    cells: array.array = field(default_factory=lambda: array.array("H"))
+    capture_ticks: array.array = field(default_factory=lambda: array.array("I"))
+    capture_cells: array.array = field(default_factory=lambda: array.array("H"))
+    capture_teams: array.array = field(default_factory=lambda: array.array("b"))
+    pickup_ticks: array.array = field(default_factory=lambda: array.array("I"))
+    pickup_players: array.array = field(default_factory=lambda: array.array("B"))
+    pickup_powerups: array.array = field(default_factory=lambda: array.array("B"))
+    ko_ticks: array.array = field(default_factory=lambda: array.array("I"))
+    ko_players: array.array = field(default_factory=lambda: array.array("B"))
+    ko_causes: array.array = field(default_factory=lambda: array.array("B"))
+
+
+def read_matches(stream: BinaryIO) -> Iterator[Match]:
+    """Every match in a stream, one at a time, a stream cut off halfway through a match just ends there"""
+    while True:
+        header = stream.read(MATCH.size)
+        if len(header) < MATCH.size:
+            return
+        tag, version, key, width, height, players, length = MATCH.unpack(header)
+        if tag != b"M" or version != FORMAT_VERSION:
+            raise ValueError(f"not a version {FORMAT_VERSION} telemetry stream")
+        start = stream.read(players + width * height)
+        records = stream.read(length)
+        if len(records) < length:
+            return
+        match = Match(key.hex(), width, height, struct.unpack(f"<{players}b", start[:players]), start[players:])
+        parse_records(match, records, struct.Struct(TICK + "H" * players))
+        yield match
+
+
+def parse_records(match: Match, records: bytes, tick_struct: struct.Struct) -> None:
+    tick = 0
+    offset = 0
+    dts = match.dts
+    cells = match.cells
+    while offset < len(records):
+        tag = records[offset : offset + 1]
+        if tag == b"T":
+            _, dt, *player_cells = tick_struct.unpack_from(records, offset)
+            dts.append(dt)
+            cells.extend(player_cells)
+            tick += 1
+            offset += tick_struct.size
+        elif tag == b"C":
+            _, cell, team = CAPTURE.unpack_from(records, offset)
+            match.capture_ticks.append(tick)
+            match.capture_cells.append(cell)
+            match.capture_teams.append(team)
+            offset += CAPTURE.size
+        elif tag == b"P":
+            _, player, powerup = PICKUP.unpack_from(records, offset)
+            match.pickup_ticks.append(tick)
+            match.pickup_players.append(player)
+            match.pickup_powerups.append(powerup)
+            offset += PICKUP.size
+        elif tag == b"K":
+            _, player, cause = KO.unpack_from(records, offset)
+            match.ko_ticks.append(tick)
+            match.ko_players.append(player)
+            match.ko_causes.append(cause)
+            offset += KO.size
+        elif tag == b"E":
+            match.winner = END.unpack_from(records, offset)[1]
+            offset += END.size
+        else:
+            raise ValueError(f"unknown telemetry record {tag!r}")
@@ -21,3 +21,118 @@ class Timer:
 
     def end(self):
         self.time_left = 0
+
+
+class WheelTimer:
+    """A `Timer` that lives on a `TimerWheel` instead of being updated by its owner
+
+    `time_left` is read straight off the wheel's clock, so polling it stays exact, and a callback (if any) is fired by
+    the wheel once the deadline has passed. `update` is only kept so it can stand in for a `Timer`
+    """
+
+    def __init__(self, wheel: "TimerWheel", amount: float, callback=None, repeat: bool = False):
+        self.wheel = wheel
+        self.max_time: float = amount
+        self.callback = callback
+        self.repeat = repeat
+        # bumped on every (re)schedule, so stale wheel entries can be told apart and skipped
+        self.generation = 0
+        self.deadline: float = 0
+        self.restart()
+
+    @property
+    def time_left(self) -> float:
+        return max(self.deadline - self.wheel.time, 0)
+
+    @property
+    def decimal_percent_left(self):
+        return self.time_left / self.max_time
+
+    def update(self) -> float:
+        return self.time_left
+
+    def restart(self):
+        self.deadline = self.wheel.time + self.max_time
+        self.generation += 1
+        if self.callback is not None:
+            self.wheel.insert(self)
+
+    def end(self):
+        """Runs out immediately, without firing the callback"""
+        self.deadline = self.wheel.time
+        self.generation += 1
+
+    cancel = end
+
+    def fire(self):
+        if self.repeat:
+            self.deadline += self.max_time
+            self.wheel.insert(self)
+        self.callback()
+
+
+class TimerWheel:
+    """Hierarchical timing wheel on the game clock
+
+    Level 0 has a slot per tick, every level above it covers `SLOTS` times the span of the one below, and its slots get
+    cascaded down as the clock reaches them. Advancing only touches the slots the clock passes through, so the cost per
+    frame depends on how many timers expire, not on how many exist
+    """
+
+    SLOTS = 64
+    LEVELS = 3
+    TICK = 1 / 64
+
+    def __init__(self, tick: float = TICK):
+        self.tick = tick
+        self.time: float = 0
+        self.current_tick = 0
+        self.wheels: list[list[list[tuple[WheelTimer, int]]]] = [
+            [[] for _ in range(self.SLOTS)] for _ in range(self.LEVELS)
+        ]
+        # anything further out than the top level can hold, looked at again whenever the top level wraps around
+        self.overflow: list[tuple[WheelTimer, int]] = []
+
+    def schedule(self, amount: float, callback=None, repeat: bool = False) -> WheelTimer:
+        return WheelTimer(self, amount, callback, repeat)
+
+    def insert(self, timer: WheelTimer) -> None:
+        self._place((timer, timer.generation))
+
+    def _place(self, entry: tuple[WheelTimer, int]) -> None:
+        timer, _ = entry
+        # fired on the first tick that starts at or after the deadline, so never early, at most a tick late
+        due_tick = max(-int(-timer.deadline // self.tick), self.current_tick + 1)
+        delta = due_tick - self.current_tick
+        for level in range(self.LEVELS):
+            if delta < self.SLOTS ** (level + 1):
+                self.wheels[level][(due_tick // self.SLOTS**level) % self.SLOTS].append(entry)
+                return
+        self.overflow.append(entry)
+
+    def _cascade(self, entries: list[tuple[WheelTimer, int]]) -> None:
+        for entry in entries:
+            timer, generation = entry
+            if timer.generation == generation:
+                self._place(entry)
+
+    def advance(self, dt: float) -> None:
+        self.time += dt
+        target_tick = int(self.time // self.tick)
+        while self.current_tick < target_tick:
+            self.current_tick += 1
+            if not self.current_tick % self.SLOTS**self.LEVELS:
+                overflow, self.overflow = self.overflow, []
+                self._cascade(overflow)
+            for level in range(self.LEVELS - 1, 0, -1):
+                if not self.current_tick % self.SLOTS**level:
+                    slots = self.wheels[level]
+                    idx = (self.current_tick // self.SLOTS**level) % self.SLOTS
+                    entries, slots[idx] = slots[idx], []
+                    self._cascade(entries)
+            slots = self.wheels[0]
+            idx = self.current_tick % self.SLOTS
+            entries, slots[idx] = slots[idx], []
+            for timer, generation in entries:
+                if timer.generation == generation:
+                    timer.fire()
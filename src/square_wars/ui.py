@@ -2,11 +2,14 @@ from typing import Protocol, runtime_checkable
 
 import pygame
 import math
+import itertools
 from . import common, assets
 
+MOUSE_EVENTS = {pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION}
+
 
 class UIManager:
-    def __init__(self, without_selector=False):
+    def __init__(self, without_selector=False, background: pygame.Surface | None = None):
         self.widgets: list[Widget] = []
         self.static: list[Static] = []
         self.selectables: dict[str, Static | Widget] = {}
@@ -14,10 +17,23 @@ class UIManager:
         self.selector_arrow = SelectorArrow()
         self._draw_excludes_once = set()
         self.time = 0
+        # widgets in the middle of an interaction (hovered, pressed, dragged) get every mouse event,
+        # everything else only gets the ones that land inside its bounds
+        self._order: dict[Widget, int] = {}
+        self._active: set[Widget] = set()
+        self._bounds: list[pygame.Rect | pygame.FRect] | None = None
+        # with an (opaque) background the UI is retained: everything is composed into `layer`,
+        # and only the widgets that visibly changed since the last draw get redrawn
+        self.background = background
+        self.layer: pygame.Surface | None = None
+        self._render_keys: dict[Static | Widget, tuple | None] = {}
+        self.dirty_rects: list[pygame.Rect] = []
 
     def add(self, widget, initial_selected=False, selector: str | None = None):
         if isinstance(widget, Button):
             widget.without_thingy = self.without_selector
+        self._order[widget] = len(self.widgets)
+        self._bounds = None
         if not initial_selected:
             self.widgets.append(widget)
         else:
@@ -56,11 +72,49 @@ class UIManager:
     def draw_exclude_once(self, selector: str):
         self._draw_excludes_once.add(self.selectables[selector])
 
+    @staticmethod
+    def _is_active(widget) -> bool:
+        return (
+            getattr(widget, "is_hovered", False)
+            or getattr(widget, "is_pressed", False)
+            or getattr(widget, "clicked", False)
+        )
+
+    def _refresh_active(self, widget) -> None:
+        if self._is_active(widget):
+            self._active.add(widget)
+        else:
+            self._active.discard(widget)
+
+    @staticmethod
+    def _get_bounds(widget) -> pygame.Rect | pygame.FRect:
+        if hasattr(widget, "collide_rect"):
+            return widget.collide_rect
+        return widget.rect
+
+    def hit_test(self, pos) -> list["Widget"]:
+        if self._bounds is None:
+            self._bounds = [self._get_bounds(widget) for widget in self.widgets]
+        return [self.widgets[idx] for idx in pygame.Rect(pos, (1, 1)).collidelistall(self._bounds)]
+
+    def dispatch(self, event: pygame.Event) -> None:
+        targets = self._active.union(self.hit_test(event.pos))
+        for widget in sorted(targets, key=self._order.__getitem__):
+            handle_event = getattr(widget, "handle_event", None)
+            if handle_event is None:
+                continue
+            handle_event(event)
+            self._refresh_active(widget)
+            # hovering can change a widget's bounds, so its entry in the hit-test list is refreshed
+            self._bounds[self._order[widget]] = self._get_bounds(widget)
+
     def update(self):
         self._draw_excludes_once.clear()
+        # positions may have been changed from the outside since last frame
+        self._bounds = None
 
         selected = None
-        for event in common.events:
+        for event in common.bus.select(pygame.KEYDOWN, pygame.KEYUP, *MOUSE_EVENTS):
             if event.type == pygame.KEYDOWN:
                 if event.key in (pygame.K_s, pygame.K_DOWN):
                     self.selector_arrow.current_idx += 1
@@ -77,18 +131,22 @@ class UIManager:
                 elif event.key == pygame.K_RETURN:
                     if self.selector_arrow.last_selection is not None:
                         self.selector_arrow.last_selection.is_pressed = True
+                        self._refresh_active(self.selector_arrow.last_selection)
             elif event.type == pygame.KEYUP:
                 if event.key == pygame.K_RETURN:
                     if self.selector_arrow.last_selection is not None:
                         getattr(self.selector_arrow.last_selection, "callback", lambda: None)()
+            elif event.type in MOUSE_EVENTS:
+                self.dispatch(event)
 
-        for widget in self.widgets:
-            widget.update()
+        # only widgets that are interacted with can be hovered, so there's no need to look at the rest
+        for widget in sorted(self._active, key=self._order.__getitem__):
             if getattr(widget, "is_hovered", False):
                 if selected is None:
                     selected = widget
                 else:
                     widget.is_hovered = False
+                    self._refresh_active(widget)
 
         if self.without_selector:
             selected = None
@@ -105,26 +163,76 @@ class UIManager:
 
         if self.selector_arrow.last_selection is not None:
             self.selector_arrow.last_selection.is_hovered = True
+            self._refresh_active(self.selector_arrow.last_selection)
 
         self.time += common.dt
 
-    def draw(self, dst: pygame.Surface) -> None:
-        for widget in self.widgets:
-            if widget in self._draw_excludes_once:
-                continue
-            if isinstance(widget, HorizontalSlider):
-                continue
+    @staticmethod
+    def _get_draw_rect(widget) -> pygame.Rect:
+        if isinstance(widget, HorizontalSlider):
+            return widget.rail.union(widget.collide_rect)
+        return pygame.Rect(widget.rect)
+
+    @staticmethod
+    def _draw_widget(dst: pygame.Surface, widget) -> None:
+        if isinstance(widget, HorizontalSlider):
+            widget.draw(dst)
+        else:
             dst.blit(widget.image, widget.rect)
 
-        for widget in self.static:
-            if widget in self._draw_excludes_once:
+    def _render_key(self, widget) -> tuple | None:
+        # everything that affects how a widget looks, None if it isn't drawn at all
+        if widget in self._draw_excludes_once:
+            return None
+        if isinstance(widget, HorizontalSlider):
+            return tuple(self._get_draw_rect(widget)), widget.x, widget.y
+        return tuple(self._get_draw_rect(widget)), widget.image, widget.image.get_alpha()
+
+    def _update_layer(self) -> list[pygame.Rect]:
+        if self.layer is None or self.layer.get_size() != self.background.get_size():
+            self.layer = self.background.copy()
+            self._render_keys.clear()
+
+        drawables = list(itertools.chain(self.widgets, self.static))
+        dirty_rects = []
+        for widget in drawables:
+            key = self._render_key(widget)
+            old_key = self._render_keys.get(widget)
+            if key == old_key and widget in self._render_keys:
                 continue
-            dst.blit(widget.image, widget.rect)
+            self._render_keys[widget] = key
+            # both where it was and where it is now have to be redrawn
+            for changed_key in (old_key, key):
+                if changed_key is not None:
+                    dirty_rects.append(pygame.Rect(changed_key[0]))
+
+        for rect in dirty_rects:
+            self.layer.set_clip(rect)
+            self.layer.blit(self.background, rect, rect)
+            for widget in drawables:
+                key = self._render_keys[widget]
+                if key is not None and rect.colliderect(key[0]):
+                    self._draw_widget(self.layer, widget)
+        self.layer.set_clip(None)
+        return dirty_rects
+
+    def draw(self, dst: pygame.Surface) -> None:
+        if self.background is not None:
+            self.dirty_rects = self._update_layer()
+            dst.blit(self.layer, (0, 0))
+        else:
+            self.dirty_rects = []
+            for widget in itertools.chain(self.widgets, self.static):
+                if widget in self._draw_excludes_once:
+                    continue
+                self._draw_widget(dst, widget)
+                self.dirty_rects.append(self._get_draw_rect(widget))
 
         if self.selector_arrow.shown:
             arrow_rect = self.selector_arrow.rect.copy()
             arrow_rect.x += math.sin(self.time * 3) * 2
             dst.blit(self.selector_arrow.image, arrow_rect)
+            self.dirty_rects.append(pygame.Rect(arrow_rect))
 
 
 @runtime_checkable
@@ -137,6 +245,8 @@ class Widget(Static):
     position: pygame.Vector2
     collide_rect: pygame.Rect | pygame.FRect
 
+    def handle_event(self, event: pygame.Event) -> None: ...
+
     def update(self) -> None: ...
 
 
@@ -212,6 +322,9 @@ class Label(Widget):
         pygame.draw.rect(self.image, self.bg, self.size_rect, border_radius=self.border_radius)
         self.image.blit(text_surf, text_surf.get_rect(center=self.size_rect.center))
 
+    def handle_event(self, event):
+        pass
+
     def update(self):
         pass
 
@@ -232,42 +345,56 @@ class Button:
         self.is_pressed = False
         self.e = e
         self.without_thingy = without_thingy
+        self._rects_key = None
+        self._rect = None
+        self._collide_rect = None
 
-    def update(self):
-        for event in common.events:
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                self.is_pressed = event.button == pygame.BUTTON_LEFT and self.collide_rect.collidepoint(event.pos)
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            self.is_pressed = event.button == pygame.BUTTON_LEFT and self.collide_rect.collidepoint(event.pos)
 
-            elif event.type == pygame.MOUSEBUTTONUP:
-                if self.is_pressed and self.collide_rect.collidepoint(event.pos):
-                    self.callback()
-                self.is_pressed = False
+        elif event.type == pygame.MOUSEBUTTONUP:
+            if self.is_pressed and self.collide_rect.collidepoint(event.pos):
+                self.callback()
+            self.is_pressed = False
 
-            elif event.type == pygame.MOUSEMOTION:
-                self.is_hovered = self.collide_rect.collidepoint(event.pos)
+        elif event.type == pygame.MOUSEMOTION:
+            self.is_hovered = self.collide_rect.collidepoint(event.pos)
 
-    @property
-    def rect(self) -> pygame.Rect:
-        rect = self.image.get_rect()
-        position = self.position.copy()
+    def update(self):
+        # only needed when not managed by a UIManager, which routes events to `handle_event` itself
+        for event in common.bus.select(*MOUSE_EVENTS):
+            self.handle_event(event)
+
+    def _update_rects(self) -> None:
+        # both rects only depend on these, so they're only rebuilt when one of them changes
+        shifted = self.is_hovered and not self.without_thingy
+        key = (self.position.x, self.position.y, shifted, self.image.get_size(), self.e)
+        if key == self._rects_key:
+            return
+        self._rects_key = key
 
-        if self.is_hovered and not self.without_thingy:
+        self._rect = self.image.get_rect()
+        position = self.position.copy()
+        if shifted:
             position.x += 1
             # rect.width += 1
+        setattr(self._rect, self.e, position)
 
-        setattr(rect, self.e, position)
-        return rect
+        self._collide_rect = self.image.get_rect()
+        if shifted:
+            self._collide_rect.width += 1
+        setattr(self._collide_rect, self.e, self.position)
 
     @property
-    def collide_rect(self) -> pygame.Rect:
-        rect = self.image.get_rect()
-        position = self.position.copy()
-
-        if self.is_hovered and not self.without_thingy:
-            rect.width += 1
+    def rect(self) -> pygame.Rect:
+        self._update_rects()
+        return self._rect
 
-        setattr(rect, self.e, position)
-        return rect
+    @property
+    def collide_rect(self) -> pygame.Rect:
+        self._update_rects()
+        return self._collide_rect
 
 
 class HorizontalSlider(Widget):
@@ -291,24 +418,39 @@ class HorizontalSlider(Widget):
         self.radius = int(rect.width * 0.05)
         self.clicked = False
         self.prev_value = 0
+        self._collide_rect = pygame.Rect(0, 0, self.radius * 2 + 1, self.radius * 2 + 1)
 
         self.do_initial_callback = do_initial_callback
         self.value = initial_value
         self.do_initial_callback = True
 
+    def handle_event(self, event: pygame.Event) -> None:
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.collision(event.pos):
+            self.clicked = True
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1 and self.clicked:
+            self.clicked = False
+            value = self.value
+            if self.prev_value != value:
+                self.prev_value = value
+
+        elif event.type == pygame.MOUSEMOTION and self.clicked:
+            self.x, self.y = self.clamp_rail(event.pos)
+            self.value = round(self.value / self.step) * self.step
+
     def update(self) -> None:
-        for event in common.events:
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.collision(event.pos):
-                self.clicked = True
-            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1 and self.clicked:
-                self.clicked = False
-                value = self.value
-                if self.prev_value != value:
-                    self.prev_value = value
-
-            elif event.type == pygame.MOUSEMOTION and self.clicked:
-                self.x, self.y = self.clamp_rail(event.pos)
-                self.value = round(self.value / self.step) * self.step
+        # only needed when not managed by a UIManager, which routes events to `handle_event` itself
+        for event in common.bus.select(*MOUSE_EVENTS):
+            self.handle_event(event)
+
+    @property
+    def rect(self) -> pygame.Rect:
+        return self.rail
+
+    @property
+    def collide_rect(self) -> pygame.Rect:
+        # bounding box of the knob, `collision` does the exact circle test
+        self._collide_rect.center = (self.x, self.y)
+        return self._collide_rect
 
     def collision(self, pos: tuple[int, int]) -> bool:
         mx, my = pos
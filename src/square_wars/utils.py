@@ -1,10 +1,10 @@
-import functools
+import random
 
 import pygame
 
 
-@functools.cache
 def flip_surface(surface, flip_x, flip_y):
+    # not cached, `animation.frame_table` keeps the flipped frames that get reused
     if flip_x:
         surface = pygame.transform.flip(surface, True, False)
     if flip_y:
@@ -60,3 +60,40 @@ def nine_slice(images, size):
 
     image.blit(images[8], middle_rect.bottomright)
     return image
+
+
+class RandomSet:
+    """A set that can also hand out a random member in constant time"""
+
+    def __init__(self, items=()):
+        self.items = []
+        self.indices = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item) -> None:
+        if item not in self.indices:
+            self.indices[item] = len(self.items)
+            self.items.append(item)
+
+    def discard(self, item) -> None:
+        index = self.indices.pop(item, None)
+        if index is None:
+            return
+        # the last item takes the removed one's place, so nothing has to shift
+        last = self.items.pop()
+        if index < len(self.items):
+            self.items[index] = last
+            self.indices[last] = index
+
+    def choice(self, rng=random):
+        return rng.choice(self.items)
+
+    def __contains__(self, item) -> bool:
+        return item in self.indices
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)